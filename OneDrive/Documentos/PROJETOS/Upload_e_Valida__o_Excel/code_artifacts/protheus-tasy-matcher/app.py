@@ -1,11 +1,17 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import re
 from rapidfuzz import fuzz, process
 from datetime import datetime
 import io
-import unicodedata
+from itertools import islice
+
+from excel_streaming import HEADER_SCAN_ROWS, StreamingWorkbook, normalize_header
+from text_normalization import APP_PROFILE, normalize_series, normalize_value
+from dedup import DistinctValues, dedup_savings
+from disk_cache import content_hash, default_cache
 
 # Configuração da página
 st.set_page_config(
@@ -58,8 +64,22 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Regex pré-compilados para performance
-RE_SPECIAL = re.compile(r'[^a-z0-9\s]')
-RE_SPACES = re.compile(r'\s+')
+RE_FLOAT_CODE = re.compile(r'\.0+$')
+
+# Versão da leitura das planilhas (entra na chave do cache em disco; mudar ao alterar
+# read_excel_file, a detecção de cabeçalhos ou excel_streaming)
+WORKBOOK_CACHE_VERSION = 1
+
+# Células por bloco da matriz de scores da busca por descrição
+FALLBACK_BLOCK_CELLS = 10_000_000
+
+# Colunas da sugestão por descrição (valores para linhas sem sugestão)
+SUGGESTION_DEFAULTS = {
+    'Codigo_Sugerido': '',
+    'Descricao_Sugerida': '',
+    'Score_Sugestao': 0.0,
+    'Sugestao_Ambigua': ''
+}
 
 @st.cache_data(show_spinner=False)
 def get_template_excel():
@@ -82,228 +102,282 @@ def normalize_text(text):
     - Converte para minúsculas
     - Remove espaços extras
     """
-    if pd.isna(text):
-        return ""
-    text = str(text).lower()
-    # Remove caracteres especiais e espaços múltiplos usando regex pré-compilada
-    text = RE_SPECIAL.sub(" ", text)
-    text = RE_SPACES.sub(" ", text)
-    return text.strip()
+    return normalize_value(text, APP_PROFILE)
+
+def _detect_protheus_columns(headers):
+    """Colunas 'Codigo' e 'Descricao' da aba Protheus em uma linha candidata a cabeçalho"""
+    if 'codigo' not in headers or 'descricao' not in headers:
+        return None
+    return 0, {'Codigo': headers.index('codigo'), 'Descricao': headers.index('descricao')}
+
+def _find_header(headers, required, preferred):
+    """Primeira coluna com `required` e `preferred` no nome; senão, a primeira só com `required`"""
+    for index, name in enumerate(headers):
+        if required in name and preferred in name:
+            return index, True
+    for index, name in enumerate(headers):
+        if required in name:
+            return index, False
+    return None, False
+
+def _detect_de_para_columns(headers):
+    """Colunas de código e descrição da aba De Para em uma linha candidata a cabeçalho"""
+    codigo_index, codigo_exact = _find_header(headers, 'codigo', 'material')
+    desc_index, desc_exact = _find_header(headers, 'descricao', 'tasy')
+    if codigo_index is None or desc_index is None:
+        return None
+    # Linhas com os nomes completos ('Código do material', 'Descrição ... Tasy') têm prioridade
+    return int(codigo_exact) + int(desc_exact), {'Codigo_Tasy': codigo_index, 'Descricao_Tasy': desc_index}
+
+def _header_candidates(workbook, sheet_name):
+    """Nomes normalizados das primeiras linhas da aba (para mensagens de erro)"""
+    rows = islice(workbook.iter_rows(sheet_name), HEADER_SCAN_ROWS)
+    return [[normalize_header(value) for value in row] for row in rows]
+
+def _missing_protheus_column_message(workbook, sheet_name):
+    """Mensagem da coluna obrigatória ausente na aba Protheus"""
+    if not any('descricao' in headers for headers in _header_candidates(workbook, sheet_name)):
+        return "❌ Coluna 'Descricao' não encontrada na aba Protheus."
+    return "❌ Coluna 'Codigo' não encontrada na aba Protheus."
+
+def _missing_de_para_column_message(workbook, sheet_name):
+    """Mensagem da coluna obrigatória ausente na aba De Para Almoxarifado"""
+    candidates = _header_candidates(workbook, sheet_name)
+    if not any(_find_header(headers, 'codigo', 'material')[0] is not None for headers in candidates):
+        return "❌ Coluna 'Código do material' não encontrada na aba De Para Almoxarifado."
+    return "❌ Coluna 'Descrição do material (Tasy)' não encontrada na aba De Para Almoxarifado."
 
 def validate_excel_file(uploaded_file):
     """
     Valida o arquivo Excel carregado.
+    Arquivos já lidos (mesmo conteúdo, por SHA-256, e mesma WORKBOOK_CACHE_VERSION) vêm do
+    cache em disco, sem nova leitura.
+    Retorna (success, message, df_protheus, df_de_para)
+    """
+    cache = default_cache()
+    key = content_hash('app.validate_excel_file', WORKBOOK_CACHE_VERSION, uploaded_file.getvalue())
+    cached = cache.get_object('workbook', key)
+    if cached is not None:
+        df_protheus, df_de_para = cached
+        return True, "✅ Arquivo validado com sucesso! (leitura em cache)", df_protheus, df_de_para
+    
+    success, message, df_protheus, df_de_para = read_excel_file(uploaded_file)
+    if success:
+        cache.put_object('workbook', key, (df_protheus, df_de_para))
+    return success, message, df_protheus, df_de_para
+
+def read_excel_file(uploaded_file):
+    """
+    Lê e valida as abas do arquivo Excel.
     Retorna (success, message, df_protheus, df_de_para)
     """
     try:
-        # Ler o arquivo Excel
-        xls = pd.ExcelFile(uploaded_file)
-        # Verificar se as abas existem (case-insensitive)
-        sheet_names_lower = {name.lower(): name for name in xls.sheet_names}
-        if 'protheus' not in sheet_names_lower:
-            return False, "❌ Aba 'Protheus' não encontrada no arquivo.", None, None
-        if 'de para almoxarifado' not in sheet_names_lower:
-            return False, "❌ Aba 'De Para Almoxarifado' não encontrada no arquivo.", None, None
-        # Ler as abas
-        protheus_sheet = sheet_names_lower['protheus']
-        de_para_sheet = sheet_names_lower['de para almoxarifado']
-        # Ler aba Protheus (header na linha 1) - limitar para evitar problemas de memória
-        try:
-            df_protheus = pd.read_excel(uploaded_file, sheet_name=protheus_sheet, header=1, nrows=5000)
-        except:
-            df_protheus = pd.read_excel(uploaded_file, sheet_name=protheus_sheet, header=1)
-        # Ler aba De Para Almoxarifado - limitar para evitar problemas de memória
-        try:
-            df_de_para = pd.read_excel(uploaded_file, sheet_name=de_para_sheet, header=0, nrows=2000)
-        except:
-            df_de_para = pd.read_excel(uploaded_file, sheet_name=de_para_sheet, header=0)
-        # Remove acentos de strings (para reconhecimento robusto de cabeçalhos)
-        def strip_accents(s: str) -> str:
-            if s is None:
-                return ""
-            s = str(s)
-            return ''.join(c for c in unicodedata.normalize('NFKD', s) if not unicodedata.combining(c))
-        # Validar colunas obrigatórias - case insensitive
-        protheus_cols = {str(col).strip().lower(): col for col in df_protheus.columns}
-        if 'descricao' not in protheus_cols:
-            return False, "❌ Coluna 'Descricao' não encontrada na aba Protheus.", None, None
-        if 'codigo' not in protheus_cols:
-            return False, "❌ Coluna 'Codigo' não encontrada na aba Protheus.", None, None
-        protheus_cols = {strip_accents(str(col)).strip().lower(): col for col in df_protheus.columns}
-        # Fallback de cabeçalho: tentar header=0 se não encontrar as colunas
-        if 'descricao' not in protheus_cols or 'codigo' not in protheus_cols:
-            try:
-                df_protheus_alt = pd.read_excel(uploaded_file, sheet_name=protheus_sheet, header=0, nrows=5000)
-            except:
-                df_protheus_alt = pd.read_excel(uploaded_file, sheet_name=protheus_sheet, header=0)
-            protheus_cols_alt = {strip_accents(str(col)).strip().lower(): col for col in df_protheus_alt.columns}
-            if 'descricao' in protheus_cols_alt and 'codigo' in protheus_cols_alt:
-                df_protheus = df_protheus_alt
-                protheus_cols = protheus_cols_alt
-        if 'descricao' not in protheus_cols:
-            return False, "❌ Coluna 'Descricao' não encontrada na aba Protheus.", None, None
-        if 'codigo' not in protheus_cols:
-            return False, "❌ Coluna 'Codigo' não encontrada na aba Protheus.", None, None
-        # Mapear colunas da aba De Para (removendo acentos e normalizando)
-        de_para_cols = {strip_accents(str(col)).strip().lower(): col for col in df_de_para.columns}
-        # Procurar coluna de código e de descrição do Tasy
-
-        codigo_tasy_col = None
-        for norm, original in de_para_cols.items():
-            if 'codigo' in norm and 'material' in norm:
-                codigo_tasy_col = original
-                break
-        # Fallback: tentar outra linha de cabeçalho (header=1) se não encontrar
-        if codigo_tasy_col is None:
-            try:
-                df_de_para_alt = pd.read_excel(uploaded_file, sheet_name=de_para_sheet, header=1, nrows=2000)
-            except:
-                df_de_para_alt = pd.read_excel(uploaded_file, sheet_name=de_para_sheet, header=1)
-            de_para_cols_alt = {strip_accents(str(col)).strip().lower(): col for col in df_de_para_alt.columns}
-            for norm, original in de_para_cols_alt.items():
-                if 'codigo' in norm and 'material' in norm:
-                    codigo_tasy_col = original
-                    df_de_para = df_de_para_alt
-                    de_para_cols = de_para_cols_alt
-                    break
-        # Fallback mais flexível: aceitar qualquer coluna com 'codigo'
-        if codigo_tasy_col is None:
-            for norm, original in de_para_cols.items():
-                if 'codigo' in norm:
-                    codigo_tasy_col = original
-                    break
-        if codigo_tasy_col is None:
-            return False, "❌ Coluna 'Código do material' não encontrada na aba De Para Almoxarifado.", None, None
-        desc_tasy_col = None
-        for norm, original in de_para_cols.items():
-            if 'descricao' in norm and 'tasy' in norm:
-                desc_tasy_col = original
-                break
-        # Fallback: tentar outra linha de cabeçalho (header=1) se não encontrar
-        if desc_tasy_col is None:
-            try:
-                df_de_para_alt = pd.read_excel(uploaded_file, sheet_name=de_para_sheet, header=1, nrows=2000)
-            except:
-                df_de_para_alt = pd.read_excel(uploaded_file, sheet_name=de_para_sheet, header=1)
-            de_para_cols_alt = {strip_accents(str(col)).strip().lower(): col for col in df_de_para_alt.columns}
-            for norm, original in de_para_cols_alt.items():
-                if 'descricao' in norm and 'tasy' in norm:
-                    desc_tasy_col = original
-                    df_de_para = df_de_para_alt
-                    de_para_cols = de_para_cols_alt
-                    break
-        # Fallback mais flexível: aceitar qualquer coluna com 'descricao'
-        if desc_tasy_col is None:
-            for norm, original in de_para_cols.items():
-                if 'descricao' in norm:
-                    desc_tasy_col = original
-                    break
-        if desc_tasy_col is None:
-            return False, "❌ Coluna 'Descrição do material (Tasy)' não encontrada na aba De Para Almoxarifado.", None, None
-        # Padronizar nomes das colunas
-        df_protheus = df_protheus.rename(columns={
-            protheus_cols['codigo']: 'Codigo',
-            protheus_cols['descricao']: 'Descricao'
-        })
-        df_de_para = df_de_para.rename(columns={
-            codigo_tasy_col: 'Codigo_Tasy',
-            desc_tasy_col: 'Descricao_Tasy'
-        })
+        # Abrir a pasta de trabalho uma única vez (leitura em fluxo)
+        with StreamingWorkbook(uploaded_file) as workbook:
+            # Verificar se as abas existem (case-insensitive)
+            protheus_sheet = workbook.find_sheet('protheus')
+            if protheus_sheet is None:
+                return False, "❌ Aba 'Protheus' não encontrada no arquivo.", None, None
+            de_para_sheet = workbook.find_sheet('de para almoxarifado')
+            if de_para_sheet is None:
+                return False, "❌ Aba 'De Para Almoxarifado' não encontrada no arquivo.", None, None
+            # Aba Protheus: cabeçalho preferencialmente na linha 2 do modelo, depois na linha 1
+            protheus_stream = workbook.open_sheet(
+                protheus_sheet, _detect_protheus_columns, preferred_header_rows=(1, 0)
+            )
+            if protheus_stream is None:
+                return False, _missing_protheus_column_message(workbook, protheus_sheet), None, None
+            # Aba De Para: cabeçalho preferencialmente na linha 1, depois na linha 2
+            de_para_stream = workbook.open_sheet(
+                de_para_sheet, _detect_de_para_columns, preferred_header_rows=(0, 1)
+            )
+            if de_para_stream is None:
+                return False, _missing_de_para_column_message(workbook, de_para_sheet), None, None
+            # Ler os dados em blocos, apenas com as colunas necessárias
+            df_protheus = protheus_stream.read()
+            df_de_para = de_para_stream.read()
         # Garantir tipo consistente para Código
-        if 'Codigo' in df_protheus.columns:
-            df_protheus['Codigo'] = df_protheus['Codigo'].astype(str)
-        if 'Codigo_Tasy' in df_de_para.columns:
-            df_de_para['Codigo_Tasy'] = df_de_para['Codigo_Tasy'].astype(str)
-        # Adicionar mensagem sobre limitação se aplicável
-        info_msg = "✅ Arquivo validado com sucesso!"
-        if len(df_protheus) >= 5000:
-            info_msg += f" (Limitado a {len(df_protheus)} itens Protheus para performance)"
-        if len(df_de_para) >= 2000:
-            info_msg += f" (Limitado a {len(df_de_para)} itens Tasy para performance)"
-        return True, info_msg, df_protheus, df_de_para
+        df_protheus['Codigo'] = df_protheus['Codigo'].astype(str)
+        df_de_para['Codigo_Tasy'] = df_de_para['Codigo_Tasy'].astype(str)
+        return True, "✅ Arquivo validado com sucesso!", df_protheus, df_de_para
     except Exception as e:
         return False, f"❌ Erro ao ler o arquivo: {str(e)}", None, None
 
 @st.cache_data(show_spinner=False)
-def compute_matches(protheus_descriptions, protheus_codes, protheus_original, tasy_norm_list, tasy_orig_list, threshold):
-    """Computa correspondências com cache e sem componentes visuais para performance."""
-    results = []
-    for tasy_desc_norm, tasy_desc in zip(tasy_norm_list, tasy_orig_list):
-        matches = process.extract(
-            tasy_desc_norm,
-            protheus_descriptions,
-            scorer=fuzz.token_sort_ratio,
-            limit=3,  # top 3 para detectar múltiplas correspondências
-            score_cutoff=threshold  # evita cálculos abaixo do limiar
-        )
-        if matches:
-            best_match = matches[0]
-            best_match_idx = best_match[2]
-            score = best_match[1]
-            revisao_obrigatoria = False
-            if len(matches) > 1:
-                score_diff = matches[0][1] - matches[1][1]
-                if score_diff < 5:
-                    revisao_obrigatoria = True
-            results.append({
-                'Codigo_Protheus': str(protheus_codes[best_match_idx]),
-                'Descricao_Protheus': protheus_original[best_match_idx],
-                'Descricao_Tasy': tasy_desc,
-                'Score_Similaridade': round(score, 2),
-                'Revisao_Obrigatoria': '⚠️ SIM' if revisao_obrigatoria else 'NÃO'
-            })
-    return pd.DataFrame(results)
+def compute_top_scores(protheus_descriptions, tasy_norm_list, protheus_counts=None):
+    """
+    Pontua em lote (rapidfuzz cdist por blocos de linhas) cada descrição Tasy contra o
+    catálogo Protheus, sem limiar: o resultado em cache serve a qualquer limiar.
+    Retorna (índice do melhor item, melhor score, segundo melhor score) por descrição;
+    em empate vence o menor índice (mesma ordem de process.extract).
+    Com `protheus_counts` (ocorrências de cada descrição de um catálogo deduplicado), uma
+    descrição repetida tem a si mesma como segunda melhor, como no catálogo completo.
+    """
+    n_tasy = len(tasy_norm_list)
+    best_idx = np.full(n_tasy, -1, dtype=np.int64)
+    top_scores = np.zeros((n_tasy, 2), dtype=np.float64)
+    if n_tasy and len(protheus_descriptions):
+        # Blocos de linhas limitam a matriz de scores a ~FALLBACK_BLOCK_CELLS células
+        block_rows = max(1, FALLBACK_BLOCK_CELLS // len(protheus_descriptions))
+        for start in range(0, n_tasy, block_rows):
+            end = min(start + block_rows, n_tasy)
+            scores = process.cdist(
+                tasy_norm_list[start:end],
+                protheus_descriptions,
+                scorer=fuzz.token_sort_ratio,
+                workers=-1
+            )
+            rows = np.arange(end - start)
+            # top-2 por argmax sucessivos
+            for k in range(min(2, len(protheus_descriptions))):
+                idx = scores.argmax(axis=1)
+                top_scores[start:end, k] = scores[rows, idx]
+                if k == 0:
+                    best_idx[start:end] = idx
+                scores[rows, idx] = -1
+            if protheus_counts is not None:
+                # A segunda melhor correspondência é outra ocorrência da mesma descrição
+                repeated = np.asarray(protheus_counts)[best_idx[start:end]] > 1
+                top_scores[start:end][repeated, 1] = top_scores[start:end][repeated, 0]
+    return best_idx, top_scores[:, 0], top_scores[:, 1]
+
+def compute_matches(protheus_descriptions, protheus_codes, protheus_original, tasy_norm_list, tasy_orig_list, threshold,
+                    top_k=3, protheus_counts=None):
+    """
+    Computa correspondências sem componentes visuais para performance.
+    Os scores vêm de compute_top_scores (em cache, independentes do limiar): mudar o
+    limiar apenas refaz este filtro. Retorna uma linha por descrição, na ordem de entrada.
+    Com `protheus_counts` (ocorrências de cada descrição de um catálogo deduplicado), uma
+    descrição repetida conta como correspondência múltipla, como no catálogo completo.
+    """
+    n_tasy = len(tasy_norm_list)
+    best_idx, best_score, second_score = compute_top_scores(
+        protheus_descriptions, tasy_norm_list, protheus_counts
+    )
+    # Scores abaixo do limiar não contam (mesmo efeito de score_cutoff no cdist)
+    found = (best_idx >= 0) & (best_score >= threshold) & (best_score > 0)
+    second_score = np.where(second_score >= threshold, second_score, 0.0)
+    # múltiplas correspondências similares (segunda acima do limiar e a menos de 5 pontos)
+    revisao_obrigatoria = np.zeros(n_tasy, dtype=bool)
+    if top_k > 1:
+        revisao_obrigatoria = (second_score > 0) & (best_score - second_score < 5)
+    
+    codigo_protheus = np.full(n_tasy, '', dtype=object)
+    descricao_protheus = np.full(n_tasy, '', dtype=object)
+    codigo_protheus[found] = [str(protheus_codes[i]) for i in best_idx[found]]
+    descricao_protheus[found] = [protheus_original[i] for i in best_idx[found]]
+    return pd.DataFrame({
+        'Codigo_Protheus': codigo_protheus,
+        'Descricao_Protheus': descricao_protheus,
+        'Descricao_Tasy': list(tasy_orig_list),
+        'Score_Similaridade': np.round(np.where(found, best_score, 0.0), 2),
+        'Revisao_Obrigatoria': np.where(found & revisao_obrigatoria, '⚠️ SIM', 'NÃO')
+    })
+
+def normalize_codes(codes):
+    """
+    Normaliza códigos para a junção entre abas:
+    - Remove espaços nas bordas
+    - Unifica códigos lidos como número ("123.0" -> "123")
+    - Remove zeros à esquerda ("000123" -> "123")
+    """
+    codes = codes.astype(str).str.strip()
+    codes = codes.str.replace(RE_FLOAT_CODE, '', regex=True)
+    stripped = codes.str.lstrip('0')
+    # Códigos compostos só de zeros continuam "0"
+    return stripped.where(stripped != '', codes.str[:1])
+
+def suggest_by_description(protheus, descricoes_tasy, threshold):
+    """
+    Propõe um código Protheus para descrições Tasy sem código correspondente.
+    Descrições Tasy e do catálogo Protheus são deduplicadas pelo texto normalizado:
+    cada par distinto é pontuado uma única vez (compute_matches em lote) e o
+    resultado é replicado para as linhas repetidas.
+    Retorna (DataFrame alinhado a `descricoes_tasy`, economia da deduplicação ou None).
+    """
+    if len(descricoes_tasy) == 0 or len(protheus) == 0:
+        return pd.DataFrame({
+            column: [default] * len(descricoes_tasy) for column, default in SUGGESTION_DEFAULTS.items()
+        }), None
+    
+    tasy = DistinctValues(normalize_series(descricoes_tasy, APP_PROFILE).tolist())
+    catalog = DistinctValues(normalize_series(protheus['Descricao_Protheus'], APP_PROFILE).tolist())
+    first_rows = catalog.first_rows
+    matches = compute_matches(
+        catalog.values,
+        protheus['Codigo_Protheus'].to_numpy()[first_rows].tolist(),
+        protheus['Descricao_Protheus'].to_numpy()[first_rows].tolist(),
+        tasy.values,
+        tasy.values,
+        threshold,
+        protheus_counts=catalog.counts.tolist()
+    )
+    matches = matches.iloc[tasy.inverse].reset_index(drop=True)
+    proposed = matches['Codigo_Protheus'] != ''
+    return pd.DataFrame({
+        'Codigo_Sugerido': matches['Codigo_Protheus'],
+        'Descricao_Sugerida': matches['Descricao_Protheus'],
+        'Score_Sugestao': matches['Score_Similaridade'],
+        'Sugestao_Ambigua': matches['Revisao_Obrigatoria'].where(proposed, '')
+    }), dedup_savings(tasy, catalog)
 
 def find_matches(df_protheus, df_de_para, threshold):
     """
-    Executa comparação sequencial e precisa entre abas:
-    1) Compara 'Codigo_Tasy' (De Para) com 'Codigo' (Protheus)
+    Executa comparação vetorizada e precisa entre abas:
+    1) Junta 'Codigo_Tasy' (De Para) com 'Codigo' (Protheus) pelo código normalizado
     2) Para códigos encontrados, compara 'Descrição do material Tasy' com 'Descricao' usando similaridade
+    3) Para códigos não encontrados, sugere um código Protheus pela descrição mais similar
     """
     # Filtrar linhas válidas
-    df_protheus_clean = df_protheus.dropna(subset=['Codigo', 'Descricao']).copy()
-    df_de_para_clean = df_de_para.dropna(subset=['Codigo_Tasy', 'Descricao_Tasy']).copy()
+    df_protheus_clean = df_protheus.dropna(subset=['Codigo', 'Descricao'])
+    df_de_para_clean = df_de_para.dropna(subset=['Codigo_Tasy', 'Descricao_Tasy'])
 
-    # Normalização das descrições
-    df_protheus_clean['Descricao_Normalizada'] = df_protheus_clean['Descricao'].apply(normalize_text)
-    df_de_para_clean['Descricao_Tasy_Normalizada'] = df_de_para_clean['Descricao_Tasy'].apply(normalize_text)
+    with st.spinner("🔎 Comparando por código e descrição..."):
+        # Lado Protheus: um registro por código normalizado (o último prevalece)
+        protheus = pd.DataFrame({
+            'Codigo_Normalizado': normalize_codes(df_protheus_clean['Codigo']).to_numpy(),
+            'Codigo_Protheus': df_protheus_clean['Codigo'].astype(str).to_numpy(),
+            'Descricao_Protheus': df_protheus_clean['Descricao'].to_numpy()
+        }).drop_duplicates(subset='Codigo_Normalizado', keep='last')
 
-    # Mapear código -> descrição (normalizada e original)
-    code_to_desc_norm = dict(zip(df_protheus_clean['Codigo'].astype(str), df_protheus_clean['Descricao_Normalizada']))
-    code_to_desc_orig = dict(zip(df_protheus_clean['Codigo'].astype(str), df_protheus_clean['Descricao']))
+        de_para = pd.DataFrame({
+            'Codigo_Normalizado': normalize_codes(df_de_para_clean['Codigo_Tasy']).to_numpy(),
+            'Codigo_Tasy': df_de_para_clean['Codigo_Tasy'].astype(str).to_numpy(),
+            'Descricao_Tasy': df_de_para_clean['Descricao_Tasy'].to_numpy()
+        })
 
-    results = []
-    with st.spinner("🔎 Comparando por código e descrição..."):
-        for _, row in df_de_para_clean.iterrows():
-            codigo_tasy = str(row['Codigo_Tasy'])
-            desc_tasy_orig = row['Descricao_Tasy']
-            desc_tasy_norm = row['Descricao_Tasy_Normalizada']
-
-            if codigo_tasy in code_to_desc_norm:
-                desc_prot_norm = code_to_desc_norm[codigo_tasy]
-                desc_prot_orig = code_to_desc_orig[codigo_tasy]
-                score = fuzz.token_sort_ratio(desc_tasy_norm, desc_prot_norm)
-                results.append({
-                    'Codigo_Tasy': codigo_tasy,
-                    'Codigo_Protheus': codigo_tasy,
-                    'Status_Codigo': 'OK',
-                    'Descricao_Tasy': desc_tasy_orig,
-                    'Descricao_Protheus': desc_prot_orig,
-                    'Score_Similaridade': round(score, 2),
-                    'Revisao_Obrigatoria': '⚠️ SIM' if score < threshold else 'NÃO'
-                })
-            else:
-                results.append({
-                    'Codigo_Tasy': codigo_tasy,
-                    'Codigo_Protheus': '',
-                    'Status_Codigo': 'Não encontrado',
-                    'Descricao_Tasy': desc_tasy_orig,
-                    'Descricao_Protheus': '',
-                    'Score_Similaridade': 0.0,
-                    'Revisao_Obrigatoria': '⚠️ SIM'
-                })
-
-    return pd.DataFrame(results)
+        # Junção por código (hash join); a ordem da aba De Para é preservada
+        merged = de_para.merge(protheus, on='Codigo_Normalizado', how='left', sort=False)
+        found = merged['Codigo_Protheus'].notna().to_numpy()
+
+        # Pontuar em lote apenas os pares cujo código foi encontrado
+        scores = np.zeros(len(merged), dtype=np.float64)
+        if found.any():
+            desc_tasy_norm = normalize_series(merged.loc[found, 'Descricao_Tasy'], APP_PROFILE).tolist()
+            desc_prot_norm = normalize_series(merged.loc[found, 'Descricao_Protheus'], APP_PROFILE).tolist()
+            scores[found] = process.cpdist(
+                desc_tasy_norm, desc_prot_norm, scorer=fuzz.token_sort_ratio, workers=-1
+            )
+
+        revisao = found & (scores >= threshold)
+        
+        # Segunda etapa: busca por descrição apenas para os códigos não encontrados
+        suggestions, savings = suggest_by_description(protheus, merged.loc[~found, 'Descricao_Tasy'], threshold)
+        
+        results = pd.DataFrame({
+            'Codigo_Tasy': merged['Codigo_Tasy'],
+            'Codigo_Protheus': merged['Codigo_Protheus'].fillna(''),
+            'Status_Codigo': np.where(found, 'OK', 'Não encontrado'),
+            'Descricao_Tasy': merged['Descricao_Tasy'],
+            'Descricao_Protheus': merged['Descricao_Protheus'].where(found, ''),
+            'Score_Similaridade': np.round(scores, 2),
+            'Revisao_Obrigatoria': np.where(revisao, 'NÃO', '⚠️ SIM')
+        })
+        results = results.join(suggestions.set_axis(merged.index[~found])).fillna(SUGGESTION_DEFAULTS)
+        # Trabalho economizado pela deduplicação da busca por descrição
+        results.attrs['deduplicacao'] = savings
+    
+    return results
 
 # Interface principal
 st.markdown('<div class="main-header">🔗 Correspondência Inteligente Protheus-Tasy</div>', unsafe_allow_html=True)
@@ -386,11 +460,23 @@ if uploaded_file is not None:
         )
         
         # Botão para iniciar correspondência
+        file_key = (uploaded_file.name, uploaded_file.size)
         if st.button("🚀 Iniciar Correspondência", type="primary"):
             st.markdown("### 🔄 4. Processamento")
             
             with st.spinner("🔄 Processando correspondências..."):
                 df_matches = find_matches(df_protheus, df_de_para, threshold)
+            st.session_state.match_results = {'file': file_key, 'threshold': threshold, 'df': df_matches}
+        
+        # Resultados da última correspondência deste arquivo continuam visíveis entre interações;
+        # um novo limiar só refaz o filtro (scores em cache em compute_top_scores)
+        results = st.session_state.get('match_results')
+        if results is not None and results['file'] == file_key:
+            if results['threshold'] != threshold:
+                with st.spinner("🔄 Aplicando novo limiar..."):
+                    results['df'] = find_matches(df_protheus, df_de_para, threshold)
+                results['threshold'] = threshold
+            df_matches = results['df']
             
             if len(df_matches) > 0:
                 st.markdown(f'<div class="success-box">✅ Processamento concluído! {len(df_matches)} correspondências encontradas.</div>', unsafe_allow_html=True)
@@ -414,6 +500,22 @@ if uploaded_file is not None:
                     high_confidence = len(df_matches[df_matches['Score_Similaridade'] >= 90])
                     st.metric("Alta Confiança (≥90%)", high_confidence)
                 
+                # Sugestões por descrição para códigos não encontrados
+                sugeridos = df_matches['Codigo_Sugerido'] != ''
+                if sugeridos.any():
+                    ambiguos = (df_matches['Sugestao_Ambigua'] == '⚠️ SIM').sum()
+                    st.caption(
+                        f"🔎 {sugeridos.sum()} códigos não encontrados receberam sugestão pela descrição "
+                        f"({ambiguos} ambíguas)"
+                    )
+                    economia = df_matches.attrs.get('deduplicacao')
+                    if economia:
+                        st.caption(
+                            f"♻️ Busca sobre {economia['source_distinct']} de {economia['source_rows']} descrições Tasy "
+                            f"e {economia['target_distinct']} de {economia['target_rows']} descrições Protheus distintas; "
+                            f"{economia['pairs_saved']:,} comparações ({economia['saving_rate']:.1%}) evitadas"
+                        )
+                
                 # Filtros
                 st.markdown("### 🔍 6. Filtros e Visualização")
                 
@@ -504,6 +606,7 @@ else:
             <li><strong>Algoritmo de Correspondência:</strong> Utiliza RapidFuzz para comparação textual avançada</li>
             <li><strong>Pré-processamento:</strong> Normalização de texto, remoção de caracteres especiais</li>
             <li><strong>Revisão Obrigatória:</strong> Itens com múltiplas correspondências similares são marcados automaticamente</li>
+            <li><strong>Sugestão por Descrição:</strong> Códigos não encontrados recebem o código Protheus de descrição mais similar (com alerta de ambiguidade)</li>
             <li><strong>Exportação:</strong> Gera arquivo Excel contendo apenas as correspondências relevantes</li>
         </ul>
     </div>
@@ -1,17 +1,24 @@
 import streamlit as st
 import pandas as pd
 import json
-import re
 from rapidfuzz import fuzz, process
 from datetime import datetime
 import io
-import unicodedata
 from typing import Dict, List, Tuple, Optional
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from collections import Counter
+from scipy import sparse
+
+from text_normalization import ADVANCED_PROFILE, normalize_series, normalize_value
+from dedup import DistinctValues, dedup_savings, merge_savings
+from disk_cache import content_hash, default_cache
+from column_compatibility import compare_columns
+from workbook_profiler import (PROFILE_VERSION, SheetProfile, estimate_containment, lsh_candidate_pairs,
+                               profile_workbook)
+from workbook_session import WorkbookSession, open_session
 import seaborn as sns
 import matplotlib.pyplot as plt
 
@@ -124,30 +131,58 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Palavras curtas ou comuns ignoradas na extração de palavras-chave
+PALAVRAS_COMUNS = frozenset([
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our',
+    'out', 'day', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way',
+    'who', 'boy', 'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use'
+])
+
+# Métricas e pesos de calcular_similaridade_avancada (o Jaccard das palavras-chave fica com o restante)
+METRICAS_SIMILARIDADE = (
+    (fuzz.ratio, 0.3),
+    (fuzz.partial_ratio, 0.2),
+    (fuzz.token_sort_ratio, 0.2),
+    (fuzz.token_set_ratio, 0.2)
+)
+PESO_JACCARD = 0.1
+
+# Métricas calculadas na matriz inteira; as demais só nos pares que ainda podem atingir o
+# limiar, salvo quando restam mais que esta fração dos pares
+METRICAS_EM_MATRIZ = (fuzz.ratio, fuzz.token_sort_ratio)
+FRACAO_MATRIZ_COMPLETA = 0.2
+
+# Células (origens x destinos) por bloco das matrizes de similaridade
+CELULAS_POR_BLOCO = 2_000_000
+
+# Limiares das sugestões automáticas: score do nome (0-100) e conteúdo contido (%)
+LIMIAR_SUGESTAO_CABECALHO = 70
+LIMIAR_SUGESTAO_CONTEUDO = 50
+
+# Linhas por aba acima das quais a análise das colunas usa uma amostra
+LIMITE_LINHAS_ANALISE = 200_000
+
+# Folga do arredondamento para 2 casas: abaixo de limiar - folga, nenhum score chega ao limiar
+FOLGA_ARREDONDAMENTO = 0.01
+
+# Menor limiar de um mapeamento na interface; os scores guardados entre execuções são
+# calculados a partir dele, então qualquer limiar escolhido depois é só um filtro
+LIMIAR_MINIMO_MAPEAMENTO = 50
+
 # Funções auxiliares aprimoradas
 def normalizar_texto(texto):
-    """Normaliza texto para comparação avançada"""
-    if pd.isna(texto):
-        return ""
-    texto = str(texto).lower()
-    # Remove acentos
-    texto = ''.join(c for c in unicodedata.normalize('NFD', texto) 
-                   if unicodedata.category(c) != 'Mn')
-    # Remove caracteres especiais mas mantém espaços
-    texto = re.sub(r'[^a-z0-9\s]', ' ', texto)
-    # Normaliza espaços
-    texto = re.sub(r'\s+', ' ', texto)
-    return texto.strip()
+    """Normaliza texto para comparação avançada (remove acentos e caracteres especiais)"""
+    return normalize_value(texto, ADVANCED_PROFILE)
 
 def extrair_palavras_chave(texto):
     """Extrai palavras-chave relevantes do texto"""
     if pd.isna(texto):
         return []
-    texto_normalizado = normalizar_texto(texto)
-    palavras = texto_normalizado.split()
-    # Remove palavras muito curtas ou comuns
-    palavras_filtradas = [p for p in palavras if len(p) > 2 and p not in ['the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use']]
-    return palavras_filtradas
+    return palavras_chave_normalizadas(normalizar_texto(texto))
+
+def palavras_chave_normalizadas(texto_normalizado: str) -> List[str]:
+    """Palavras-chave de um texto já normalizado (sem palavras muito curtas ou comuns)"""
+    return [p for p in texto_normalizado.split() if len(p) > 2 and p not in PALAVRAS_COMUNS]
 
 def calcular_similaridade_avancada(texto1, texto2):
     """Calcula similaridade usando múltiplos algoritmos"""
@@ -190,181 +225,226 @@ def calcular_similaridade_avancada(texto1, texto2):
     return round(score_final, 2)
 
 def sugerir_mapeamentos_ia(analise_arquivo):
-    """Sugere mapeamentos automáticos usando IA"""
+    """
+    Sugere mapeamentos automáticos usando IA
+    
+    Pares de colunas de abas diferentes chegam por duas vias, sem comparar todos os pares
+    um a um: cabeçalhos parecidos (calcular_scores_candidatos sobre todos os nomes de uma
+    vez) e conteúdos parecidos (colisão nos buckets LSH das assinaturas MinHash dos valores
+    distintos, calculadas na análise do arquivo). O conteúdo é pontuado pela fração
+    estimada do menor conjunto de valores contida no outro (colunas de consulta costumam
+    ser subconjuntos do cadastro), e o score combina as duas similaridades como
+    probabilidades independentes: 100 - (100 - cabeçalho) * (100 - conteúdo) / 100.
+    """
     sugestoes = []
     
-    if 'sheets' not in analise_arquivo:
+    if 'abas' not in analise_arquivo:
         return sugestoes
     
-    abas = list(analise_arquivo['sheets'].keys())
+    # Todas as colunas de todas as abas válidas: (posição da aba, aba, coluna, assinatura, valores)
+    colunas = []
+    for posicao_aba, (nome_aba, info_aba) in enumerate(analise_arquivo['abas'].items()):
+        if 'erro' in info_aba:
+            continue
+        analise_colunas = info_aba.get('analise_colunas', {})
+        for col in info_aba.get('colunas_cabecalho_0', []):
+            analise_col = analise_colunas.get(col, {})
+            colunas.append((posicao_aba, nome_aba, col, analise_col.get('assinatura_conteudo'),
+                            analise_col.get('valores_assinatura', 0)))
+    if not colunas:
+        return sugestoes
     
-    # Analisa todas as combinações de abas
-    for i, aba1 in enumerate(abas):
-        for j, aba2 in enumerate(abas):
-            if i >= j:  # Evita duplicatas
-                continue
-                
-            info_aba1 = analise_arquivo['sheets'][aba1]
-            info_aba2 = analise_arquivo['sheets'][aba2]
-            
-            if 'error' in info_aba1 or 'error' in info_aba2:
-                continue
-            
-            colunas1 = info_aba1.get('columns_header_0', [])
-            colunas2 = info_aba2.get('columns_header_0', [])
-            
-            # Encontra correspondências entre colunas
-            for col1 in colunas1:
-                for col2 in colunas2:
-                    similaridade = calcular_similaridade_avancada(col1, col2)
-                    
-                    if similaridade >= 70:  # Limiar para sugestão automática
-                        sugestoes.append({
-                            'aba_origem': aba1,
-                            'aba_destino': aba2,
-                            'coluna_origem': col1,
-                            'coluna_destino': col2,
-                            'similaridade': similaridade,
-                            'confianca': 'Alta' if similaridade >= 85 else 'Média',
-                            'tipo_sugestao': 'Automática'
-                        })
+    # Cabeçalhos: pares com score de nome acima do limiar
+    nomes = [normalizar_texto(col) for _, _, col, _, _ in colunas]
+    palavras_nomes = matrizes_palavras_chave(nomes)[0]
+    scores_cabecalho = {}
+    for i, j, score in zip(*calcular_scores_candidatos(nomes, nomes, palavras_nomes, palavras_nomes,
+                                                          LIMIAR_SUGESTAO_CABECALHO)):
+        score = round(float(score), 2)
+        if colunas[i][0] < colunas[j][0] and score >= LIMIAR_SUGESTAO_CABECALHO:
+            scores_cabecalho[(int(i), int(j))] = score
+    
+    # Conteúdos: pares que colidem em algum bucket do LSH, de abas diferentes
+    pares_conteudo = {
+        (i, j) for i, j in lsh_candidate_pairs([assinatura for _, _, _, assinatura, _ in colunas])
+        if colunas[i][0] != colunas[j][0]
+    }
+    
+    # Posições crescentes seguem a ordem das abas: (i, j) já vai da aba anterior para a seguinte
+    for i, j in sorted(set(scores_cabecalho) | pares_conteudo):
+        (_, aba1, col1, assinatura1, valores1), (_, aba2, col2, assinatura2, valores2) = colunas[i], colunas[j]
+        cabecalho = scores_cabecalho.get((i, j))
+        if cabecalho is None:
+            cabecalho = calcular_similaridade_avancada(col1, col2)
+        conteudo = (round(estimate_containment(assinatura1, valores1, assinatura2, valores2) * 100, 2)
+                    if assinatura1 is not None and assinatura2 is not None else 0)
+        if cabecalho < LIMIAR_SUGESTAO_CABECALHO and conteudo < LIMIAR_SUGESTAO_CONTEUDO:
+            continue
+        
+        similaridade = round(100 - (100 - cabecalho) * (100 - conteudo) / 100, 2)
+        if cabecalho >= LIMIAR_SUGESTAO_CABECALHO and conteudo >= LIMIAR_SUGESTAO_CONTEUDO:
+            tipo = 'Cabeçalho + Conteúdo'
+        elif cabecalho >= LIMIAR_SUGESTAO_CABECALHO:
+            tipo = 'Cabeçalho'
+        else:
+            tipo = 'Conteúdo'
+        sugestoes.append({
+            'aba_origem': aba1,
+            'aba_destino': aba2,
+            'coluna_origem': col1,
+            'coluna_destino': col2,
+            'similaridade': similaridade,
+            'similaridade_cabecalho': cabecalho,
+            'similaridade_conteudo': conteudo,
+            'confianca': 'Alta' if similaridade >= 85 else 'Média' if similaridade >= 70 else 'Baixa',
+            'tipo_sugestao': tipo
+        })
     
-    # Ordena por similaridade
-    sugestoes.sort(key=lambda x: x['similaridade'], reverse=True)
+    # Ordena por similaridade (empates na ordem das abas e colunas)
+    ordem = {(aba, col): k for k, (_, aba, col, _, _) in enumerate(colunas)}
+    sugestoes.sort(key=lambda x: (-x['similaridade'], ordem[(x['aba_origem'], x['coluna_origem'])],
+                                  ordem[(x['aba_destino'], x['coluna_destino'])]))
     return sugestoes
 
 def analisar_compatibilidade_colunas(df1, col1, df2, col2):
-    """Analisa compatibilidade entre duas colunas"""
+    """
+    Analisa compatibilidade entre duas colunas
+    
+    Usa as colunas inteiras (column_compatibility): sobreposição exata de valores por hash;
+    para texto, similaridade estimada por amostra estratificada com intervalo de confiança
+    de 95%; para números e datas, comparação das distribuições (KS, faixas, quantis).
+    
+    Returns:
+        {'compatibilidade': 0-100, 'intervalo_confianca': [mín, máx], 'detalhes': {...}}
+    """
     try:
-        dados1 = df1[col1].dropna()
-        dados2 = df2[col2].dropna()
+        resultado = compare_columns(df1[col1], df2[col2])
         
-        if len(dados1) == 0 or len(dados2) == 0:
-            return {'compatibilidade': 0, 'detalhes': 'Colunas vazias'}
-        
-        # Análise de tipos de dados
-        tipo1 = dados1.dtype
-        tipo2 = dados2.dtype
-        
-        # Análise de valores únicos
-        unicos1 = len(dados1.unique())
-        unicos2 = len(dados2.unique())
-        
-        # Análise de padrões
-        if tipo1 == 'object' and tipo2 == 'object':
-            # Análise de texto
-            amostras1 = dados1.head(100).astype(str)
-            amostras2 = dados2.head(100).astype(str)
-            
-            # Calcula similaridade média entre amostras
-            similaridades = []
-            for val1 in amostras1:
-                melhor_match = process.extractOne(val1, amostras2.tolist(), scorer=fuzz.ratio)
-                if melhor_match:
-                    similaridades.append(melhor_match[1])
-            
-            compatibilidade = np.mean(similaridades) if similaridades else 0
-            
-            detalhes = {
-                'tipo_analise': 'Texto',
-                'valores_unicos_origem': unicos1,
-                'valores_unicos_destino': unicos2,
-                'similaridade_media': round(compatibilidade, 2),
-                'amostras_analisadas': len(similaridades)
-            }
+        if resultado.kind == 'empty':
+            return {'compatibilidade': 0, 'intervalo_confianca': [0, 0], 'detalhes': 'Colunas vazias'}
         
+        detalhes = {
+            'tipo_analise': 'Texto' if resultado.kind == 'text' else 'Numérica' if resultado.kind == 'numeric' else 'Datas',
+            'tipo_origem': resultado.source_dtype,
+            'tipo_destino': resultado.target_dtype,
+            'valores_unicos_origem': resultado.source_distinct,
+            'valores_unicos_destino': resultado.target_distinct,
+            'valores_em_comum_jaccard': round(resultado.overlap['jaccard'] * 100, 2),
+            'valores_em_comum_contidos': round(resultado.overlap['containment'] * 100, 2),
+            'linhas_origem_com_valor_identico': round(resultado.overlap['source_row_coverage'] * 100, 2)
+        }
+        if resultado.kind == 'text':
+            detalhes.update({
+                'similaridade_media_sem_identicos': resultado.details.get('fuzzy_mean'),
+                'amostras_analisadas': resultado.details['sampled_rows'],
+                'valores_destino_comparados': resultado.details['target_values_compared'],
+                'destino_amostrado': resultado.details['target_sampled']
+            })
         else:
-            # Análise numérica básica
-            compatibilidade = 50  # Compatibilidade padrão para tipos diferentes
-            detalhes = {
-                'tipo_analise': 'Numérica/Mista',
-                'tipo_origem': str(tipo1),
-                'tipo_destino': str(tipo2),
-                'valores_unicos_origem': unicos1,
-                'valores_unicos_destino': unicos2
-            }
+            quartis = [25, 50, 75]
+            detalhes.update({
+                'distancia_ks': resultado.details['ks_distance'],
+                'sobreposicao_faixas': round(resultado.details['range_overlap'] * 100, 2),
+                'faixa_origem': [str(v) for v in resultado.details['source_range']],
+                'faixa_destino': [str(v) for v in resultado.details['target_range']]
+            })
+            if resultado.kind == 'numeric':
+                detalhes.update({
+                    'quartis_origem': [round(float(resultado.details['source_quantiles'][q]), 4) for q in quartis],
+                    'quartis_destino': [round(float(resultado.details['target_quantiles'][q]), 4) for q in quartis]
+                })
         
         return {
-            'compatibilidade': round(compatibilidade, 2),
+            'compatibilidade': round(resultado.score, 2),
+            'intervalo_confianca': [round(resultado.interval[0], 2), round(resultado.interval[1], 2)],
             'detalhes': detalhes
         }
     
     except Exception as e:
         return {
             'compatibilidade': 0,
+            'intervalo_confianca': [0, 0],
             'detalhes': f'Erro na análise: {str(e)}'
         }
 
+def montar_analise_aba(perfil: SheetProfile) -> Dict:
+    """Converte o perfil de uma aba (workbook_profiler) no formato da análise do arquivo"""
+    if perfil.error is not None:
+        return {
+            'erro': perfil.error,
+            'colunas_cabecalho_0': [],
+            'colunas_cabecalho_1': [],
+            'total_linhas': 0,
+            'dados_amostra': [],
+            'tem_dados': False
+        }
+    
+    # Percentuais sobre as linhas analisadas (todas, ou a amostra em abas muito grandes)
+    analise_colunas = {
+        col: {
+            'tipo': perfil_col.dtype,
+            'valores_unicos': perfil_col.distinct,
+            'valores_nulos': perfil_col.null,
+            'percentual_preenchimento': round((perfil_col.non_null / perfil.profiled_rows) * 100, 2),
+            'amostra_valores': perfil_col.sample_values,
+            'assinatura_conteudo': perfil_col.signature,
+            'valores_assinatura': perfil_col.signature_size
+        }
+        for col, perfil_col in perfil.columns.items()
+    }
+    
+    return {
+        'colunas_cabecalho_0': perfil.columns_header_0,
+        'colunas_cabecalho_1': perfil.columns_header_1,
+        'total_linhas': perfil.total_rows,
+        'linhas_analisadas': perfil.profiled_rows,
+        'amostrada': perfil.sampled,
+        'dados_amostra': perfil.preview,
+        'tem_dados': perfil.total_rows > 0,
+        'analise_colunas': analise_colunas,
+        'tipos_dados': perfil.dtypes,
+        'qualidade_dados': {
+            'colunas_com_dados': len([col for col in analise_colunas if analise_colunas[col]['percentual_preenchimento'] > 0]),
+            'colunas_totalmente_preenchidas': len([col for col in analise_colunas if analise_colunas[col]['percentual_preenchimento'] == 100]),
+            'percentual_qualidade_geral': round(np.mean([analise_colunas[col]['percentual_preenchimento'] for col in analise_colunas]), 2)
+        }
+    }
+
+def abrir_planilha(arquivo_carregado) -> WorkbookSession:
+    """
+    Sessão compartilhada do arquivo enviado (mesmo conteúdo = mesma sessão)
+    
+    Análise, prévia de compatibilidade e processamento leem as abas por ela: cada aba é
+    lida uma vez e cada linha de cabeçalho vira DataFrame uma vez.
+    """
+    return open_session(arquivo_carregado, default_cache())
+
 @st.cache_data
 def analisar_arquivo_excel(arquivo_carregado) -> Dict:
-    """Analisa arquivo Excel com IA avançada"""
+    """
+    Analisa arquivo Excel com IA avançada
+    
+    Cada aba é lida uma única vez (workbook_profiler): as duas opções de cabeçalho, os
+    tipos, o preenchimento e os valores únicos (aproximados) saem da mesma leitura; abas
+    com mais de LIMITE_LINHAS_ANALISE linhas têm as colunas analisadas por amostragem.
+    Perfis de arquivos já analisados (mesmo conteúdo, por SHA-256) vêm do cache em disco.
+    """
     try:
-        xls = pd.ExcelFile(arquivo_carregado)
+        cache = default_cache()
+        chave = content_hash('app_advanced.analisar_arquivo_excel', PROFILE_VERSION, LIMITE_LINHAS_ANALISE,
+                             arquivo_carregado.getvalue())
+        perfis = cache.get_object('workbook_profile', chave)
+        if perfis is None:
+            perfis = profile_workbook(abrir_planilha(arquivo_carregado), max_rows=LIMITE_LINHAS_ANALISE)
+            cache.put_object('workbook_profile', chave, perfis)
+        
         analise = {
-            'abas': {},
-            'total_abas': len(xls.sheet_names),
-            'nomes_abas': xls.sheet_names,
+            'abas': {nome_aba: montar_analise_aba(perfil) for nome_aba, perfil in perfis.items()},
+            'total_abas': len(perfis),
+            'nomes_abas': list(perfis),
             'sugestoes_ia': []
         }
         
-        for nome_aba in xls.sheet_names:
-            try:
-                # Lê com diferentes opções de cabeçalho
-                df_h0 = pd.read_excel(arquivo_carregado, sheet_name=nome_aba, nrows=10)
-                colunas_h0 = list(df_h0.columns)
-                
-                try:
-                    df_h1 = pd.read_excel(arquivo_carregado, sheet_name=nome_aba, header=1, nrows=10)
-                    colunas_h1 = list(df_h1.columns)
-                except:
-                    colunas_h1 = []
-                
-                # Carrega dados completos para análise
-                df_completo = pd.read_excel(arquivo_carregado, sheet_name=nome_aba)
-                total_linhas = len(df_completo)
-                
-                # Análise de qualidade dos dados
-                colunas_vazias = df_completo.isnull().sum()
-                tipos_dados = df_completo.dtypes.to_dict()
-                
-                # Análise de padrões nas colunas
-                analise_colunas = {}
-                for col in df_completo.columns:
-                    dados_col = df_completo[col].dropna()
-                    if len(dados_col) > 0:
-                        analise_colunas[col] = {
-                            'tipo': str(dados_col.dtype),
-                            'valores_unicos': len(dados_col.unique()),
-                            'valores_nulos': int(colunas_vazias[col]),
-                            'percentual_preenchimento': round((len(dados_col) / total_linhas) * 100, 2),
-                            'amostra_valores': dados_col.head(5).tolist()
-                        }
-                
-                analise['abas'][nome_aba] = {
-                    'colunas_cabecalho_0': colunas_h0,
-                    'colunas_cabecalho_1': colunas_h1,
-                    'total_linhas': total_linhas,
-                    'dados_amostra': df_h0.head(3).to_dict('records'),
-                    'tem_dados': total_linhas > 0,
-                    'analise_colunas': analise_colunas,
-                    'tipos_dados': {str(k): str(v) for k, v in tipos_dados.items()},
-                    'qualidade_dados': {
-                        'colunas_com_dados': len([col for col in analise_colunas if analise_colunas[col]['percentual_preenchimento'] > 0]),
-                        'colunas_totalmente_preenchidas': len([col for col in analise_colunas if analise_colunas[col]['percentual_preenchimento'] == 100]),
-                        'percentual_qualidade_geral': round(np.mean([analise_colunas[col]['percentual_preenchimento'] for col in analise_colunas]), 2)
-                    }
-                }
-                
-            except Exception as e:
-                analise['abas'][nome_aba] = {
-                    'erro': str(e),
-                    'colunas_cabecalho_0': [],
-                    'colunas_cabecalho_1': [],
-                    'total_linhas': 0,
-                    'dados_amostra': [],
-                    'tem_dados': False
-                }
-        
         # Gera sugestões de IA
         analise['sugestoes_ia'] = sugerir_mapeamentos_ia(analise)
         
@@ -390,11 +470,237 @@ def obter_nomes_configuracoes_salvas() -> List[str]:
         return list(st.session_state.configuracoes_salvas.keys())
     return []
 
-def processar_dados_com_configuracao(arquivo_carregado, config: Dict) -> pd.DataFrame:
-    """Processa dados baseado na configuração com IA avançada"""
+def matrizes_palavras_chave(*colecoes: List[str]) -> List[sparse.csr_matrix]:
+    """
+    Conjuntos de palavras-chave de textos normalizados como matrizes binárias esparsas
+    
+    Uma matriz (textos x vocabulário) por coleção, todas com o mesmo vocabulário.
+    """
+    vocabulario: Dict[str, int] = {}
+    estruturas = []
+    for textos in colecoes:
+        indices, ponteiros = [], [0]
+        for texto in textos:
+            palavras = {vocabulario.setdefault(p, len(vocabulario)) for p in palavras_chave_normalizadas(texto)}
+            indices.extend(sorted(palavras))
+            ponteiros.append(len(indices))
+        estruturas.append((len(textos), indices, ponteiros))
+    return [
+        sparse.csr_matrix(
+            (np.ones(len(indices)), np.array(indices, dtype=np.int64), np.array(ponteiros, dtype=np.int64)),
+            shape=(linhas, max(1, len(vocabulario)))
+        )
+        for linhas, indices, ponteiros in estruturas
+    ]
+
+def calcular_scores_candidatos(textos_origem: List[str], textos_destino: List[str],
+                               palavras_origem: sparse.csr_matrix, palavras_destino: sparse.csr_matrix,
+                               limiar: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Versão matricial (antes do arredondamento) de calcular_similaridade_avancada
+    
+    Recebe textos já normalizados e as matrizes de palavras-chave de matrizes_palavras_chave.
+    As métricas baratas (METRICAS_EM_MATRIZ) e o Jaccard são calculados na matriz inteira;
+    partial_ratio e token_set_ratio só nos pares cujo limite superior (métricas pendentes
+    valendo 100) ainda alcança o limiar, com o score_cutoff mínimo de cada par, ou na
+    matriz inteira quando mais de FRACAO_MATRIZ_COMPLETA dos pares restam.
+    
+    Returns:
+        (linhas, colunas, scores) de todos os pares que podem atingir `limiar` após o
+        arredondamento, com exatamente a soma ponderada de calcular_similaridade_avancada
+        (mesma ordem das somas); pares com algum texto vazio valem 0
+    """
+    corte = limiar - FOLGA_ARREDONDAMENTO
+    forma = (len(textos_origem), len(textos_destino))
+    
+    parcelas = {}
+    limite = np.full(forma, 100.0 * sum(peso for metrica, peso in METRICAS_SIMILARIDADE
+                                         if metrica not in METRICAS_EM_MATRIZ))
+    for metrica, peso in METRICAS_SIMILARIDADE:
+        if metrica in METRICAS_EM_MATRIZ:
+            # Abaixo do corte, o par não alcança o limiar mesmo com as demais métricas em 100
+            corte_metrica = (corte - 100 * (1 - peso)) / peso
+            parcelas[metrica] = process.cdist(
+                textos_origem, textos_destino, scorer=metrica, dtype=np.float64, workers=-1,
+                score_cutoff=corte_metrica if corte_metrica > 0 else None
+            ) * peso
+            limite += parcelas[metrica]
+    
+    # Jaccard das palavras-chave (0 quando algum dos conjuntos é vazio)
+    intersecao = (palavras_origem @ palavras_destino.T).toarray()
+    tamanhos_origem = np.asarray(palavras_origem.sum(axis=1)).ravel()
+    tamanhos_destino = np.asarray(palavras_destino.sum(axis=1)).ravel()
+    uniao = tamanhos_origem[:, None] + tamanhos_destino[None, :] - intersecao
+    ambos = (tamanhos_origem[:, None] > 0) & (tamanhos_destino[None, :] > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaccard = np.where(ambos, (intersecao / uniao) * 100, 0.0) * PESO_JACCARD
+    limite += jaccard
+    
+    validos = np.array([bool(t) for t in textos_origem])[:, None] & np.array([bool(t) for t in textos_destino])[None, :]
+    linhas, colunas = np.nonzero(validos & (limite >= corte))
+    limite = limite[linhas, colunas]
+    parcelas = {metrica: valores[linhas, colunas] for metrica, valores in parcelas.items()}
+    
+    # Métricas caras apenas nos pares que ainda podem atingir o limiar
+    for metrica, peso in METRICAS_SIMILARIDADE:
+        if metrica in METRICAS_EM_MATRIZ:
+            continue
+        if len(linhas) > FRACAO_MATRIZ_COMPLETA * validos.size:
+            valores = process.cdist(
+                textos_origem, textos_destino, scorer=metrica, dtype=np.float64, workers=-1
+            )[linhas, colunas]
+        else:
+            minimos = ((corte - (limite - 100 * peso)) / peso).tolist()
+            valores = np.array([
+                metrica(textos_origem[i], textos_destino[j], score_cutoff=max(0.0, minimo))
+                for i, j, minimo in zip(linhas.tolist(), colunas.tolist(), minimos)
+            ], dtype=np.float64)
+        parcelas[metrica] = valores * peso
+        limite = limite - 100 * peso + parcelas[metrica]
+        restantes = limite >= corte
+        linhas, colunas, limite = linhas[restantes], colunas[restantes], limite[restantes]
+        parcelas = {m: valores[restantes] for m, valores in parcelas.items()}
+    
+    score = 0
+    for metrica, peso in METRICAS_SIMILARIDADE:
+        score = score + parcelas[metrica]
+    score = score + jaccard[linhas, colunas]
+    
+    if corte <= 0:
+        # Pares com texto vazio (score 0) também atingem o limiar
+        vazias_linhas, vazias_colunas = np.nonzero(~validos)
+        linhas = np.concatenate([linhas, vazias_linhas])
+        colunas = np.concatenate([colunas, vazias_colunas])
+        score = np.concatenate([np.asarray(score, dtype=np.float64), np.zeros(len(vazias_linhas))])
+    return linhas, colunas, np.asarray(score, dtype=np.float64)
+
+def pontuar_valores_distintos(valores_origem: pd.Series, valores_destino: pd.Series,
+                               limiar: float) -> Dict:
+    """
+    Pontua os valores distintos de origem contra os de destino a partir de `limiar`.
+    O score depende apenas do texto normalizado, então cada par distinto é calculado uma vez
+    (em blocos de origens, calcular_scores_candidatos). Guarda o melhor destino de cada
+    origem e o score de todos os pares aceitos: o vencedor não depende do limiar, então
+    qualquer limiar maior ou igual vira um filtro em filtrar_correspondencias.
+    Retorna a pontuação (dicionário) usada por filtrar_correspondencias
+    """
+    # Linhas vazias são ignoradas, como na busca linha a linha
+    valores_origem = valores_origem[valores_origem.notna() & (valores_origem != '')]
+    valores_destino = valores_destino[valores_destino.notna() & (valores_destino != '')]
+    
+    chaves_origem = normalize_series(valores_origem, ADVANCED_PROFILE).tolist()
+    chaves_destino = normalize_series(valores_destino, ADVANCED_PROFILE).tolist()
+    origens = DistinctValues(valores_origem.tolist(), keys=chaves_origem)
+    destinos = DistinctValues(valores_destino.tolist(), keys=chaves_destino)
+    indices_destino = valores_destino.index
+    
+    # O score só depende do texto normalizado (o próprio agrupamento) e das palavras-chave dele
+    textos_origem = [chaves_origem[i] for i in origens.first_rows]
+    textos_destino = [chaves_destino[i] for i in destinos.first_rows]
+    palavras_origem, palavras_destino = matrizes_palavras_chave(textos_origem, textos_destino)
+    destino_valido = np.array([bool(t) for t in textos_destino])
+    
+    melhores = [None] * origens.n_distinct
+    pares_origem, pares_similaridade, pares_peso = [], [], []
+    bloco = max(1, CELULAS_POR_BLOCO // max(1, destinos.n_distinct))
+    for inicio in range(0, origens.n_distinct if destinos.n_distinct else 0, bloco):
+        fim = min(inicio + bloco, origens.n_distinct)
+        linhas, grupos, scores = calcular_scores_candidatos(
+            textos_origem[inicio:fim], textos_destino, palavras_origem[inicio:fim], palavras_destino, limiar
+        )
+        
+        # Arredondamento exato (round do Python) apenas nos pares que podem atingir o limiar
+        similaridades = np.array([round(s, 2) for s in scores.tolist()], dtype=np.float64)
+        aceitos = similaridades >= limiar
+        linhas, grupos, similaridades = linhas[aceitos], grupos[aceitos], similaridades[aceitos]
+        if not len(linhas):
+            continue
+        
+        # Cada linha repetida do destino conta como alternativa
+        pares_origem.append(linhas + inicio)
+        pares_similaridade.append(similaridades)
+        pares_peso.append(destinos.counts[grupos])
+        # Melhor destino por origem; em empate vence o destino que aparece primeiro
+        ordem = np.lexsort((grupos, -similaridades, linhas))
+        primeiros = ordem[np.r_[True, linhas[ordem][1:] != linhas[ordem][:-1]]]
+        for linha, grupo, similaridade in zip(linhas[primeiros].tolist(), grupos[primeiros].tolist(),
+                                              similaridades[primeiros].tolist()):
+            melhores[inicio + linha] = (indices_destino[destinos.first_rows[grupo]], similaridade,
+                                        bool(textos_origem[inicio + linha]) and bool(destino_valido[grupo]))
+    
+    def juntar(partes: List[np.ndarray], dtype) -> np.ndarray:
+        return np.concatenate(partes) if partes else np.empty(0, dtype=dtype)
+    
+    return {
+        'limiar': limiar,
+        'indices_origem': valores_origem.index,
+        'origens': origens,
+        'melhores': melhores,
+        'pares_origem': juntar(pares_origem, np.intp),
+        'pares_similaridade': juntar(pares_similaridade, np.float64),
+        'pares_peso': juntar(pares_peso, np.int64),
+        'economia': dedup_savings(origens, destinos)
+    }
+
+def filtrar_correspondencias(pontuacao: Dict, limiar: float) -> Tuple[Dict, Dict]:
+    """
+    Correspondências de uma pontuação (pontuar_valores_distintos) que atingem `limiar`.
+    Mesmo resultado de pontuar de novo com `limiar`: o melhor destino de cada origem é o
+    mesmo e as alternativas são recontadas entre os pares aceitos.
+    Retorna ({índice_origem: (índice_destino, score, alternativas)}, economia de pares)
+    """
+    if limiar < pontuacao['limiar']:
+        raise ValueError(f"Limiar {limiar} abaixo do limiar da pontuação ({pontuacao['limiar']})")
+    
+    origens = pontuacao['origens']
+    aceitos = pontuacao['pares_similaridade'] >= limiar
+    alternativas = np.bincount(pontuacao['pares_origem'][aceitos], weights=pontuacao['pares_peso'][aceitos],
+                               minlength=origens.n_distinct).astype(np.int64) - 1
+    
+    melhores = [None] * origens.n_distinct
+    for i, melhor in enumerate(pontuacao['melhores']):
+        if melhor is None or melhor[1] < limiar:
+            continue
+        idx_destino, similaridade, textos_validos = melhor
+        # calcular_similaridade_avancada devolve 0 (int) quando algum texto é vazio
+        melhores[i] = (idx_destino, similaridade if textos_validos else 0, int(alternativas[i]))
+    
+    correspondencias = {
+        idx: melhor
+        for idx, melhor in zip(pontuacao['indices_origem'], origens.expand(melhores))
+        if melhor is not None
+    }
+    return correspondencias, pontuacao['economia']
+
+def corresponder_valores_distintos(valores_origem: pd.Series, valores_destino: pd.Series,
+                                   limiar: float) -> Tuple[Dict, Dict]:
+    """
+    Busca a melhor correspondência de cada valor de origem comparando só valores distintos.
+    O score depende apenas do texto normalizado, então cada par distinto é calculado uma vez
+    e o resultado é replicado para as linhas repetidas; scores, empates e alternativas são
+    os mesmos de calcular_similaridade_avancada par a par.
+    Retorna ({índice_origem: (índice_destino, score, alternativas)}, economia de pares)
+    """
+    return filtrar_correspondencias(pontuar_valores_distintos(valores_origem, valores_destino, limiar), limiar)
+
+def processar_dados_com_configuracao(arquivo_carregado, config: Dict,
+                                     pontuacoes: Optional[Dict] = None) -> pd.DataFrame:
+    """
+    Processa dados baseado na configuração com IA avançada
+    
+    Args:
+        arquivo_carregado: Arquivo Excel enviado
+        config: Configuração de abas e mapeamentos
+        pontuacoes: Scores guardados entre execuções (opcional, alterado no lugar). Cada
+            mapeamento é pontuado a partir de LIMIAR_MINIMO_MAPEAMENTO e só de novo quando
+            arquivo, abas, cabeçalhos, colunas ou normalização mudam; mudar o limiar
+            apenas refaz o filtro
+    """
     resultados = []
+    economia_total = None
     
-    # Carrega dados das abas selecionadas
+    # Carrega dados das abas selecionadas (visões da sessão compartilhada do arquivo)
+    planilha = abrir_planilha(arquivo_carregado)
     dados_origem = {}
     dados_destino = {}
     
@@ -405,7 +711,7 @@ def processar_dados_com_configuracao(arquivo_carregado, config: Dict) -> pd.Data
         nome_aba = config_aba['nome']
         linha_cabecalho = config_aba['linha_cabecalho']
         
-        df = pd.read_excel(arquivo_carregado, sheet_name=nome_aba, header=linha_cabecalho)
+        df = planilha.frame(nome_aba, header=linha_cabecalho)
         
         if config_aba['funcao'] == 'origem':
             dados_origem[nome_aba] = {
@@ -419,6 +725,7 @@ def processar_dados_com_configuracao(arquivo_carregado, config: Dict) -> pd.Data
             }
     
     # Processa mapeamentos
+    usadas = set()
     for mapeamento in config['mapeamentos']:
         if not mapeamento['habilitado']:
             continue
@@ -438,63 +745,73 @@ def processar_dados_com_configuracao(arquivo_carregado, config: Dict) -> pd.Data
         if col_origem not in df_origem.columns or col_destino not in df_destino.columns:
             continue
         
-        # Aplica transformações se configuradas
-        valores_origem = df_origem[col_origem].astype(str)
-        valores_destino = df_destino[col_destino].astype(str)
+        limiar = mapeamento.get('limiar_similaridade', 80)
+        normalizar = bool(mapeamento.get('normalizar_texto', False))
+        chave = (planilha.key, aba_origem, dados_origem[aba_origem]['config']['linha_cabecalho'], col_origem,
+                 aba_destino, dados_destino[aba_destino]['config']['linha_cabecalho'], col_destino, normalizar)
+        usadas.add(chave)
+        pontuacao = pontuacoes.get(chave) if pontuacoes is not None else None
         
-        if mapeamento.get('normalizar_texto', False):
-            valores_origem = valores_origem.apply(normalizar_texto)
-            valores_destino = valores_destino.apply(normalizar_texto)
+        if pontuacao is None or pontuacao['limiar'] > limiar:
+            # Aplica transformações se configuradas
+            valores_origem = df_origem[col_origem].astype(str)
+            valores_destino = df_destino[col_destino].astype(str)
+            
+            if normalizar:
+                valores_origem = normalize_series(valores_origem, ADVANCED_PROFILE)
+                valores_destino = normalize_series(valores_destino, ADVANCED_PROFILE)
+            
+            # Realiza correspondência avançada
+            if pontuacoes is None:
+                pontuacao = pontuar_valores_distintos(valores_origem, valores_destino, limiar)
+            else:
+                pontuacao = pontuar_valores_distintos(valores_origem, valores_destino,
+                                                      min(limiar, LIMIAR_MINIMO_MAPEAMENTO))
+                pontuacoes[chave] = pontuacao
         
-        # Realiza correspondência avançada
-        limiar = mapeamento.get('limiar_similaridade', 80)
+        correspondencias, economia = filtrar_correspondencias(pontuacao, limiar)
+        economia_total = merge_savings(economia_total, economia)
         
-        for idx, valor_origem in valores_origem.items():
-            if pd.isna(valor_origem) or valor_origem == '':
-                continue
-                
-            # Usa algoritmo avançado de correspondência
-            correspondencias = []
-            for idx_dest, valor_destino in valores_destino.items():
-                if pd.isna(valor_destino) or valor_destino == '':
-                    continue
-                    
-                similaridade = calcular_similaridade_avancada(valor_origem, valor_destino)
-                if similaridade >= limiar:
-                    correspondencias.append((idx_dest, valor_destino, similaridade))
+        # Valores das linhas correspondidas lidos uma vez por coluna (não célula a célula)
+        extras_origem = [c for c in mapeamento.get('colunas_extras_origem', []) if c in df_origem.columns]
+        extras_destino = [c for c in mapeamento.get('colunas_extras_destino', []) if c in df_destino.columns]
+        linhas_origem = list(correspondencias.keys())
+        linhas_destino = [idx_destino for idx_destino, _, _ in correspondencias.values()]
+        origem = {col: df_origem[col].loc[linhas_origem].tolist() for col in [col_origem] + extras_origem}
+        destino = {col: df_destino[col].loc[linhas_destino].tolist() for col in [col_destino] + extras_destino}
+        
+        for k, (_, score, alternativas) in enumerate(correspondencias.values()):
+            resultado = {
+                'aba_origem': aba_origem,
+                'aba_destino': aba_destino,
+                'coluna_origem': col_origem,
+                'coluna_destino': col_destino,
+                'valor_origem': origem[col_origem][k],
+                'valor_destino': destino[col_destino][k],
+                'score_similaridade': score,
+                'nome_mapeamento': mapeamento['nome'],
+                'confianca': 'Alta' if score >= 90 else 'Média' if score >= 75 else 'Baixa',
+                'alternativas': alternativas
+            }
             
-            # Ordena por similaridade
-            correspondencias.sort(key=lambda x: x[2], reverse=True)
+            # Adiciona colunas extras se configuradas
+            for col_extra in extras_origem:
+                resultado[f'origem_{col_extra}'] = origem[col_extra][k]
             
-            if correspondencias:
-                melhor_correspondencia = correspondencias[0]
-                idx_destino, valor_destino_match, score = melhor_correspondencia
-                
-                resultado = {
-                    'aba_origem': aba_origem,
-                    'aba_destino': aba_destino,
-                    'coluna_origem': col_origem,
-                    'coluna_destino': col_destino,
-                    'valor_origem': df_origem.loc[idx, col_origem],
-                    'valor_destino': df_destino.loc[idx_destino, col_destino],
-                    'score_similaridade': score,
-                    'nome_mapeamento': mapeamento['nome'],
-                    'confianca': 'Alta' if score >= 90 else 'Média' if score >= 75 else 'Baixa',
-                    'alternativas': len(correspondencias) - 1
-                }
-                
-                # Adiciona colunas extras se configuradas
-                for col_extra in mapeamento.get('colunas_extras_origem', []):
-                    if col_extra in df_origem.columns:
-                        resultado[f'origem_{col_extra}'] = df_origem.loc[idx, col_extra]
-                
-                for col_extra in mapeamento.get('colunas_extras_destino', []):
-                    if col_extra in df_destino.columns:
-                        resultado[f'destino_{col_extra}'] = df_destino.loc[idx_destino, col_extra]
-                
-                resultados.append(resultado)
+            for col_extra in extras_destino:
+                resultado[f'destino_{col_extra}'] = destino[col_extra][k]
+            
+            resultados.append(resultado)
+    
+    if pontuacoes is not None:
+        # Só os mapeamentos atuais continuam guardados
+        for chave in set(pontuacoes) - usadas:
+            del pontuacoes[chave]
     
-    return pd.DataFrame(resultados)
+    df_resultados = pd.DataFrame(resultados)
+    # Trabalho economizado pela deduplicação (exibido na interface)
+    df_resultados.attrs['deduplicacao'] = economia_total
+    return df_resultados
 
 def criar_visualizacoes_avancadas(df_resultados):
     """Cria visualizações avançadas dos resultados"""
@@ -544,6 +861,8 @@ st.markdown('<div class="sub-header">Análise avançada com IA para correspondê
 # Inicialização do session state
 if 'analise' not in st.session_state:
     st.session_state.analise = None
+if 'pontuacoes' not in st.session_state:
+    st.session_state.pontuacoes = {}
 if 'configuracao' not in st.session_state:
     st.session_state.configuracao = {
         'abas': [],
@@ -628,6 +947,8 @@ if arquivo_carregado:
                     with col1:
                         st.write(f"**{sugestao['aba_origem']}** → **{sugestao['aba_destino']}**")
                         st.write(f"📊 {sugestao['coluna_origem']} ↔️ {sugestao['coluna_destino']}")
+                        st.caption(f"{sugestao['tipo_sugestao']} · cabeçalho {sugestao['similaridade_cabecalho']}% · "
+                                   f"conteúdo {sugestao['similaridade_conteudo']}%")
                     
                     with col2:
                         if sugestao['similaridade'] >= 85:
@@ -691,7 +1012,7 @@ if arquivo_carregado:
                         dados_colunas.append({
                             'Coluna': nome_col,
                             'Tipo': analise_col['tipo'],
-                            'Valores Únicos': analise_col['valores_unicos'],
+                            'Valores Únicos (aprox.)': analise_col['valores_unicos'],
                             'Preenchimento (%)': analise_col['percentual_preenchimento'],
                             'Valores Nulos': analise_col['valores_nulos']
                         })
@@ -699,6 +1020,8 @@ if arquivo_carregado:
                     if dados_colunas:
                         df_colunas = pd.DataFrame(dados_colunas)
                         st.dataframe(df_colunas, use_container_width=True)
+                        if info_aba.get('amostrada'):
+                            st.caption(f"Colunas analisadas em uma amostra de {info_aba['linhas_analisadas']:,} linhas")
                 
                 # Amostra dos dados
                 if info_aba['dados_amostra']:
@@ -829,7 +1152,7 @@ if arquivo_carregado:
                 with col2:
                     limiar = st.slider(
                         "Limiar de similaridade:",
-                        min_value=50,
+                        min_value=LIMIAR_MINIMO_MAPEAMENTO,
                         max_value=100,
                         value=mapeamento['limiar_similaridade'],
                         key=f"mapeamento_limiar_{i}"
@@ -927,8 +1250,10 @@ if arquivo_carregado:
                         if st.button(f"🔍 Analisar Compatibilidade", key=f"analisar_{i}"):
                             with st.spinner("Analisando compatibilidade..."):
                                 try:
-                                    df_origem = pd.read_excel(arquivo_carregado, sheet_name=aba_origem)
-                                    df_destino = pd.read_excel(arquivo_carregado, sheet_name=aba_destino)
+                                    # Mesma linha de cabeçalho configurada para cada aba
+                                    planilha = abrir_planilha(arquivo_carregado)
+                                    df_origem = planilha.frame(aba_origem, header=config_origem['linha_cabecalho'])
+                                    df_destino = planilha.frame(aba_destino, header=config_destino['linha_cabecalho'])
                                     
                                     compatibilidade = analisar_compatibilidade_colunas(
                                         df_origem, mapeamento['coluna_origem'],
@@ -936,13 +1261,21 @@ if arquivo_carregado:
                                     )
                                     
                                     score_compat = compatibilidade['compatibilidade']
+                                    minimo, maximo = compatibilidade['intervalo_confianca']
+                                    faixa = f" (IC 95%: {minimo:.1f}–{maximo:.1f}%)" if maximo > minimo else ""
                                     
                                     if score_compat >= 70:
-                                        st.success(f"🟢 Compatibilidade: {score_compat:.1f}% - Excelente!")
+                                        st.success(f"🟢 Compatibilidade: {score_compat:.1f}%{faixa} - Excelente!")
                                     elif score_compat >= 50:
-                                        st.warning(f"🟡 Compatibilidade: {score_compat:.1f}% - Moderada")
+                                        st.warning(f"🟡 Compatibilidade: {score_compat:.1f}%{faixa} - Moderada")
                                     else:
-                                        st.error(f"🔴 Compatibilidade: {score_compat:.1f}% - Baixa")
+                                        st.error(f"🔴 Compatibilidade: {score_compat:.1f}%{faixa} - Baixa")
+                                    
+                                    # O intervalo indica se vale rodar a correspondência completa
+                                    if minimo >= 70:
+                                        st.caption("Mesmo no pior caso do intervalo a compatibilidade é alta: vale executar a correspondência completa.")
+                                    elif maximo < 50:
+                                        st.caption("Mesmo no melhor caso do intervalo a compatibilidade é baixa: revise o mapeamento antes de executar.")
                                     
                                     st.json(compatibilidade['detalhes'])
                                     
@@ -965,145 +1298,178 @@ if arquivo_carregado:
         if mapeamentos_validos:
             st.success(f"✅ {len(mapeamentos_validos)} mapeamento(s) válido(s) configurado(s)")
             
+            limiares = tuple(m['limiar_similaridade'] for m in st.session_state.configuracao['mapeamentos'])
             if st.button("🚀 Processar Dados com IA", type="primary"):
                 with st.spinner("Processando dados com IA avançada..."):
                     try:
-                        df_resultados = processar_dados_com_configuracao(arquivo_carregado, st.session_state.configuracao)
+                        st.session_state.resultado_processamento = {
+                            'arquivo': abrir_planilha(arquivo_carregado).key,
+                            'limiares': limiares,
+                            'df': processar_dados_com_configuracao(
+                                arquivo_carregado, st.session_state.configuracao, st.session_state.pontuacoes
+                            )
+                        }
+                    except Exception as e:
+                        st.error(f"❌ Erro durante processamento: {str(e)}")
+                        st.exception(e)
+            
+            # Resultados da última execução continuam visíveis entre interações; um limiar
+            # alterado só refiltra os scores guardados (st.session_state.pontuacoes)
+            resultado = st.session_state.get('resultado_processamento')
+            if resultado is not None and resultado['arquivo'] != abrir_planilha(arquivo_carregado).key:
+                resultado = None
+            if resultado is not None and resultado['limiares'] != limiares:
+                with st.spinner("🔄 Aplicando novos limiares..."):
+                    try:
+                        resultado['df'] = processar_dados_com_configuracao(
+                            arquivo_carregado, st.session_state.configuracao, st.session_state.pontuacoes
+                        )
+                        resultado['limiares'] = limiares
+                    except Exception as e:
+                        st.error(f"❌ Erro durante processamento: {str(e)}")
+                        st.exception(e)
+            
+            if resultado is not None:
+                df_resultados = resultado['df']
+                
+                if not df_resultados.empty:
+                    st.success(f"✅ Processamento concluído! {len(df_resultados)} correspondência(s) encontrada(s)")
+                    
+                    economia = df_resultados.attrs.get('deduplicacao')
+                    if economia:
+                        st.caption(
+                            f"♻️ Valores distintos: {economia['source_distinct']} de {economia['source_rows']} "
+                            f"(origem) e {economia['target_distinct']} de {economia['target_rows']} (destino); "
+                            f"{economia['pairs_saved']:,} comparações ({economia['saving_rate']:.1%}) evitadas"
+                        )
+                    
+                    # Exibir resultados
+                    st.subheader("📊 Resultados do Processamento")
+                    
+                    # Filtros para os resultados
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        score_minimo = st.slider(
+                            "Score mínimo:",
+                            min_value=0,
+                            max_value=100,
+                            value=limiar_global
+                        )
+                    
+                    with col2:
+                        filtro_mapeamento = st.selectbox(
+                            "Filtrar por mapeamento:",
+                            ['Todos'] + [m['nome'] for m in mapeamentos_validos]
+                        )
+                    
+                    with col3:
+                        filtro_confianca = st.selectbox(
+                            "Filtrar por confiança:",
+                            ['Todas', 'Alta', 'Média', 'Baixa']
+                        )
+                    
+                    with col4:
+                        ordenar_por = st.selectbox(
+                            "Ordenar por:",
+                            ['score_similaridade', 'valor_origem', 'valor_destino', 'confianca']
+                        )
+                    
+                    # Aplicar filtros
+                    df_filtrado = df_resultados[df_resultados['score_similaridade'] >= score_minimo]
+                    
+                    if filtro_mapeamento != 'Todos':
+                        df_filtrado = df_filtrado[df_filtrado['nome_mapeamento'] == filtro_mapeamento]
+                    
+                    if filtro_confianca != 'Todas':
+                        df_filtrado = df_filtrado[df_filtrado['confianca'] == filtro_confianca]
+                    
+                    df_filtrado = df_filtrado.sort_values(ordenar_por, ascending=False)
+                    
+                    # Métricas dos resultados
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        st.metric("Total", len(df_resultados))
+                    
+                    with col2:
+                        st.metric("Filtrados", len(df_filtrado))
+                    
+                    with col3:
+                        score_medio = df_filtrado['score_similaridade'].mean() if not df_filtrado.empty else 0
+                        st.metric("Score Médio", f"{score_medio:.1f}%")
+                    
+                    with col4:
+                        alta_confianca = len(df_filtrado[df_filtrado['confianca'] == 'Alta'])
+                        st.metric("Alta Confiança", alta_confianca)
+                    
+                    # Visualizações avançadas
+                    if not df_filtrado.empty:
+                        st.subheader("📈 Visualizações Avançadas")
                         
-                        if not df_resultados.empty:
-                            st.success(f"✅ Processamento concluído! {len(df_resultados)} correspondência(s) encontrada(s)")
-                            
-                            # Exibir resultados
-                            st.subheader("📊 Resultados do Processamento")
-                            
-                            # Filtros para os resultados
-                            col1, col2, col3, col4 = st.columns(4)
+                        graficos = criar_visualizacoes_avancadas(df_filtrado)
+                        if graficos:
+                            col1, col2 = st.columns(2)
                             
                             with col1:
-                                score_minimo = st.slider(
-                                    "Score mínimo:",
-                                    min_value=0,
-                                    max_value=100,
-                                    value=limiar_global
-                                )
+                                st.plotly_chart(graficos['scores'], use_container_width=True)
+                                st.plotly_chart(graficos['mapeamentos'], use_container_width=True)
                             
                             with col2:
-                                filtro_mapeamento = st.selectbox(
-                                    "Filtrar por mapeamento:",
-                                    ['Todos'] + [m['nome'] for m in mapeamentos_validos]
-                                )
-                            
-                            with col3:
-                                filtro_confianca = st.selectbox(
-                                    "Filtrar por confiança:",
-                                    ['Todas', 'Alta', 'Média', 'Baixa']
-                                )
-                            
-                            with col4:
-                                ordenar_por = st.selectbox(
-                                    "Ordenar por:",
-                                    ['score_similaridade', 'valor_origem', 'valor_destino', 'confianca']
-                                )
-                            
-                            # Aplicar filtros
-                            df_filtrado = df_resultados[df_resultados['score_similaridade'] >= score_minimo]
-                            
-                            if filtro_mapeamento != 'Todos':
-                                df_filtrado = df_filtrado[df_filtrado['nome_mapeamento'] == filtro_mapeamento]
-                            
-                            if filtro_confianca != 'Todas':
-                                df_filtrado = df_filtrado[df_filtrado['confianca'] == filtro_confianca]
-                            
-                            df_filtrado = df_filtrado.sort_values(ordenar_por, ascending=False)
-                            
-                            # Métricas dos resultados
-                            col1, col2, col3, col4 = st.columns(4)
-                            
-                            with col1:
-                                st.metric("Total", len(df_resultados))
-                            
-                            with col2:
-                                st.metric("Filtrados", len(df_filtrado))
-                            
-                            with col3:
-                                score_medio = df_filtrado['score_similaridade'].mean() if not df_filtrado.empty else 0
-                                st.metric("Score Médio", f"{score_medio:.1f}%")
-                            
-                            with col4:
-                                alta_confianca = len(df_filtrado[df_filtrado['confianca'] == 'Alta'])
-                                st.metric("Alta Confiança", alta_confianca)
-                            
-                            # Visualizações avançadas
-                            if not df_filtrado.empty:
-                                st.subheader("📈 Visualizações Avançadas")
-                                
-                                graficos = criar_visualizacoes_avancadas(df_filtrado)
-                                if graficos:
-                                    col1, col2 = st.columns(2)
-                                    
-                                    with col1:
-                                        st.plotly_chart(graficos['scores'], use_container_width=True)
-            st.plotly_chart(graficos['mapeamentos'], use_container_width=True)
-                                    
-                                    with col2:
-                                        st.plotly_chart(graficos['confianca'], use_container_width=True)
-                            
-                            # Exibir tabela de resultados
-                            st.subheader("📋 Tabela de Resultados")
-                            
-                            # Formatação da tabela
-                            df_exibicao = df_filtrado.copy()
-                            
-                            # Adiciona formatação de cores baseada na confiança
-                            def formatar_confianca(val):
-                                if val == 'Alta':
-                                    return 'background-color: #d4edda; color: #155724'
-                                elif val == 'Média':
-                                    return 'background-color: #fff3cd; color: #856404'
-                                else:
-                                    return 'background-color: #f8d7da; color: #721c24'
-                            
-                            if not df_exibicao.empty:
-                                st.dataframe(
-                                    df_exibicao.style.applymap(formatar_confianca, subset=['confianca']),
-                                    use_container_width=True
-                                )
-                            
-                            # Download dos resultados
-                            if not df_filtrado.empty:
-                                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                                nome_arquivo = f"mapeamento_inteligente_{timestamp}.xlsx"
-                                
-                                output = io.BytesIO()
-                                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                                    df_filtrado.to_excel(writer, sheet_name='Resultados', index=False)
-                                    
-                                    # Adiciona aba com estatísticas
-                                    estatisticas = {
-                                        'Métrica': ['Total de Correspondências', 'Score Médio', 'Alta Confiança', 'Média Confiança', 'Baixa Confiança'],
-                                        'Valor': [
-                                            len(df_filtrado),
-                                            f"{df_filtrado['score_similaridade'].mean():.2f}%",
-                                            len(df_filtrado[df_filtrado['confianca'] == 'Alta']),
-                                            len(df_filtrado[df_filtrado['confianca'] == 'Média']),
-                                            len(df_filtrado[df_filtrado['confianca'] == 'Baixa'])
-                                        ]
-                                    }
-                                    pd.DataFrame(estatisticas).to_excel(writer, sheet_name='Estatísticas', index=False)
-                                
-                                st.download_button(
-                                    label="📥 Baixar Resultados (Excel)",
-                                    data=output.getvalue(),
-                                    file_name=nome_arquivo,
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                                )
-                        
+                                st.plotly_chart(graficos['confianca'], use_container_width=True)
+                    
+                    # Exibir tabela de resultados
+                    st.subheader("📋 Tabela de Resultados")
+                    
+                    # Formatação da tabela
+                    df_exibicao = df_filtrado.copy()
+                    
+                    # Adiciona formatação de cores baseada na confiança
+                    def formatar_confianca(val):
+                        if val == 'Alta':
+                            return 'background-color: #d4edda; color: #155724'
+                        elif val == 'Média':
+                            return 'background-color: #fff3cd; color: #856404'
                         else:
-                            st.warning("⚠️ Nenhuma correspondência encontrada com os critérios configurados")
+                            return 'background-color: #f8d7da; color: #721c24'
                     
-                    except Exception as e:
-                        st.error(f"❌ Erro durante processamento: {str(e)}")
-                        st.exception(e)
+                    if not df_exibicao.empty:
+                        st.dataframe(
+                            df_exibicao.style.applymap(formatar_confianca, subset=['confianca']),
+                            use_container_width=True
+                        )
+                    
+                    # Download dos resultados
+                    if not df_filtrado.empty:
+                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        nome_arquivo = f"mapeamento_inteligente_{timestamp}.xlsx"
+                        
+                        output = io.BytesIO()
+                        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                            df_filtrado.to_excel(writer, sheet_name='Resultados', index=False)
+                            
+                            # Adiciona aba com estatísticas
+                            estatisticas = {
+                                'Métrica': ['Total de Correspondências', 'Score Médio', 'Alta Confiança', 'Média Confiança', 'Baixa Confiança'],
+                                'Valor': [
+                                    len(df_filtrado),
+                                    f"{df_filtrado['score_similaridade'].mean():.2f}%",
+                                    len(df_filtrado[df_filtrado['confianca'] == 'Alta']),
+                                    len(df_filtrado[df_filtrado['confianca'] == 'Média']),
+                                    len(df_filtrado[df_filtrado['confianca'] == 'Baixa'])
+                                ]
+                            }
+                            pd.DataFrame(estatisticas).to_excel(writer, sheet_name='Estatísticas', index=False)
+                        
+                        st.download_button(
+                            label="📥 Baixar Resultados (Excel)",
+                            data=output.getvalue(),
+                            file_name=nome_arquivo,
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
+                
+                else:
+                    st.warning("⚠️ Nenhuma correspondência encontrada com os critérios configurados")
         
         else:
             st.warning("⚠️ Configure pelo menos um mapeamento válido para processar os dados")
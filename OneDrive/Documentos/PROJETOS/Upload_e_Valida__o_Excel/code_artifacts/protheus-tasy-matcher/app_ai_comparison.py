@@ -3,7 +3,6 @@ import pandas as pd
 import json
 import re
 import io
-import unicodedata
 from typing import Dict, List, Tuple, Optional, Any
 import plotly.express as px
 import plotly.graph_objects as go
@@ -24,6 +23,12 @@ import hashlib
 import pickle
 from pathlib import Path
 
+from tfidf_index import TfidfCorpusIndex
+from keyword_matcher import DomainKeywordMatcher, load_keyword_dictionary
+from text_normalization import AI_PROFILE, normalize_list, normalize_value
+from disk_cache import default_cache
+from workbook_session import open_session
+
 warnings.filterwarnings('ignore')
 
 # Configuração da página
@@ -95,16 +100,31 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Palavras-chave específicas do domínio (padrão do AdvancedAIComparator)
+AI_DOMAIN_KEYWORDS = {
+    'financeiro': ['valor', 'preco', 'custo', 'total', 'subtotal', 'desconto', 'taxa', 'juros'],
+    'temporal': ['data', 'hora', 'periodo', 'mes', 'ano', 'dia', 'prazo', 'vencimento'],
+    'identificacao': ['codigo', 'id', 'numero', 'seq', 'chave', 'ref', 'referencia'],
+    'quantidade': ['qtd', 'quantidade', 'volume', 'peso', 'medida', 'unidade'],
+    'pessoa': ['nome', 'cliente', 'fornecedor', 'usuario', 'responsavel', 'contato'],
+    'produto': ['item', 'produto', 'material', 'mercadoria', 'sku', 'categoria'],
+    'localizacao': ['endereco', 'cidade', 'estado', 'pais', 'cep', 'regiao', 'local']
+}
+
 class AdvancedAIComparator:
     """Sistema avançado de comparação com IA para análise de dados Excel"""
     
-    def __init__(self):
+    def __init__(self, domain_keywords: Optional[Dict[str, List[str]]] = None):
         self.vectorizer = TfidfVectorizer(
             max_features=1000,
             stop_words=None,
             ngram_range=(1, 3),
             analyzer='char_wb'
         )
+        # Índice TF-IDF ajustado uma vez sobre as colunas em comparação
+        self.tfidf_index = TfidfCorpusIndex(analyzer='char_wb', ngram_range=(1, 3))
+        # Extrator compilado uma única vez (dicionário, arquivo JSON ou None para o padrão)
+        self.keyword_matcher = DomainKeywordMatcher(load_keyword_dictionary(domain_keywords, AI_DOMAIN_KEYWORDS))
         self.learning_data = self._load_learning_data()
         self.comparison_history = []
         
@@ -134,16 +154,7 @@ class AdvancedAIComparator:
     
     def normalize_text(self, text: str) -> str:
         """Normalização avançada de texto"""
-        if pd.isna(text) or text is None:
-            return ""
-        
-        text = str(text).lower().strip()
-        text = unicodedata.normalize('NFKD', text)
-        text = ''.join(c for c in text if not unicodedata.combining(c))
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        return normalize_value(text, AI_PROFILE)
     
     def extract_semantic_features(self, text: str) -> Dict[str, Any]:
         """Extrai características semânticas do texto"""
@@ -165,27 +176,7 @@ class AdvancedAIComparator:
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extrai palavras-chave importantes do texto"""
-        # Palavras-chave específicas do domínio
-        domain_keywords = {
-            'financeiro': ['valor', 'preco', 'custo', 'total', 'subtotal', 'desconto', 'taxa', 'juros'],
-            'temporal': ['data', 'hora', 'periodo', 'mes', 'ano', 'dia', 'prazo', 'vencimento'],
-            'identificacao': ['codigo', 'id', 'numero', 'seq', 'chave', 'ref', 'referencia'],
-            'quantidade': ['qtd', 'quantidade', 'volume', 'peso', 'medida', 'unidade'],
-            'pessoa': ['nome', 'cliente', 'fornecedor', 'usuario', 'responsavel', 'contato'],
-            'produto': ['item', 'produto', 'material', 'mercadoria', 'sku', 'categoria'],
-            'localizacao': ['endereco', 'cidade', 'estado', 'pais', 'cep', 'regiao', 'local']
-        }
-        
-        keywords = []
-        words = text.split()
-        
-        for category, category_words in domain_keywords.items():
-            for word in words:
-                for keyword in category_words:
-                    if keyword in word or word in keyword:
-                        keywords.append(f"{category}:{keyword}")
-        
-        return list(set(keywords))
+        return self.keyword_matcher.extract(text)
     
     def calculate_advanced_similarity(self, text1: str, text2: str) -> Dict[str, float]:
         """Calcula similaridade avançada usando múltiplas métricas"""
@@ -200,11 +191,14 @@ class AdvancedAIComparator:
         jaccard_sim = jaccard(set(norm1.split()), set(norm2.split()))
         
         # Similaridade semântica usando TF-IDF
-        try:
-            tfidf_matrix = self.vectorizer.fit_transform([norm1, norm2])
-            cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        except:
-            cosine_sim = 0.0
+        if self.tfidf_index.is_fitted:
+            cosine_sim = self.tfidf_index.similarity(norm1, norm2)
+        else:
+            try:
+                tfidf_matrix = self.vectorizer.fit_transform([norm1, norm2])
+                cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+            except:
+                cosine_sim = 0.0
         
         # Análise de características semânticas
         features1 = self.extract_semantic_features(text1)
@@ -268,7 +262,19 @@ class AdvancedAIComparator:
     def find_best_matches(self, source_columns: List[str], target_columns: List[str], 
                          threshold: float = 0.3) -> List[Dict]:
         """Encontra as melhores correspondências entre colunas usando IA"""
-        matches = []
+        return self.filter_matches(self.best_candidates(source_columns, target_columns), threshold)
+    
+    def best_candidates(self, source_columns: List[str], target_columns: List[str]) -> List[Dict]:
+        """
+        Melhor destino de cada coluna de origem, sem limiar
+        
+        O vencedor de uma origem não depende do limiar (o primeiro destino com o maior
+        score); um limiar novo é só um filtro sobre estes candidatos (filter_matches).
+        """
+        candidates = []
+        
+        # Ajusta o TF-IDF uma única vez sobre todas as colunas
+        self.tfidf_index.fit(normalize_list(list(source_columns) + list(target_columns), AI_PROFILE))
         
         for source_col in source_columns:
             best_match = None
@@ -277,7 +283,7 @@ class AdvancedAIComparator:
             for target_col in target_columns:
                 similarity = self.calculate_advanced_similarity(source_col, target_col)
                 
-                if similarity['overall'] > best_score and similarity['overall'] >= threshold:
+                if similarity['overall'] > best_score:
                     best_score = similarity['overall']
                     best_match = {
                         'source': source_col,
@@ -288,9 +294,14 @@ class AdvancedAIComparator:
                     }
             
             if best_match:
-                matches.append(best_match)
+                candidates.append(best_match)
         
-        # Ordena por confiança
+        return candidates
+    
+    @staticmethod
+    def filter_matches(candidates: List[Dict], threshold: float) -> List[Dict]:
+        """Candidatos de best_candidates que atingem o limiar, ordenados por confiança"""
+        matches = [match for match in candidates if match['similarity']['overall'] >= threshold]
         matches.sort(key=lambda x: x['confidence'], reverse=True)
         return matches
     
@@ -394,14 +405,14 @@ class AdvancedAIComparator:
         }
 
 def load_excel_file(uploaded_file) -> Tuple[Dict[str, pd.DataFrame], bool]:
-    """Carrega arquivo Excel e retorna dicionário de DataFrames"""
+    """Carrega arquivo Excel e retorna dicionário de DataFrames (visões da sessão compartilhada do arquivo)"""
     try:
         excel_data = {}
-        excel_file = pd.ExcelFile(uploaded_file)
+        workbook = open_session(uploaded_file, default_cache())
         
-        for sheet_name in excel_file.sheet_names:
+        for sheet_name in workbook.sheet_names:
             try:
-                df = pd.read_excel(uploaded_file, sheet_name=sheet_name)
+                df = workbook.frame(sheet_name)
                 if not df.empty:
                     excel_data[sheet_name] = df
             except Exception as e:
@@ -585,143 +596,150 @@ def main():
                     st.dataframe(target_df.head(), use_container_width=True)
                 
                 # Botão para executar comparação
+                comparison_key = (uploaded_file.name, uploaded_file.size, source_sheet, target_sheet)
                 if st.button("🚀 Executar Comparação Inteligente", type="primary"):
                     with st.spinner("🤖 Executando análise avançada com IA..."):
-                        
-                        # Encontra correspondências usando IA
-                        source_columns = source_df.columns.tolist()
-                        target_columns = target_df.columns.tolist()
-                        
-                        matches = comparator.find_best_matches(
-                            source_columns, 
-                            target_columns, 
-                            threshold=similarity_threshold
-                        )
-                        
-                        # Filtra por confiança
-                        high_confidence_matches = [
-                            match for match in matches 
-                            if match['confidence'] >= confidence_threshold
-                        ]
-                        
-                        # Exibe resultados
-                        st.subheader("🎯 Resultados da Comparação Inteligente")
-                        
-                        # Métricas gerais
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            st.metric(
-                                "Total de Correspondências",
-                                len(matches),
-                                delta=f"{len(high_confidence_matches)} alta confiança"
-                            )
-                        
-                        with col2:
-                            avg_similarity = np.mean([m['similarity']['overall'] for m in matches]) if matches else 0
-                            st.metric(
-                                "Similaridade Média",
-                                f"{avg_similarity:.3f}",
-                                delta=f"{(avg_similarity - 0.5):.3f}" if avg_similarity > 0.5 else f"{(avg_similarity - 0.5):.3f}"
+                        # Melhor destino de cada coluna, sem limiar: os sliders de limiar
+                        # apenas filtram estes candidatos, sem nova comparação
+                        st.session_state.ai_comparison = {
+                            'key': comparison_key,
+                            'source_columns': source_df.columns.tolist(),
+                            'candidates': comparator.best_candidates(
+                                source_df.columns.tolist(),
+                                target_df.columns.tolist()
                             )
+                        }
                         
-                        with col3:
-                            avg_confidence = np.mean([m['confidence'] for m in matches]) if matches else 0
-                            st.metric(
-                                "Confiança Média",
-                                f"{avg_confidence:.3f}",
-                                delta="Alta" if avg_confidence > 0.7 else "Média" if avg_confidence > 0.5 else "Baixa"
-                            )
-                        
-                        with col4:
-                            coverage = (len(matches) / len(source_columns)) * 100 if source_columns else 0
-                            st.metric(
-                                "Cobertura",
-                                f"{coverage:.1f}%",
-                                delta="Boa" if coverage > 70 else "Parcial"
-                            )
-                        
-                        # Visualizações
-                        if matches and show_detailed_metrics:
-                            st.subheader("📊 Visualizações Avançadas")
-                            create_comparison_visualization(matches, comparator)
+                        # Salva dados de aprendizado
+                        comparator._save_learning_data()
+                
+                # Resultados da última comparação destas abas continuam visíveis entre interações
+                comparison = st.session_state.get('ai_comparison')
+                if comparison is not None and comparison['key'] == comparison_key:
+                    source_columns = comparison['source_columns']
+                    matches = comparator.filter_matches(comparison['candidates'], similarity_threshold)
+                    
+                    # Filtra por confiança
+                    high_confidence_matches = [
+                        match for match in matches 
+                        if match['confidence'] >= confidence_threshold
+                    ]
+                    
+                    # Exibe resultados
+                    st.subheader("🎯 Resultados da Comparação Inteligente")
+                    
+                    # Métricas gerais
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        st.metric(
+                            "Total de Correspondências",
+                            len(matches),
+                            delta=f"{len(high_confidence_matches)} alta confiança"
+                        )
+                    
+                    with col2:
+                        avg_similarity = np.mean([m['similarity']['overall'] for m in matches]) if matches else 0
+                        st.metric(
+                            "Similaridade Média",
+                            f"{avg_similarity:.3f}",
+                            delta=f"{(avg_similarity - 0.5):.3f}" if avg_similarity > 0.5 else f"{(avg_similarity - 0.5):.3f}"
+                        )
+                    
+                    with col3:
+                        avg_confidence = np.mean([m['confidence'] for m in matches]) if matches else 0
+                        st.metric(
+                            "Confiança Média",
+                            f"{avg_confidence:.3f}",
+                            delta="Alta" if avg_confidence > 0.7 else "Média" if avg_confidence > 0.5 else "Baixa"
+                        )
+                    
+                    with col4:
+                        coverage = (len(matches) / len(source_columns)) * 100 if source_columns else 0
+                        st.metric(
+                            "Cobertura",
+                            f"{coverage:.1f}%",
+                            delta="Boa" if coverage > 70 else "Parcial"
+                        )
+                    
+                    # Visualizações
+                    if matches and show_detailed_metrics:
+                        st.subheader("📊 Visualizações Avançadas")
+                        create_comparison_visualization(matches, comparator)
+                    
+                    # Resultados detalhados
+                    if matches:
+                        st.subheader("📋 Correspondências Detalhadas")
                         
-                        # Resultados detalhados
-                        if matches:
-                            st.subheader("📋 Correspondências Detalhadas")
+                        for i, match in enumerate(matches):
+                            confidence_class = "match-high" if match['confidence'] >= 0.7 else "match-medium" if match['confidence'] >= 0.5 else "match-low"
                             
-                            for i, match in enumerate(matches):
-                                confidence_class = "match-high" if match['confidence'] >= 0.7 else "match-medium" if match['confidence'] >= 0.5 else "match-low"
-                                
-                                st.markdown(f"""
-                                <div class="comparison-result {confidence_class}">
-                                    <h4>🔗 Correspondência {i+1}</h4>
-                                    <p><strong>Origem:</strong> {match['source']}</p>
-                                    <p><strong>Destino:</strong> {match['target']}</p>
-                                    <p><strong>Similaridade:</strong> {match['similarity']['overall']:.3f}</p>
-                                    <p><strong>Confiança:</strong> {match['confidence']:.3f}</p>
-                                    <p><strong>Recomendação:</strong> {match['recommendation']}</p>
-                                </div>
-                                """, unsafe_allow_html=True)
-                                
-                                # Análise de compatibilidade de dados
-                                if enable_compatibility_check:
-                                    with st.expander(f"🔍 Análise de Compatibilidade - {match['source']} ↔ {match['target']}"):
-                                        compatibility = comparator.compare_data_compatibility(
-                                            source_df, match['source'],
-                                            target_df, match['target']
-                                        )
-                                        
-                                        st.metric(
-                                            "Pontuação de Compatibilidade",
-                                            f"{compatibility['compatibility_score']:.3f}",
-                                            delta="Compatível" if compatibility['compatibility_score'] > 0.7 else "Verificar"
-                                        )
+                            st.markdown(f"""
+                            <div class="comparison-result {confidence_class}">
+                                <h4>🔗 Correspondência {i+1}</h4>
+                                <p><strong>Origem:</strong> {match['source']}</p>
+                                <p><strong>Destino:</strong> {match['target']}</p>
+                                <p><strong>Similaridade:</strong> {match['similarity']['overall']:.3f}</p>
+                                <p><strong>Confiança:</strong> {match['confidence']:.3f}</p>
+                                <p><strong>Recomendação:</strong> {match['recommendation']}</p>
+                            </div>
+                            """, unsafe_allow_html=True)
+                            
+                            # Análise de compatibilidade de dados
+                            if enable_compatibility_check:
+                                with st.expander(f"🔍 Análise de Compatibilidade - {match['source']} ↔ {match['target']}"):
+                                    compatibility = comparator.compare_data_compatibility(
+                                        source_df, match['source'],
+                                        target_df, match['target']
+                                    )
+                                    
+                                    st.metric(
+                                        "Pontuação de Compatibilidade",
+                                        f"{compatibility['compatibility_score']:.3f}",
+                                        delta="Compatível" if compatibility['compatibility_score'] > 0.7 else "Verificar"
+                                    )
+                                    
+                                    if compatibility['issues']:
+                                        st.warning("⚠️ Problemas Identificados:")
+                                        for issue in compatibility['issues']:
+                                            st.write(f"• {issue}")
+                                    
+                                    # Análise detalhada dos dados
+                                    if enable_data_analysis:
+                                        col1, col2 = st.columns(2)
                                         
-                                        if compatibility['issues']:
-                                            st.warning("⚠️ Problemas Identificados:")
-                                            for issue in compatibility['issues']:
-                                                st.write(f"• {issue}")
+                                        with col1:
+                                            st.write("**Análise da Coluna de Origem:**")
+                                            analysis1 = compatibility['analysis1']
+                                            st.json({
+                                                'Total de Registros': analysis1['total_records'],
+                                                'Valores Únicos': analysis1['unique_values'],
+                                                'Percentual de Nulos': f"{analysis1['null_percentage']:.1f}%",
+                                                'Tipos de Dados': analysis1['data_types']
+                                            })
                                         
-                                        # Análise detalhada dos dados
-                                        if enable_data_analysis:
-                                            col1, col2 = st.columns(2)
-                                            
-                                            with col1:
-                                                st.write("**Análise da Coluna de Origem:**")
-                                                analysis1 = compatibility['analysis1']
-                                                st.json({
-                                                    'Total de Registros': analysis1['total_records'],
-                                                    'Valores Únicos': analysis1['unique_values'],
-                                                    'Percentual de Nulos': f"{analysis1['null_percentage']:.1f}%",
-                                                    'Tipos de Dados': analysis1['data_types']
-                                                })
-                                            
-                                            with col2:
-                                                st.write("**Análise da Coluna de Destino:**")
-                                                analysis2 = compatibility['analysis2']
-                                                st.json({
-                                                    'Total de Registros': analysis2['total_records'],
-                                                    'Valores Únicos': analysis2['unique_values'],
-                                                    'Percentual de Nulos': f"{analysis2['null_percentage']:.1f}%",
-                                                    'Tipos de Dados': analysis2['data_types']
-                                                })
-                        
-                        else:
-                            st.warning("🔍 Nenhuma correspondência encontrada com os critérios especificados.")
-                            st.info("💡 Dica: Tente reduzir o limiar de similaridade ou confiança nas configurações.")
-                        
-                        # Insights de IA
-                        st.markdown("""
-                        <div class="ai-insight">
-                            <h3>🧠 Insights da IA</h3>
-                            <p>O sistema analisou as colunas usando algoritmos avançados de processamento de linguagem natural e aprendizado de máquina. 
-                            As correspondências são baseadas em múltiplas métricas de similaridade, análise semântica e padrões de dados.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Salva dados de aprendizado
-                        comparator._save_learning_data()
+                                        with col2:
+                                            st.write("**Análise da Coluna de Destino:**")
+                                            analysis2 = compatibility['analysis2']
+                                            st.json({
+                                                'Total de Registros': analysis2['total_records'],
+                                                'Valores Únicos': analysis2['unique_values'],
+                                                'Percentual de Nulos': f"{analysis2['null_percentage']:.1f}%",
+                                                'Tipos de Dados': analysis2['data_types']
+                                            })
+                    
+                    else:
+                        st.warning("🔍 Nenhuma correspondência encontrada com os critérios especificados.")
+                        st.info("💡 Dica: Tente reduzir o limiar de similaridade ou confiança nas configurações.")
+                    
+                    # Insights de IA
+                    st.markdown("""
+                    <div class="ai-insight">
+                        <h3>🧠 Insights da IA</h3>
+                        <p>O sistema analisou as colunas usando algoritmos avançados de processamento de linguagem natural e aprendizado de máquina. 
+                        As correspondências são baseadas em múltiplas métricas de similaridade, análise semântica e padrões de dados.</p>
+                    </div>
+                    """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
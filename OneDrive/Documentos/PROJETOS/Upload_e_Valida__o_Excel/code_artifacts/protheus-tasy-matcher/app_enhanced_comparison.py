@@ -22,6 +22,8 @@ from enhanced_comparison_engine import (
     ComparisonReport,
     quick_compare
 )
+from disk_cache import default_cache
+from workbook_session import open_session
 
 # Configuração da página
 st.set_page_config(
@@ -135,7 +137,8 @@ st.markdown("""
 def initialize_session_state():
     """Inicializa o estado da sessão"""
     if 'comparison_engine' not in st.session_state:
-        st.session_state.comparison_engine = EnhancedComparisonEngine()
+        # Normalização, características, TF-IDF e índices de candidatos persistem entre sessões
+        st.session_state.comparison_engine = EnhancedComparisonEngine({'disk_cache_dir': default_cache().directory})
     
     if 'comparison_results' not in st.session_state:
         st.session_state.comparison_results = None
@@ -146,8 +149,9 @@ def initialize_session_state():
 def load_excel_file(uploaded_file, file_key: str):
     """Carrega arquivo Excel e armazena no estado da sessão"""
     try:
-        # Lê todas as abas
-        excel_data = pd.read_excel(uploaded_file, sheet_name=None)
+        # Todas as abas, como visões da sessão compartilhada do arquivo (mesmo conteúdo,
+        # por SHA-256, = mesma sessão; abas já montadas vêm do cache em disco)
+        excel_data = open_session(uploaded_file, default_cache()).frames()
         
         st.session_state.uploaded_files[file_key] = {
             'name': uploaded_file.name,
@@ -313,6 +317,61 @@ def display_match_details(match, index: int):
     </div>
     """, unsafe_allow_html=True)
 
+def format_duration(seconds: float) -> str:
+    """Duração legível (µs, ms ou s)"""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+def display_profiling_panel(engine: EnhancedComparisonEngine):
+    """Painel de depuração: tempo por etapa da última execução do motor ('enable_profiling')"""
+    profile = engine.profiler.snapshot()
+    stages = profile['stages']
+    if not stages:
+        st.info("Nenhuma etapa medida: ative a instrumentação na barra lateral e execute a comparação")
+        return
+    
+    st.caption(
+        f"Execução: {profile['run_seconds']:.2f}s do início da busca à última etapa medida. No backend de processos, "
+        f"as etapas somam o tempo de todos os processos de trabalho."
+    )
+    df_stages = pd.DataFrame([
+        {
+            'Etapa': name,
+            'Chamadas': values['calls'],
+            'Itens': values['items'],
+            'Tempo Total (s)': round(values['total_seconds'], 4),
+            'Média por Chamada': format_duration(values['mean_seconds']),
+            'Máximo': format_duration(values['max_seconds']),
+            'Itens/s': round(values['items_per_second']) if values['items_per_second'] else None,
+            '% da Execução': round(100 * values['run_share'], 1) if values['run_share'] is not None else None
+        }
+        for name, values in stages.items()
+    ])
+    st.dataframe(df_stages, use_container_width=True, hide_index=True)
+    
+    fig_stages = px.bar(
+        df_stages, x='Tempo Total (s)', y='Etapa', orientation='h',
+        title='Tempo Total por Etapa'
+    )
+    fig_stages.update_layout(yaxis={'categoryorder': 'total ascending'})
+    st.plotly_chart(fig_stages, use_container_width=True)
+    
+    stage = st.selectbox("Distribuição da duração por chamada:", list(stages), key="profiling_stage")
+    histogram = stages[stage]['histogram']
+    labels = [
+        f"< {format_duration(bucket['upper_seconds'])}" if bucket['upper_seconds'] is not None else "maior"
+        for bucket in histogram
+    ]
+    fig_histogram = px.bar(
+        x=labels, y=[bucket['count'] for bucket in histogram],
+        labels={'x': 'Duração', 'y': 'Chamadas'},
+        title=f'Histograma de Duração: {stage}'
+    )
+    st.plotly_chart(fig_histogram, use_container_width=True)
+
 def export_results_to_excel(report: ComparisonReport, filename: str):
     """Exporta resultados para Excel"""
     try:
@@ -330,7 +389,8 @@ def export_results_to_excel(report: ComparisonReport, filename: str):
                     'Baixa Similaridade',
                     'Sem Correspondência',
                     'Similaridade Média',
-                    'Tempo de Processamento (s)'
+                    'Tempo de Processamento (s)',
+                    'Pares Economizados (Deduplicação)'
                 ],
                 'Valor': [
                     report.total_comparisons,
@@ -340,7 +400,8 @@ def export_results_to_excel(report: ComparisonReport, filename: str):
                     report.low_similarity_matches,
                     report.no_matches,
                     f"{report.average_similarity:.3f}",
-                    f"{report.processing_time:.2f}"
+                    f"{report.processing_time:.2f}",
+                    (report.summary_stats.get('dedup') or {}).get('pairs_saved', 0)
                 ]
             }
             
@@ -348,41 +409,20 @@ def export_results_to_excel(report: ComparisonReport, filename: str):
             
             # Aba de correspondências detalhadas
             if report.matches:
-                matches_data = []
-                for match in report.matches:
-                    matches_data.append({
-                        'Valor Origem': match.source_value,
-                        'Valor Destino': match.target_value,
-                        'Similaridade': f"{match.similarity_score:.3f}",
-                        'Tipo': match.match_type.value,
-                        'Confiança': f"{match.confidence:.3f}",
-                        'Tipo de Dados': match.data_type.value,
-                        'Recomendação': match.recommendation,
-                        'Levenshtein': f"{match.algorithm_scores.get('levenshtein', 0):.3f}",
-                        'Jaro-Winkler': f"{match.algorithm_scores.get('jaro_winkler', 0):.3f}",
-                        'Jaccard': f"{match.algorithm_scores.get('jaccard', 0):.3f}",
-                        'Cosine': f"{match.algorithm_scores.get('cosine', 0):.3f}",
-                        'Semântica': f"{match.algorithm_scores.get('semantic', 0):.3f}"
-                    })
-                
-                pd.DataFrame(matches_data).to_excel(writer, sheet_name='Correspondências', index=False)
+                report.matches.to_export_frame().to_excel(writer, sheet_name='Correspondências', index=False)
             
             # Aba de mapeamento de-para
             if report.matches:
-                mapping_data = []
-                for match in report.matches:
-                    if match.match_type in [MatchType.EXACT, MatchType.HIGH_SIMILARITY]:
-                        mapping_data.append({
-                            'Sistema Origem (Protheus)': match.source_value,
-                            'Sistema Destino (TASY)': match.target_value,
-                            'Tipo de Correspondência': match.match_type.value,
-                            'Score de Confiança': f"{match.confidence:.3f}",
-                            'Status': 'Aprovado' if match.match_type == MatchType.EXACT else 'Revisar',
-                            'Observações': match.recommendation
-                        })
-                
-                if mapping_data:
-                    pd.DataFrame(mapping_data).to_excel(writer, sheet_name='Mapeamento De-Para', index=False)
+                mapping = report.matches.filter([MatchType.EXACT, MatchType.HIGH_SIMILARITY]).to_dataframe()
+                if not mapping.empty:
+                    pd.DataFrame({
+                        'Sistema Origem (Protheus)': mapping['source_value'],
+                        'Sistema Destino (TASY)': mapping['target_value'],
+                        'Tipo de Correspondência': mapping['match_type'],
+                        'Score de Confiança': mapping['confidence'].map('{:.3f}'.format),
+                        'Status': np.where(mapping['match_type'] == MatchType.EXACT.value, 'Aprovado', 'Revisar'),
+                        'Observações': mapping['recommendation']
+                    }).to_excel(writer, sheet_name='Mapeamento De-Para', index=False)
         
         buffer.seek(0)
         return buffer
@@ -459,8 +499,35 @@ def main():
         enable_parallel = st.checkbox("Processamento Paralelo", value=True)
         enable_cache = st.checkbox("Cache de Similaridade", value=True)
         
+        # Tempo por etapa da busca (painel de depuração na aba de resultados)
+        enable_profiling = st.checkbox(
+            "🩺 Instrumentação por Etapa (debug)", value=False,
+            help="Mede normalização, geração de candidatos, cada algoritmo, classificação e relatório"
+        )
+        
         st.session_state.comparison_engine.config['enable_parallel'] = enable_parallel
         st.session_state.comparison_engine.config['enable_cache'] = enable_cache
+        st.session_state.comparison_engine.config['enable_profiling'] = enable_profiling
+        
+        # Geração de candidatos (troca recall por velocidade)
+        candidate_options = {
+            "Desativada (todos os pares)": None,
+            "TF-IDF (vizinhos mais próximos)": 'tfidf',
+            "Índice de palavras": 'token',
+            "Q-gramas": 'qgram'
+        }
+        candidate_label = st.selectbox("Geração de Candidatos", list(candidate_options.keys()))
+        st.session_state.comparison_engine.config['candidate_generation'] = candidate_options[candidate_label]
+        
+        if candidate_options[candidate_label]:
+            st.session_state.comparison_engine.config['candidate_top_k'] = st.slider(
+                "Candidatos por valor (k)", 1, 100, 10,
+                help="Mais candidatos = maior recall, menor velocidade"
+            )
+            st.session_state.comparison_engine.config['candidate_min_shared_grams'] = st.slider(
+                "Mínimo de n-gramas em comum", 1, 10, 1,
+                help="Pares com menos n-gramas/palavras em comum são descartados antes da pontuação"
+            )
         
         # Estatísticas do motor
         if st.button("📊 Ver Estatísticas"):
@@ -471,6 +538,20 @@ def main():
             st.session_state.comparison_engine.clear_cache()
             st.success("Cache limpo!")
     
+    # Limiar ou pesos alterados depois da comparação: refaz a escolha sobre os scores guardados
+    engine = st.session_state.comparison_engine
+    comparison_params = {'threshold': similarity_threshold, 'weights': dict(weights)}
+    if (st.session_state.comparison_results is not None and engine.rematch_cache is not None
+            and st.session_state.get('comparison_params') not in (None, comparison_params)):
+        start_time = time.time()
+        matches = engine.rematch(similarity_threshold)
+        st.session_state.comparison_results = engine.generate_comparison_report(
+            matches,
+            time.time() - start_time
+        )
+        st.session_state.comparison_params = comparison_params
+        st.sidebar.caption(f"♻️ Resultados recalculados em {time.time() - start_time:.2f}s sem nova pontuação")
+    
     # Área principal
     tab1, tab2, tab3, tab4 = st.tabs(["📁 Upload de Arquivos", "🔍 Comparação", "📊 Resultados", "📋 Relatório"])
     
@@ -554,12 +635,22 @@ def main():
                         
                         # Executa comparação
                         start_time = time.time()
+                        progress_placeholder = st.empty()
+                        
+                        def show_partial_report(aggregator):
+                            progress_placeholder.caption(
+                                f"⏳ Parcial: {aggregator.count} correspondências, "
+                                f"similaridade média {aggregator.average_similarity():.3f}, "
+                                f"{time.time() - start_time:.1f}s"
+                            )
                         
                         matches = st.session_state.comparison_engine.find_best_matches(
                             source_values, 
                             target_values, 
-                            threshold=similarity_threshold
+                            threshold=similarity_threshold,
+                            progress_callback=show_partial_report
                         )
+                        progress_placeholder.empty()
                         
                         processing_time = time.time() - start_time
                         
@@ -570,6 +661,10 @@ def main():
                         )
                         
                         st.session_state.comparison_results = report
+                        st.session_state.comparison_params = {
+                            'threshold': similarity_threshold,
+                            'weights': dict(weights)
+                        }
                     
                     st.success(f"✅ Comparação concluída! Encontradas {len(matches)} correspondências em {processing_time:.2f}s")
                     
@@ -610,17 +705,30 @@ def main():
                 )
             
             with col4:
-                confidence_avg = np.mean([m.confidence for m in report.matches]) if report.matches else 0
+                confidence_avg = report.matches.average_confidence()
                 st.metric(
                     "Confiança Média",
                     f"{confidence_avg:.3f}",
                     delta=f"{report.low_similarity_matches} baixa"
                 )
             
+            # Trabalho economizado pela deduplicação
+            dedup = report.summary_stats.get('dedup') if report.summary_stats else None
+            if dedup:
+                st.caption(
+                    f"♻️ Deduplicação: {dedup['source_distinct']} de {dedup['source_rows']} origens e "
+                    f"{dedup['target_distinct']} de {dedup['target_rows']} destinos distintos; "
+                    f"{dedup['pairs_saved']:,} pares ({dedup['saving_rate']:.1%}) deixaram de ser comparados"
+                )
+            
             # Visualizações
             st.markdown("### 📈 Visualizações")
             create_comparison_visualization(report)
             
+            if st.session_state.comparison_engine.config.get('enable_profiling'):
+                with st.expander("🩺 Perfil de Execução por Etapa", expanded=False):
+                    display_profiling_panel(st.session_state.comparison_engine)
+            
             # Lista de correspondências
             st.markdown("### 🔗 Correspondências Encontradas")
             
@@ -649,12 +757,8 @@ def main():
                         value=min(20, len(report.matches))
                     )
                 
-                # Aplica filtros
-                filtered_matches = [
-                    match for match in report.matches
-                    if match.match_type.value in match_type_filter
-                    and match.confidence >= min_confidence
-                ][:max_results]
+                # Aplica filtros (MatchResult criados apenas para as linhas exibidas)
+                filtered_matches = report.matches.filter(match_type_filter, min_confidence)[:max_results]
                 
                 # Exibe correspondências
                 for i, match in enumerate(filtered_matches):
@@ -698,23 +802,22 @@ def main():
             
             if report.matches:
                 # Filtra apenas correspondências de alta qualidade
-                high_quality_matches = [
-                    match for match in report.matches
-                    if match.match_type in [MatchType.EXACT, MatchType.HIGH_SIMILARITY]
-                ]
+                high_quality_matches = report.matches.filter(
+                    [MatchType.EXACT, MatchType.HIGH_SIMILARITY]
+                ).to_dataframe()
                 
-                if high_quality_matches:
-                    mapping_data = []
-                    for match in high_quality_matches:
-                        mapping_data.append({
-                            'Sistema Origem (Protheus)': match.source_value,
-                            'Sistema Destino (TASY)': match.target_value,
-                            'Tipo': match.match_type.value,
-                            'Score': f"{match.similarity_score:.3f}",
-                            'Confiança': f"{match.confidence:.3f}",
-                            'Status': '✅ Aprovado' if match.match_type == MatchType.EXACT else '🔍 Revisar',
-                            'Recomendação': match.recommendation
-                        })
+                if not high_quality_matches.empty:
+                    mapping_data = {
+                        'Sistema Origem (Protheus)': high_quality_matches['source_value'],
+                        'Sistema Destino (TASY)': high_quality_matches['target_value'],
+                        'Tipo': high_quality_matches['match_type'],
+                        'Score': high_quality_matches['similarity_score'].map('{:.3f}'.format),
+                        'Confiança': high_quality_matches['confidence'].map('{:.3f}'.format),
+                        'Status': np.where(
+                            high_quality_matches['match_type'] == MatchType.EXACT.value, '✅ Aprovado', '🔍 Revisar'
+                        ),
+                        'Recomendação': high_quality_matches['recommendation']
+                    }
                     
                     df_mapping = pd.DataFrame(mapping_data)
                     st.dataframe(df_mapping, use_container_width=True)
@@ -7,8 +7,6 @@ from plotly.subplots import make_subplots
 import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime
-import re
-import unicodedata
 from typing import List, Dict, Tuple, Any, Optional
 import json
 import pickle
@@ -20,6 +18,11 @@ from textdistance import levenshtein, jaro_winkler
 import warnings
 warnings.filterwarnings('ignore')
 
+from tfidf_index import TfidfCorpusIndex
+from text_normalization import MAPPING_PROFILE, normalize_list, normalize_value
+from disk_cache import default_cache
+from workbook_session import open_session
+
 # Configuração da página
 st.set_page_config(
     page_title="Sistema de Mapeamento de Colunas - Versão Avançada",
@@ -322,22 +325,12 @@ class CellComparator:
             'medium': 0.5,
             'low': 0.2
         }
+        # Índice TF-IDF ajustado uma vez sobre as duas colunas comparadas
+        self.tfidf_index = TfidfCorpusIndex(analyzer='char', ngram_range=(1, 3))
     
     def normalize_text(self, text: str) -> str:
         """Normaliza texto para comparação"""
-        if pd.isna(text) or text is None:
-            return ""
-        
-        text = str(text).lower().strip()
-        # Remove acentos
-        text = unicodedata.normalize('NFD', text)
-        text = ''.join(char for char in text if unicodedata.category(char) != 'Mn')
-        # Remove caracteres especiais
-        text = re.sub(r'[^\w\s]', '', text)
-        # Remove espaços extras
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text
+        return normalize_value(text, MAPPING_PROFILE)
     
     def calculate_similarity(self, cell1: Any, cell2: Any) -> Dict[str, float]:
         """Calcula múltiplas métricas de similaridade entre duas células"""
@@ -374,7 +367,9 @@ class CellComparator:
         similarities['jaro_winkler'] = jaro_winkler(str1, str2)
         
         # Cosine similarity (para textos)
-        if len(str1) > 0 and len(str2) > 0:
+        if len(str1) > 0 and len(str2) > 0 and self.tfidf_index.is_fitted:
+            similarities['cosine'] = self.tfidf_index.similarity(str1, str2)
+        elif len(str1) > 0 and len(str2) > 0:
             try:
                 vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(1, 3))
                 tfidf_matrix = vectorizer.fit_transform([str1, str2])
@@ -429,6 +424,11 @@ class CellComparator:
         col1_extended = col1.reindex(range(max_len))
         col2_extended = col2.reindex(range(max_len))
         
+        # Ajusta o TF-IDF uma única vez sobre as duas colunas
+        self.tfidf_index.fit(
+            normalize_list(list(col1_extended) + list(col2_extended), MAPPING_PROFILE)
+        )
+        
         total_similarity = 0.0
         
         for i in range(max_len):
@@ -508,8 +508,8 @@ class AdvancedDataAnalyzer:
     def analyze_excel_file(self, file) -> Dict:
         """Analisa arquivo Excel e retorna informações detalhadas"""
         try:
-            # Lê todas as abas
-            excel_data = pd.read_excel(file, sheet_name=None)
+            # Todas as abas, como visões da sessão compartilhada do arquivo
+            excel_data = open_session(file, default_cache()).frames()
             
             analysis = {
                 'sheets': {},
@@ -1016,6 +1016,17 @@ def show_comparacao_tab(workflow: MappingWorkflow, analyzer: AdvancedDataAnalyze
                     help="Algoritmo principal para cálculo de similaridade"
                 )
             
+            # Critérios que exigem nova comparação (a similaridade mínima é só um filtro)
+            run_criteria = {
+                'file': (uploaded_file.name, uploaded_file.size),
+                'source_sheet': source_sheet,
+                'compare_sheet': compare_sheet,
+                'source_compare_columns': source_compare_columns,
+                'compare_compare_columns': compare_compare_columns,
+                'max_rows': max_rows,
+                'algorithm_weight': algorithm_weight
+            }
+            
             # Botão para executar comparação
             if st.button("🚀 Executar Comparação de Colunas", type="primary"):
                 
@@ -1117,13 +1128,8 @@ def show_comparacao_tab(workflow: MappingWorkflow, analyzer: AdvancedDataAnalyze
                         # Salva resultados
                         workflow.update_workflow_data('cell_comparisons', comparison_results)
                         workflow.update_workflow_data('comparison_criteria', {
-                            'source_sheet': source_sheet,
-                            'compare_sheet': compare_sheet,
-                            'source_compare_columns': source_compare_columns,
-                            'compare_compare_columns': compare_compare_columns,
-                            'min_similarity': min_similarity / 100,
-                            'max_rows': max_rows,
-                            'algorithm_weight': algorithm_weight
+                            **run_criteria,
+                            'min_similarity': min_similarity / 100
                         })
                         
                         st.success("✅ Comparação executada com sucesso!")
@@ -1131,6 +1137,13 @@ def show_comparacao_tab(workflow: MappingWorkflow, analyzer: AdvancedDataAnalyze
                     except Exception as e:
                         st.error(f"❌ Erro na comparação: {str(e)}")
                         return
+            
+            # Resultados da última comparação continuam visíveis entre interações: as
+            # similaridades por célula ficam no workflow e a similaridade mínima só refiltra
+            criteria = workflow_data.get('comparison_criteria') or {}
+            if criteria and all(criteria.get(key) == value for key, value in run_criteria.items()):
+                comparison_results = workflow_data['cell_comparisons']
+                criteria['min_similarity'] = min_similarity / 100
                 
                 # Exibe resultados
                 st.markdown("## 📊 Resultados da Comparação de Colunas")
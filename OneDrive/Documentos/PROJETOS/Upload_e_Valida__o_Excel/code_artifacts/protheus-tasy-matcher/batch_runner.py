@@ -0,0 +1,453 @@
+"""
+Execução em lote (linha de comando) do motor de comparação
+Lê as planilhas, roda o EnhancedComparisonEngine com a configuração JSON informada e grava
+os resultados (CSV, XLSX ou Parquet) à medida que os blocos de origens terminam, com
+progresso no stderr e códigos de saída próprios para agendamentos (cron)
+
+Exemplos:
+    python batch_runner.py --source protheus.xlsx --source-sheet Protheus --source-column Descricao \\
+        --target tasy.xlsx --target-sheet "De Para" --target-column "Descrição" -o resultados.csv
+    
+    python batch_runner.py --workbook arquivo.xlsx --mapping mapeamentos.json \\
+        --config motor.json --workers 4 -o resultados.parquet
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from disk_cache import DEFAULT_CACHE_DIR
+
+# Códigos de saída
+EXIT_OK = 0
+EXIT_FAILURE = 1          # erro durante a comparação ou a gravação
+EXIT_USAGE = 2            # argumentos ou configuração inválidos (mesmo código do argparse)
+EXIT_INPUT = 3            # arquivo, aba ou coluna de entrada não encontrados
+EXIT_NO_MATCHES = 4       # nenhuma correspondência (apenas com --fail-on-empty)
+
+# Linhas por bloco gravado no arquivo de saída
+WRITE_CHUNK_ROWS = 50000
+
+# Limite de linhas de uma aba do Excel (cabeçalho incluído)
+XLSX_MAX_ROWS = 1048576
+
+OUTPUT_FORMATS = ('.csv', '.xlsx', '.parquet')
+
+
+class InputError(Exception):
+    """Arquivo, aba ou coluna de entrada inexistente"""
+
+
+class ResultWriter(ABC):
+    """Gravação incremental do arquivo de resultados (grava em `<saida>.partial` e renomeia no fim)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.temp_path = path + '.partial'
+        self.rows = 0
+    
+    @abstractmethod
+    def write(self, frame: pd.DataFrame):
+        """Acrescenta um bloco de linhas"""
+    
+    def _finish(self):
+        """Fecha o arquivo temporário"""
+    
+    def close(self):
+        """Conclui a gravação e publica o arquivo final"""
+        self._finish()
+        os.replace(self.temp_path, self.path)
+    
+    def abort(self):
+        """Descarta o arquivo parcial"""
+        try:
+            self._finish()
+        except Exception:
+            pass
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+class CsvResultWriter(ResultWriter):
+    """CSV em UTF-8 com BOM (abre corretamente no Excel)"""
+    
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._started = False
+    
+    def write(self, frame: pd.DataFrame):
+        first = not self._started
+        frame.to_csv(self.temp_path, mode='w' if first else 'a', header=first, index=False,
+                     encoding='utf-8-sig' if first else 'utf-8')
+        self._started = True
+        self.rows += len(frame)
+
+
+class XlsxResultWriter(ResultWriter):
+    """XLSX em modo somente escrita do openpyxl (linhas vão direto para o disco)"""
+    
+    def __init__(self, path: str):
+        super().__init__(path)
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+        self._columns: List[str] = []
+    
+    def _new_sheet(self):
+        count = len(self._workbook.worksheets)
+        self._sheet = self._workbook.create_sheet('Correspondências' if count == 0 else f'Correspondências {count + 1}')
+        self._sheet.append(self._columns)
+        self._sheet_rows = 1
+    
+    def write(self, frame: pd.DataFrame):
+        if self._sheet is None:
+            self._columns = [str(column) for column in frame.columns]
+            self._new_sheet()
+        for row in frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None):
+            if self._sheet_rows >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self._sheet.append(row)
+            self._sheet_rows += 1
+        self.rows += len(frame)
+    
+    def _finish(self):
+        if self._workbook is not None:
+            if self._sheet is None:
+                self._workbook.create_sheet('Correspondências')
+            self._workbook.save(self.temp_path)
+            self._workbook = None
+
+
+class ParquetResultWriter(ResultWriter):
+    """Parquet por grupos de linhas (requer pyarrow); colunas textuais gravadas como string"""
+    
+    def __init__(self, path: str):
+        super().__init__(path)
+        import pyarrow
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._writer = None
+    
+    def write(self, frame: pd.DataFrame):
+        # Colunas object do Excel misturam tipos; o Parquet exige um tipo por coluna
+        # (string também em blocos vazios, para o esquema valer nos blocos seguintes)
+        frame = frame.copy()
+        for column in frame.columns[frame.dtypes == object]:
+            frame[column] = frame[column].astype('string')
+        table = self._pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pa.parquet.ParquetWriter(self.temp_path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self.rows += len(frame)
+    
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def open_writer(path: str) -> ResultWriter:
+    """Escritor conforme a extensão do arquivo de saída"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return CsvResultWriter(path)
+    if extension == '.xlsx':
+        return XlsxResultWriter(path)
+    if extension == '.parquet':
+        return ParquetResultWriter(path)
+    raise ValueError(f"Formato de saída não suportado: {extension} (use {', '.join(OUTPUT_FORMATS)})")
+
+
+def read_table(path: str, sheet: Optional[str] = None, header_row: int = 0) -> pd.DataFrame:
+    """
+    Lê uma aba de planilha (ou um CSV)
+    
+    Args:
+        path: Arquivo .xlsx/.xls/.csv
+        sheet: Nome da aba (padrão: a primeira)
+        header_row: Linha do cabeçalho (base 0)
+    """
+    if not os.path.exists(path):
+        raise InputError(f"Arquivo não encontrado: {path}")
+    if path.lower().endswith('.csv'):
+        return pd.read_csv(path, header=header_row)
+    with pd.ExcelFile(path) as workbook:
+        if sheet is None:
+            sheet = workbook.sheet_names[0]
+        if sheet not in workbook.sheet_names:
+            raise InputError(f"Aba '{sheet}' não encontrada em {path} (abas: {', '.join(workbook.sheet_names)})")
+        return workbook.parse(sheet, header=header_row)
+
+
+def require_column(df: pd.DataFrame, column: str, where: str):
+    """Falha com InputError se a coluna não existe"""
+    if column not in df.columns:
+        raise InputError(f"Coluna '{column}' não encontrada em {where} (colunas: {', '.join(map(str, df.columns))})")
+
+
+def load_json(path: str) -> Dict[str, Any]:
+    """Lê um arquivo JSON de configuração"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_jobs(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Comparações a executar
+    
+    Com --mapping, uma por mapeamento habilitado (esquema de processar_dados_com_configuracao:
+    'abas' com linha de cabeçalho e função, 'mapeamentos' com abas, colunas e limiar 0-100);
+    senão, uma única comparação com as abas/colunas da linha de comando.
+    
+    Returns:
+        Lista de {'name', 'source', 'source_column', 'target', 'target_column', 'threshold',
+        'source_extras', 'target_extras'}
+    """
+    if args.mapping:
+        mapping_config = load_json(args.mapping)
+        sheets = {sheet['nome']: sheet for sheet in mapping_config.get('abas', []) if sheet.get('habilitada', True)}
+        tables: Dict[str, pd.DataFrame] = {}
+        
+        def table(name: str) -> pd.DataFrame:
+            if name not in sheets:
+                raise InputError(f"Aba '{name}' não está habilitada na configuração de mapeamentos")
+            if name not in tables:
+                tables[name] = read_table(args.workbook, name, sheets[name].get('linha_cabecalho', 0))
+            return tables[name]
+        
+        jobs = []
+        for mapping in mapping_config.get('mapeamentos', []):
+            if not mapping.get('habilitado', True):
+                continue
+            source, target = table(mapping['aba_origem']), table(mapping['aba_destino'])
+            require_column(source, mapping['coluna_origem'], f"aba '{mapping['aba_origem']}'")
+            require_column(target, mapping['coluna_destino'], f"aba '{mapping['aba_destino']}'")
+            jobs.append({
+                'name': mapping.get('nome', f"Mapeamento {len(jobs) + 1}"),
+                'source': source,
+                'source_column': mapping['coluna_origem'],
+                'target': target,
+                'target_column': mapping['coluna_destino'],
+                # Limiar da configuração em 0-100; o motor usa 0-1
+                'threshold': args.threshold if args.threshold is not None else mapping.get('limiar_similaridade', 80) / 100,
+                'source_extras': [c for c in mapping.get('colunas_extras_origem', []) if c in source.columns],
+                'target_extras': [c for c in mapping.get('colunas_extras_destino', []) if c in target.columns]
+            })
+        return jobs
+    
+    source = read_table(args.source, args.source_sheet, args.source_header_row)
+    target = read_table(args.target, args.target_sheet, args.target_header_row)
+    require_column(source, args.source_column, args.source)
+    require_column(target, args.target_column, args.target)
+    return [{
+        'name': f"{args.source_column} -> {args.target_column}",
+        'source': source,
+        'source_column': args.source_column,
+        'target': target,
+        'target_column': args.target_column,
+        'threshold': args.threshold if args.threshold is not None else 0.4,
+        'source_extras': [c for c in args.source_extra if c in source.columns],
+        'target_extras': [c for c in args.target_extra if c in target.columns]
+    }]
+
+
+def build_engine_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """Configuração do motor: arquivo --config (esquema de save_configuration) + opções da linha de comando"""
+    config = load_json(args.config) if args.config else {}
+    if args.workers:
+        config['enable_parallel'] = args.workers > 1
+        config['max_workers'] = args.workers
+    if args.backend:
+        config['parallel_backend'] = args.backend
+    if args.no_cache:
+        config['disk_cache_dir'] = None
+    elif args.cache_dir or 'disk_cache_dir' not in config:
+        config['disk_cache_dir'] = args.cache_dir or DEFAULT_CACHE_DIR
+    return config
+
+
+def _extras_lookup(frame: pd.DataFrame, key_column: str, extras: List[str], prefix: str) -> pd.DataFrame:
+    """Colunas extras da primeira linha com cada valor (as correspondências guardam o valor, não a linha)"""
+    lookup = frame.dropna(subset=[key_column]).drop_duplicates(subset=key_column).set_index(key_column)[extras]
+    lookup.columns = [f'{prefix}_{column}' for column in extras]
+    return lookup
+
+
+def run_job(engine, job: Dict[str, Any], writer: ResultWriter, quiet: bool = False) -> int:
+    """
+    Executa uma comparação gravando as correspondências à medida que os blocos de origens
+    terminam (no máximo WRITE_CHUNK_ROWS correspondências em memória)
+    
+    As linhas saem na ordem da busca (blocos de origens), não ordenadas por similaridade.
+    
+    Returns:
+        Quantidade de correspondências
+    """
+    from match_store import MatchStore
+    
+    source_values = job['source'][job['source_column']].dropna().tolist()
+    target_values = job['target'][job['target_column']].dropna().tolist()
+    pairs = len(source_values) * len(target_values)
+    log(f"[{job['name']}] {len(source_values):,} origens x {len(target_values):,} destinos "
+        f"({pairs:,} pares), limiar {job['threshold']:.2f}", quiet)
+    
+    lookups = []
+    if job['source_extras']:
+        lookups.append(('Valor Origem', _extras_lookup(job['source'], job['source_column'],
+                                                       job['source_extras'], 'origem')))
+    if job['target_extras']:
+        lookups.append(('Valor Destino', _extras_lookup(job['target'], job['target_column'],
+                                                        job['target_extras'], 'destino')))
+    
+    pending: List[Any] = []
+    written = 0
+    
+    def flush():
+        nonlocal pending, written
+        frame = MatchStore.from_matches(pending).to_export_frame()
+        frame.insert(0, 'Mapeamento', job['name'])
+        for key_column, lookup in lookups:
+            frame = frame.join(lookup.reindex(frame[key_column].to_numpy()).reset_index(drop=True))
+        writer.write(frame)
+        written += len(pending)
+        pending = []
+    
+    def collect(chunk):
+        pending.extend(chunk)
+        if len(pending) >= WRITE_CHUNK_ROWS:
+            flush()
+    
+    start_time = time.time()
+    
+    def show_progress(aggregator):
+        elapsed = time.time() - start_time
+        log(f"[{job['name']}] {aggregator.count:,} correspondências parciais ({written:,} gravadas), "
+            f"similaridade média {aggregator.average_similarity():.3f}, {elapsed:.1f}s", quiet)
+    
+    engine.find_best_matches(source_values, target_values, threshold=job['threshold'],
+                             progress_callback=show_progress, chunk_callback=collect)
+    # Restante do último bloco; sem correspondências, um bloco vazio ainda grava o cabeçalho
+    if pending or written == 0:
+        flush()
+    elapsed = time.time() - start_time
+    log(f"[{job['name']}] {written:,} correspondências em {elapsed:.2f}s "
+        f"({pairs / max(elapsed, 1e-9):,.0f} pares/s)", quiet)
+    return written
+
+
+def log(message: str, quiet: bool = False):
+    """Mensagem de progresso no stderr (stdout fica livre para o resumo)"""
+    if not quiet:
+        print(message, file=sys.stderr, flush=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="Comparação Protheus-TASY em lote (sem interface Streamlit)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"Códigos de saída: {EXIT_OK} sucesso, {EXIT_FAILURE} falha na execução, "
+               f"{EXIT_USAGE} uso/configuração inválidos, {EXIT_INPUT} entrada não encontrada, "
+               f"{EXIT_NO_MATCHES} nenhuma correspondência (com --fail-on-empty)"
+    )
+    selection = parser.add_argument_group("entrada por linha de comando")
+    selection.add_argument('--source', help="Planilha (ou CSV) de origem")
+    selection.add_argument('--source-sheet', help="Aba de origem (padrão: a primeira)")
+    selection.add_argument('--source-column', help="Coluna de origem")
+    selection.add_argument('--source-header-row', type=int, default=0, help="Linha do cabeçalho (base 0)")
+    selection.add_argument('--source-extra', action='append', default=[], help="Coluna extra de origem na saída (repetível)")
+    selection.add_argument('--target', help="Planilha (ou CSV) de destino")
+    selection.add_argument('--target-sheet', help="Aba de destino (padrão: a primeira)")
+    selection.add_argument('--target-column', help="Coluna de destino")
+    selection.add_argument('--target-header-row', type=int, default=0, help="Linha do cabeçalho (base 0)")
+    selection.add_argument('--target-extra', action='append', default=[], help="Coluna extra de destino na saída (repetível)")
+    
+    mapping = parser.add_argument_group("entrada por configuração de mapeamentos")
+    mapping.add_argument('--workbook', help="Planilha com as abas da configuração de mapeamentos")
+    mapping.add_argument('--mapping', help="JSON no esquema de processar_dados_com_configuracao ('abas', 'mapeamentos')")
+    
+    parser.add_argument('--config', help="JSON de configuração do motor (esquema de save_configuration)")
+    parser.add_argument('--threshold', type=float, help="Limiar de similaridade 0-1 (substitui o da configuração)")
+    parser.add_argument('--workers', type=int, help="Processos/threads de trabalho (1 = sem paralelismo)")
+    parser.add_argument('--backend', choices=('process', 'thread'), help="Backend paralelo")
+    parser.add_argument('--cache-dir', help=f"Diretório do cache em disco (padrão: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true', help="Desativa o cache em disco")
+    parser.add_argument('-o', '--output', required=True, help=f"Arquivo de saída ({', '.join(OUTPUT_FORMATS)})")
+    parser.add_argument('--fail-on-empty', action='store_true', help=f"Sai com {EXIT_NO_MATCHES} se não houver correspondências")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Sem mensagens de progresso")
+    
+    args = parser.parse_args(argv)
+    if args.mapping:
+        if not args.workbook:
+            parser.error("--mapping requer --workbook")
+    elif not all([args.source, args.source_column, args.target, args.target_column]):
+        parser.error("informe --source/--source-column/--target/--target-column ou --workbook/--mapping")
+    if os.path.splitext(args.output)[1].lower() not in OUTPUT_FORMATS:
+        parser.error(f"formato de saída não suportado: {args.output} (use {', '.join(OUTPUT_FORMATS)})")
+    if args.threshold is not None and not 0.0 <= args.threshold <= 1.0:
+        parser.error("--threshold deve estar entre 0 e 1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada; retorna o código de saída"""
+    args = parse_args(argv)
+    
+    try:
+        engine_config = build_engine_config(args)
+        jobs = build_jobs(args)
+        writer = open_writer(args.output)
+    except InputError as e:
+        log(f"❌ {e}")
+        return EXIT_INPUT
+    except (OSError, ValueError, KeyError, ImportError) as e:
+        log(f"❌ Configuração inválida: {e!r}")
+        return EXIT_USAGE
+    
+    # Importação tardia: a validação dos argumentos não paga a carga do motor
+    from enhanced_comparison_engine import EnhancedComparisonEngine
+    
+    start_time = time.time()
+    total = 0
+    try:
+        engine = EnhancedComparisonEngine(engine_config)
+        for job in jobs:
+            total += run_job(engine, job, writer, args.quiet)
+        writer.close()
+    except KeyboardInterrupt:
+        writer.abort()
+        log("⚠️ Interrompido")
+        return EXIT_FAILURE
+    except Exception as e:
+        writer.abort()
+        log(f"❌ Falha na comparação: {e!r}")
+        return EXIT_FAILURE
+    
+    elapsed = time.time() - start_time
+    print(json.dumps({
+        'output': args.output,
+        'mappings': len(jobs),
+        'matches': total,
+        'seconds': round(elapsed, 3),
+        'statistics': {
+            key: value for key, value in engine.get_statistics().items()
+            if key in ('total_comparisons', 'candidate_pairs', 'pruned_pairs', 'dedup', 'disk_cache')
+        }
+    }, ensure_ascii=False, default=str))
+    
+    if total == 0 and args.fail_on_empty:
+        return EXIT_NO_MATCHES
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
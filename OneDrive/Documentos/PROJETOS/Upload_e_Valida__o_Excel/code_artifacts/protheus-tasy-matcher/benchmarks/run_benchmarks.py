@@ -0,0 +1,496 @@
+"""
+Benchmarks das rotinas de correspondência sobre catálogos sintéticos Protheus/Tasy
+
+Cada medição (rotina x tamanho x repetição) roda num processo separado: o pico de memória
+é o do processo e caches em memória (st.cache_data, caches do motor) não vazam entre
+medições. O resultado em JSON (tempo, pares/s, pico de RSS, recall e precisão contra o
+gabarito) serve para comparar revisões:
+
+    python benchmarks/run_benchmarks.py run --sizes 1000 10000 -o antes.json
+    python benchmarks/run_benchmarks.py run --sizes 1000 10000 -o depois.json
+    python benchmarks/run_benchmarks.py compare antes.json depois.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARK_DIR)
+for path in (PROJECT_DIR, BENCHMARK_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from synthetic_catalog import SyntheticCatalog, generate_catalog
+
+# Versão do formato do JSON de resultados
+RESULT_SCHEMA = 1
+
+# Marcador da linha de resultado na saída do processo de medição (o Streamlit em modo
+# "bare" e as bibliotecas podem escrever outras linhas)
+RESULT_MARKER = 'BENCHMARK_RESULT '
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Categorias do CellComparator aceitas como correspondência
+ACCEPTED_CATEGORIES = ('exact', 'high', 'medium')
+
+PACKAGES = ['numpy', 'pandas', 'rapidfuzz', 'scikit-learn', 'streamlit', 'openpyxl']
+
+
+def _rss_bytes(maxrss: int) -> int:
+    """ru_maxrss em bytes (kB no Linux, bytes no macOS)"""
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo em MB (None se indisponível)"""
+    try:
+        import resource
+        return _rss_bytes(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        # No Windows, peak_wset é o pico; nos demais só há o valor atual
+        return getattr(info, 'peak_wset', info.rss) / 2 ** 20
+    except ImportError:
+        return None
+
+
+def _score_predictions(catalog: SyntheticCatalog, predicted: List[Optional[int]]) -> Dict[str, Any]:
+    """
+    Recall e precisão de previsões por linha Tasy (índice Protheus aceito ou None)
+    
+    Recall: linhas com gabarito cuja previsão aceita é o item correto / linhas com gabarito.
+    Precisão: previsões aceitas corretas / previsões aceitas (linhas sem correspondente
+    no catálogo que recebem um item contam como erro).
+    """
+    accepted = sum(p is not None for p in predicted)
+    correct = sum(p is not None and p == t for p, t in zip(predicted, catalog.truth))
+    expected = catalog.matched_rows
+    return {
+        'recall': correct / expected if expected else None,
+        'precision': correct / accepted if accepted else None,
+        'accepted': accepted,
+        'correct': correct,
+        'expected': expected
+    }
+
+
+# ---------------------------------------------------------------------------
+# Rotinas medidas: cada uma recebe o catálogo e os parâmetros e devolve
+# (função a cronometrar, função que avalia o retorno contra o gabarito)
+# ---------------------------------------------------------------------------
+
+def _prepare_app_find_matches(catalog: SyntheticCatalog, params: Dict) -> Tuple[Callable, Callable]:
+    import app
+    
+    df_de_para = catalog.tasy
+    threshold = params['threshold']
+    positions = {code: i for i, code in enumerate(catalog.protheus['Codigo'])}
+    
+    def run():
+        return app.find_matches(catalog.protheus, df_de_para, threshold)
+    
+    def evaluate(results):
+        # Código encontrado e descrição confirmada, ou código sugerido pela descrição
+        confirmed = (results['Status_Codigo'] == 'OK') & (results['Revisao_Obrigatoria'] == 'NÃO')
+        codes = results['Codigo_Protheus'].where(confirmed, results['Codigo_Sugerido'])
+        return _score_predictions(catalog, [positions.get(code) for code in codes])
+    
+    return run, evaluate
+
+
+def _prepare_engine(catalog: SyntheticCatalog, params: Dict) -> Tuple[Callable, Callable]:
+    from enhanced_comparison_engine import EnhancedComparisonEngine
+    
+    engine = EnhancedComparisonEngine(params.get('engine_config') or None)
+    sources = catalog.tasy['Descricao_Tasy'].tolist()
+    targets = catalog.protheus['Descricao'].tolist()
+    positions = {description: i for i, description in enumerate(targets)}
+    
+    def run():
+        return engine.find_best_matches(sources, targets, threshold=params['engine_threshold'])
+    
+    def evaluate(matches):
+        best = {match.source_value: match.target_value for match in matches}
+        return _score_predictions(catalog, [positions.get(best.get(value)) for value in sources])
+    
+    return run, evaluate
+
+
+def _prepare_processar_dados(catalog: SyntheticCatalog, params: Dict) -> Tuple[Callable, Callable]:
+    import pandas as pd
+    import app_advanced
+    
+    # Planilha em memória (fora do tempo medido); a leitura faz parte da rotina
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        catalog.tasy.to_excel(writer, sheet_name='Tasy', index=False)
+        catalog.protheus.to_excel(writer, sheet_name='Protheus', index=False)
+    config = {
+        'abas': [
+            {'nome': 'Tasy', 'linha_cabecalho': 0, 'funcao': 'origem', 'habilitada': True},
+            {'nome': 'Protheus', 'linha_cabecalho': 0, 'funcao': 'destino', 'habilitada': True}
+        ],
+        'mapeamentos': [{
+            'nome': 'Descrição', 'habilitado': True,
+            'aba_origem': 'Tasy', 'coluna_origem': 'Descricao_Tasy',
+            'aba_destino': 'Protheus', 'coluna_destino': 'Descricao',
+            'normalizar_texto': False, 'limiar_similaridade': params['threshold']
+        }]
+    }
+    positions = {description: i for i, description in enumerate(catalog.protheus['Descricao'])}
+    
+    def run():
+        buffer.seek(0)
+        return app_advanced.processar_dados_com_configuracao(buffer, config)
+    
+    def evaluate(results):
+        best = dict(zip(results['valor_origem'], results['valor_destino'])) if len(results) else {}
+        return _score_predictions(
+            catalog, [positions.get(best.get(value)) for value in catalog.tasy['Descricao_Tasy']]
+        )
+    
+    return run, evaluate
+
+
+def _prepare_cell_comparator(catalog: SyntheticCatalog, params: Dict) -> Tuple[Callable, Callable]:
+    import pandas as pd
+    import app_mapping_interface
+    
+    # Colunas alinhadas: cada linha Tasy ao lado do item correto (ou de um item qualquer,
+    # para linhas sem correspondente, que devem ficar abaixo de 'medium')
+    protheus = catalog.protheus['Descricao'].tolist()
+    aligned = [protheus[t if t is not None else i % len(protheus)] for i, t in enumerate(catalog.truth)]
+    col1 = pd.Series(catalog.tasy['Descricao_Tasy'].tolist())
+    col2 = pd.Series(aligned)
+    comparator = app_mapping_interface.CellComparator()
+    
+    def run():
+        return comparator.compare_columns(col1, col2)
+    
+    def evaluate(results):
+        predicted = [
+            (t if t is not None else -1) if cell['category'] in ACCEPTED_CATEGORIES else None
+            for cell, t in zip(results['cell_comparisons'], catalog.truth)
+        ]
+        return _score_predictions(catalog, predicted)
+    
+    return run, evaluate
+
+
+def _cross_pairs(size: int) -> int:
+    return size * size
+
+
+TARGETS: Dict[str, Dict[str, Any]] = {
+    'app.find_matches': {
+        'prepare': _prepare_app_find_matches,
+        'pairs': _cross_pairs,
+        'max_pairs': 10 ** 9
+    },
+    'engine.find_best_matches': {
+        'prepare': _prepare_engine,
+        'pairs': _cross_pairs,
+        'max_pairs': 10 ** 9
+    },
+    'app_advanced.processar_dados_com_configuracao': {
+        'prepare': _prepare_processar_dados,
+        'pairs': _cross_pairs,
+        'max_pairs': 10 ** 8
+    },
+    'app_mapping_interface.CellComparator.compare_columns': {
+        'prepare': _prepare_cell_comparator,
+        # Comparação célula a célula: um par por linha
+        'pairs': lambda size: size,
+        'max_pairs': 10 ** 5
+    }
+}
+
+
+def measure(target: str, size: int, seed: int, params: Dict) -> Dict[str, Any]:
+    """
+    Executa uma medição no processo atual
+    
+    Geração dos dados e importação dos módulos ficam fora do tempo medido.
+    """
+    spec = TARGETS[target]
+    catalog = generate_catalog(size, seed=seed)
+    result = {'target': target, 'size': size, 'seed': seed}
+    try:
+        run, evaluate = spec['prepare'](catalog, params)
+    except ImportError as e:
+        # Dependência opcional ausente (ex.: seaborn nos aplicativos avançados)
+        result.update({'status': 'skipped', 'reason': f'{type(e).__name__}: {e}'})
+        return result
+    
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    output = run()
+    seconds = time.perf_counter() - start
+    pairs = spec['pairs'](size)
+    result.update({
+        'status': 'ok',
+        'seconds': seconds,
+        'pairs': pairs,
+        'pairs_per_second': pairs / seconds if seconds > 0 else None,
+        'rows_per_second': size / seconds if seconds > 0 else None,
+        'baseline_rss_mb': baseline,
+        'peak_rss_mb': peak_rss_mb()
+    })
+    result.update(evaluate(output))
+    return result
+
+
+def _run_worker(target: str, size: int, seed: int, params: Dict, timeout: Optional[float]) -> Dict[str, Any]:
+    """Executa uma medição num processo novo e lê o resultado da saída"""
+    command = [sys.executable, os.path.abspath(__file__), '_worker',
+               '--target', target, '--size', str(size), '--seed', str(seed),
+               '--params', json.dumps(params)]
+    try:
+        completed = subprocess.run(command, cwd=PROJECT_DIR, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'target': target, 'size': size, 'seed': seed, 'status': 'timeout', 'reason': f'> {timeout}s'}
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    tail = (completed.stderr or completed.stdout).strip().splitlines()[-5:]
+    return {'target': target, 'size': size, 'seed': seed, 'status': 'error',
+            'reason': ' | '.join(tail) or f'código de saída {completed.returncode}'}
+
+
+def _summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Junta as repetições de uma medição (mediana do tempo, maior pico de memória)"""
+    ok = [run for run in runs if run.get('status') == 'ok']
+    if not ok:
+        return runs[0]
+    summary = dict(ok[0])
+    timings = [run['seconds'] for run in ok]
+    seconds = statistics.median(timings)
+    summary.update({
+        'seconds': seconds,
+        'seconds_min': min(timings),
+        'seconds_all': timings,
+        'repeat': len(ok),
+        'pairs_per_second': summary['pairs'] / seconds if seconds > 0 else None,
+        'rows_per_second': summary['size'] / seconds if seconds > 0 else None,
+        'peak_rss_mb': max((run['peak_rss_mb'] for run in ok if run['peak_rss_mb'] is not None), default=None)
+    })
+    return summary
+
+
+def _git_revision() -> Dict[str, Any]:
+    """Revisão do repositório (None fora de um checkout git)"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=PROJECT_DIR, capture_output=True, text=True, timeout=30)
+    try:
+        revision = git('rev-parse', 'HEAD')
+        if revision.returncode != 0:
+            return {'revision': None, 'dirty': None}
+        status = git('status', '--porcelain', '--untracked-files=no', '--', '.')
+        return {'revision': revision.stdout.strip(), 'dirty': bool(status.stdout.strip())}
+    except (OSError, subprocess.SubprocessError):
+        return {'revision': None, 'dirty': None}
+
+
+def _metadata() -> Dict[str, Any]:
+    from importlib import metadata as importlib_metadata
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = importlib_metadata.version(package)
+        except importlib_metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        **_git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions
+    }
+
+
+def _format_number(value: Optional[float], pattern: str) -> str:
+    return '-' if value is None else format(value, pattern)
+
+
+def print_results(results: List[Dict[str, Any]], header: bool = True):
+    """Tabela resumida dos resultados"""
+    if header:
+        print(f"{'rotina':<54} {'linhas':>7} {'tempo (s)':>10} {'pares/s':>12} {'RSS (MB)':>9} {'recall':>7} {'precisão':>8}")
+    for result in results:
+        if result.get('status') != 'ok':
+            print(f"{result['target']:<54} {result['size']:>7} {result['status']}: {result.get('reason', '')}")
+            continue
+        print(f"{result['target']:<54} {result['size']:>7} "
+              f"{result['seconds']:>10.3f} {_format_number(result['pairs_per_second'], '>12,.0f')} "
+              f"{_format_number(result['peak_rss_mb'], '>9.0f')} "
+              f"{_format_number(result['recall'], '>7.3f')} {_format_number(result['precision'], '>8.3f')}")
+
+
+def command_run(args) -> int:
+    targets = args.targets or list(TARGETS)
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        print(f"Rotinas desconhecidas: {', '.join(unknown)} (disponíveis: {', '.join(TARGETS)})", file=sys.stderr)
+        return 2
+    engine_config = None
+    if args.engine_config:
+        with open(args.engine_config, encoding='utf-8') as file:
+            engine_config = json.load(file)
+    params = {'threshold': args.threshold, 'engine_threshold': args.engine_threshold,
+              'engine_config': engine_config}
+    
+    results = []
+    if not args.quiet:
+        print_results([])
+    for target in targets:
+        spec = TARGETS[target]
+        for size in args.sizes:
+            pairs = spec['pairs'](size)
+            limit = args.max_pairs if args.max_pairs is not None else spec['max_pairs']
+            if pairs > limit and not args.force:
+                results.append({'target': target, 'size': size, 'seed': args.seed, 'status': 'skipped',
+                                'reason': f'{pairs:,} pares > limite {limit:,} (use --force ou --max-pairs)'})
+                continue
+            runs = []
+            for _ in range(args.repeat):
+                runs.append(_run_worker(target, size, args.seed, params, args.timeout))
+                if runs[-1].get('status') != 'ok':
+                    break
+            results.append(_summarize(runs))
+            if not args.quiet:
+                print_results(results[-1:], header=False)
+            if results[-1].get('status') == 'skipped':
+                # Sem a dependência, os demais tamanhos também seriam pulados
+                for remaining in args.sizes[args.sizes.index(size) + 1:]:
+                    results.append({**results[-1], 'size': remaining})
+                break
+    
+    report = {
+        'schema': RESULT_SCHEMA,
+        'metadata': _metadata(),
+        'parameters': {'sizes': args.sizes, 'seed': args.seed, 'repeat': args.repeat, **params},
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+    if not args.quiet:
+        print()
+        print_results(results)
+    return 0 if all(result.get('status') in ('ok', 'skipped') for result in results) else 1
+
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any], time_tolerance: float,
+                    recall_tolerance: float) -> Tuple[List[str], List[str]]:
+    """
+    Compara dois relatórios
+    
+    Returns:
+        (linhas da tabela, regressões: tempo acima de old * (1 + time_tolerance) ou recall
+        abaixo de old - recall_tolerance)
+    """
+    previous = {(r['target'], r['size']): r for r in old['results'] if r.get('status') == 'ok'}
+    lines, regressions = [], []
+    for result in new['results']:
+        key = (result['target'], result['size'])
+        before = previous.get(key)
+        if result.get('status') != 'ok' or before is None:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] > 0 else float('inf')
+        recall_delta = None
+        if result.get('recall') is not None and before.get('recall') is not None:
+            recall_delta = result['recall'] - before['recall']
+        flags = []
+        if ratio > 1 + time_tolerance:
+            flags.append('tempo')
+        if recall_delta is not None and recall_delta < -recall_tolerance:
+            flags.append('recall')
+        line = (f"{key[0]:<54} {key[1]:>7} {before['seconds']:>9.3f} -> {result['seconds']:>9.3f} "
+                f"({ratio:>5.2f}x) recall {_format_number(recall_delta, '+.3f'):>7}")
+        if flags:
+            line += f"  REGRESSÃO ({', '.join(flags)})"
+            regressions.append(line)
+        lines.append(line)
+    return lines, regressions
+
+
+def command_compare(args) -> int:
+    with open(args.old, encoding='utf-8') as file:
+        old = json.load(file)
+    with open(args.new, encoding='utf-8') as file:
+        new = json.load(file)
+    print(f"antes:  {old['metadata'].get('revision')} ({old['metadata'].get('timestamp')})")
+    print(f"depois: {new['metadata'].get('revision')} ({new['metadata'].get('timestamp')})")
+    lines, regressions = compare_reports(old, new, args.time_tolerance, args.recall_tolerance)
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) encontrada(s)")
+        return 1
+    return 0
+
+
+def command_worker(args) -> int:
+    result = measure(args.target, args.size, args.seed, json.loads(args.params))
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Benchmarks de correspondência Protheus/Tasy com dados sintéticos')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run = commands.add_parser('run', help='Executa as medições')
+    run.add_argument('--targets', nargs='+', metavar='ROTINA', help=f"Rotinas (padrão: todas): {', '.join(TARGETS)}")
+    run.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='Linhas de cada catálogo')
+    run.add_argument('--seed', type=int, default=42, help='Semente dos dados sintéticos')
+    run.add_argument('--repeat', type=int, default=1, help='Repetições por medição (vale a mediana)')
+    run.add_argument('--threshold', type=float, default=80, help='Limiar (0-100) de app.py e app_advanced.py')
+    run.add_argument('--engine-threshold', type=float, default=0.4, help='Limiar (0-1) do motor aprimorado')
+    run.add_argument('--engine-config', help='JSON com a configuração do motor aprimorado')
+    run.add_argument('--max-pairs', type=int, help='Limite de pares por medição (padrão: limite de cada rotina)')
+    run.add_argument('--force', action='store_true', help='Ignora os limites de pares')
+    run.add_argument('--timeout', type=float, default=3600, help='Tempo máximo de cada medição em segundos')
+    run.add_argument('-o', '--output', help='Arquivo JSON de resultados')
+    run.add_argument('-q', '--quiet', action='store_true', help='Não imprime a tabela')
+    run.set_defaults(handler=command_run)
+    
+    compare = commands.add_parser('compare', help='Compara dois arquivos de resultados')
+    compare.add_argument('old', help='Resultados de referência')
+    compare.add_argument('new', help='Resultados novos')
+    compare.add_argument('--time-tolerance', type=float, default=0.10,
+                         help='Aumento relativo de tempo tolerado (padrão: 0.10)')
+    compare.add_argument('--recall-tolerance', type=float, default=0.01,
+                         help='Queda absoluta de recall tolerada (padrão: 0.01)')
+    compare.set_defaults(handler=command_compare)
+    
+    worker = commands.add_parser('_worker')
+    worker.add_argument('--target', required=True, choices=list(TARGETS))
+    worker.add_argument('--size', type=int, required=True)
+    worker.add_argument('--seed', type=int, required=True)
+    worker.add_argument('--params', required=True)
+    worker.set_defaults(handler=command_worker)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Catálogos sintéticos Protheus/Tasy com gabarito conhecido
+O catálogo Protheus segue o padrão do ERP (maiúsculas, sem acentos, abreviações, unidades
+compactas); cada linha Tasy deriva de um item Protheus com variações realistas (acentos,
+palavras por extenso, unidades separadas, ordem trocada, erros de digitação) ou é um item
+sem correspondente no catálogo
+"""
+
+import random
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pandas as pd
+
+# Produtos (forma Tasy, com acentos) e atributos compatíveis com cada família
+PRODUCTS = {
+    'luvas': ['Luva de procedimento', 'Luva cirúrgica estéril', 'Luva nitrílica', 'Luva de vinil'],
+    'seringas': ['Seringa descartável', 'Seringa hipodérmica', 'Seringa para insulina'],
+    'agulhas': ['Agulha hipodérmica', 'Agulha para raquianestesia', 'Agulha de punção'],
+    'cateteres': ['Cateter intravenoso periférico', 'Cateter venoso central', 'Sonda uretral',
+                  'Sonda nasogástrica', 'Sonda de aspiração traqueal'],
+    'curativos': ['Gaze estéril', 'Compressa cirúrgica', 'Atadura crepe', 'Esparadrapo impermeável',
+                  'Fita microporosa', 'Curativo transparente'],
+    'solucoes': ['Cloreto de sódio', 'Soro glicosado', 'Ringer com lactato', 'Água para injeção',
+                 'Álcool etílico', 'Clorexidina degermante', 'Povidona-iodo tópica'],
+    'medicamentos': ['Dipirona sódica', 'Paracetamol', 'Amoxicilina', 'Ceftriaxona sódica',
+                     'Omeprazol', 'Ondansetrona', 'Heparina sódica', 'Cetoprofeno'],
+    'epi': ['Máscara cirúrgica tripla', 'Máscara respiradora', 'Avental descartável',
+            'Touca descartável', 'Propé descartável', 'Óculos de proteção'],
+    'equipos': ['Equipo macrogotas', 'Equipo microgotas', 'Equipo para bomba de infusão',
+                'Extensor para infusão', 'Torneira de três vias'],
+    'laboratorio': ['Tubo de coleta a vácuo', 'Frasco coletor universal', 'Lâmina para microscopia',
+                    'Ponteira para pipeta', 'Swab estéril']
+}
+
+SIZES = {
+    'luvas': ['P', 'M', 'G', 'nº 7,0', 'nº 7,5', 'nº 8,0'],
+    'seringas': ['1 ml', '3 ml', '5 ml', '10 ml', '20 ml'],
+    'agulhas': ['25 x 7', '25 x 8', '13 x 4,5', '40 x 12', '30 x 7'],
+    'cateteres': ['14 G', '18 G', '20 G', '22 G', '24 G', 'nº 8', 'nº 12', 'nº 16'],
+    'curativos': ['7,5 x 7,5 cm', '10 x 10 cm', '10 cm x 4,5 m', '15 cm x 1,8 m', '2,5 cm x 10 m'],
+    'solucoes': ['0,9% 100 ml', '0,9% 250 ml', '0,9% 500 ml', '5% 500 ml', '70% 1 litro', '2% 100 ml'],
+    'medicamentos': ['500 mg', '1 g', '750 mg', '40 mg', '4 mg', '5.000 UI/ml', '100 mg'],
+    'epi': ['tamanho único', 'P', 'M', 'G', 'PFF2'],
+    'equipos': ['com injetor lateral', 'fotossensível', '20 cm', '120 cm', 'com filtro'],
+    'laboratorio': ['4 ml', '5 ml', '80 ml', '26 x 76 mm', '200 µl']
+}
+
+MATERIALS = {
+    'luvas': ['látex', 'nitrila', 'vinil', 'sem pó', 'com pó'],
+    'seringas': ['bico luer lock', 'bico slip', 'sem agulha', 'com agulha'],
+    'agulhas': ['bisel trifacetado', 'aço inoxidável', 'com dispositivo de segurança'],
+    'cateteres': ['poliuretano', 'silicone', 'PVC', 'teflon'],
+    'curativos': ['algodão', 'não tecido', 'hipoalergênico', 'poliuretano'],
+    'solucoes': ['bolsa', 'frasco', 'ampola', 'sistema fechado'],
+    'medicamentos': ['injetável', 'comprimido', 'solução oral', 'pó para solução'],
+    'epi': ['tecido não tecido', 'polipropileno', 'elástico', 'antiembaçante'],
+    'equipos': ['PVC', 'livre de DEHP', 'estéril'],
+    'laboratorio': ['polipropileno', 'vidro', 'estéril', 'com EDTA', 'com gel separador']
+}
+
+PACKAGES = ['caixa com 100 unidades', 'caixa com 50 unidades', 'pacote com 10 unidades',
+            'unidade', 'frasco', 'ampola', 'envelope', 'rolo', 'par', 'caixa com 25 unidades']
+
+# Abreviações do padrão Protheus (forma por extenso -> forma abreviada)
+ABBREVIATIONS = {
+    'caixa com': 'CX C/', 'pacote com': 'PCT C/', 'unidades': 'UN', 'unidade': 'UN', 'com': 'C/',
+    'sem': 'S/', 'descartável': 'DESC', 'estéril': 'EST', 'hipodérmica': 'HIPOD', 'cirúrgica': 'CIRURG',
+    'procedimento': 'PROCED', 'injetável': 'INJ', 'comprimido': 'COMP', 'solução': 'SOL',
+    'intravenoso': 'IV', 'periférico': 'PERIF', 'número': 'N', 'nº': 'N', 'tamanho': 'TAM',
+    'frasco': 'FR', 'ampola': 'AMP', 'envelope': 'ENV', 'litro': 'L', 'polipropileno': 'PP',
+    'tecido não tecido': 'TNT', 'não tecido': 'TNT', 'dispositivo de segurança': 'DISP SEG'
+}
+
+# Itens exclusivos do Tasy (sem correspondente no catálogo Protheus)
+TASY_ONLY = ['Caneta esferográfica azul', 'Grampeador de mesa 26/6', 'Papel sulfite A4',
+             'Pasta suspensa', 'Copo descartável 200 ml', 'Guardanapo de papel', 'Pilha alcalina AA',
+             'Lâmpada LED 9 W', 'Saco de lixo infectante 100 litros', 'Detergente neutro 5 litros',
+             'Etiqueta adesiva', 'Toner para impressora', 'Fita crepe 18 mm', 'Envelope pardo']
+
+ACCENTS = str.maketrans('áàâãéêíóôõúüçÁÀÂÃÉÊÍÓÔÕÚÜÇµ', 'aaaaeeiooouucAAAAEEIOOOUUCU')
+
+
+@dataclass
+class SyntheticCatalog:
+    """Catálogo Protheus, linhas Tasy e gabarito (índice Protheus de cada linha Tasy ou None)"""
+    protheus: pd.DataFrame        # Codigo, Descricao
+    tasy: pd.DataFrame            # Codigo_Tasy, Descricao_Tasy
+    truth: List[Optional[int]]    # posição em `protheus` do item correto de cada linha Tasy
+    
+    @property
+    def matched_rows(self) -> int:
+        """Linhas Tasy que têm correspondente no catálogo"""
+        return sum(t is not None for t in self.truth)
+
+
+def _protheus_style(text: str) -> str:
+    """Forma ERP: abreviações, sem acentos, maiúsculas, unidades coladas ao número"""
+    lowered = text.lower()
+    # Só palavras ou expressões inteiras ('com' não altera 'compressa'), as mais longas antes
+    for full, short in sorted(ABBREVIATIONS.items(), key=lambda item: -len(item[0])):
+        lowered = re.sub(rf'\b{re.escape(full)}\b', short.lower(), lowered)
+    compact = lowered.translate(ACCENTS).upper()
+    compact = re.sub(r'(\d) (ML|MG|G|CM|MM|UI|L|M)\b', r'\1\2', compact)
+    return ' '.join(compact.replace(',', '.').split())
+
+
+def _typo(rng: random.Random, text: str) -> str:
+    """Um erro de digitação: troca, omissão, repetição ou substituição de um caractere"""
+    letters = [i for i, c in enumerate(text) if c.isalpha()]
+    if len(letters) < 4:
+        return text
+    i = rng.choice(letters[1:-1])
+    kind = rng.random()
+    if kind < 0.3:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    if kind < 0.55:
+        return text[:i] + text[i + 1:]
+    if kind < 0.8:
+        return text[:i] + text[i] + text[i:]
+    return text[:i] + rng.choice('aeiorstnlcm') + text[i + 1:]
+
+
+def _tasy_variant(rng: random.Random, base: str, typo_rate: float) -> str:
+    """Descrição Tasy derivada da forma por extenso do item"""
+    words = base.split(' ')
+    roll = rng.random()
+    if roll < 0.15 and len(words) > 3:
+        # Ordem trocada: atributo antes do produto
+        cut = rng.randint(2, len(words) - 1)
+        words = words[cut:] + words[:cut]
+    elif roll < 0.3:
+        # Forma parcialmente abreviada (como digitada no Tasy)
+        words = _protheus_style(' '.join(words)).lower().split(' ')
+    text = ' '.join(words)
+    if rng.random() < 0.3:
+        # Unidades sem espaço ou com ponto decimal
+        text = re.sub(r'(\d) (ml|mg)\b', r'\1\2', text).replace(',', '.')
+    if rng.random() < 0.2:
+        text = text.translate(ACCENTS)
+    while rng.random() < typo_rate:
+        text = _typo(rng, text)
+    case = rng.random()
+    if case < 0.4:
+        return text.capitalize()
+    if case < 0.7:
+        return text.title()
+    if case < 0.85:
+        return text.upper()
+    return text.lower()
+
+
+def generate_catalog(size: int, seed: int = 42, matched_fraction: float = 0.85,
+                     shared_code_fraction: float = 0.5, typo_rate: float = 0.35) -> SyntheticCatalog:
+    """
+    Gera um catálogo Protheus de `size` itens distintos e `size` linhas Tasy
+    
+    Args:
+        size: Itens no catálogo Protheus e linhas na aba Tasy
+        seed: Semente (mesma semente = mesmos dados)
+        matched_fraction: Fração das linhas Tasy derivadas de um item Protheus
+        shared_code_fraction: Fração das linhas correspondidas que reaproveitam o código
+            Protheus (as demais dependem da busca por descrição)
+        typo_rate: Probabilidade de cada erro de digitação adicional numa linha Tasy
+    
+    Returns:
+        SyntheticCatalog
+    """
+    rng = random.Random(seed)
+    families = list(PRODUCTS)
+    
+    items: List[str] = []
+    seen = set()
+    collisions = 0
+    while len(items) < size:
+        family = rng.choice(families)
+        parts = [rng.choice(PRODUCTS[family]), rng.choice(SIZES[family])]
+        if rng.random() < 0.7:
+            parts.append(rng.choice(MATERIALS[family]))
+        parts.append(rng.choice(PACKAGES))
+        if collisions > 50:
+            # Espaço de combinações esgotado: referência distingue os itens
+            parts.append(f'ref {rng.randint(1000, 99999)}')
+        full = ' '.join(parts)
+        erp = _protheus_style(full)
+        if erp in seen:
+            collisions += 1
+            continue
+        collisions = 0 if collisions <= 50 else collisions
+        seen.add(erp)
+        items.append(full)
+    
+    protheus_codes = [f'{100000 + i:07d}' for i in range(size)]
+    protheus = pd.DataFrame({'Codigo': protheus_codes, 'Descricao': [_protheus_style(item) for item in items]})
+    
+    codes, descriptions, truth = [], [], []
+    for row in range(size):
+        if rng.random() < matched_fraction:
+            target = rng.randrange(size)
+            descriptions.append(_tasy_variant(rng, items[target], typo_rate))
+            truth.append(target)
+            shared = rng.random() < shared_code_fraction
+            codes.append(protheus_codes[target].lstrip('0') if shared else f'T{900000 + row}')
+        else:
+            descriptions.append(_tasy_variant(rng, f'{rng.choice(TASY_ONLY)} lote {rng.randint(1, 999)}', typo_rate))
+            truth.append(None)
+            codes.append(f'T{900000 + row}')
+    
+    tasy = pd.DataFrame({'Codigo_Tasy': codes, 'Descricao_Tasy': descriptions})
+    return SyntheticCatalog(protheus=protheus, tasy=tasy, truth=truth)
+
+
+if __name__ == '__main__':
+    catalog = generate_catalog(12, seed=1)
+    for description, target in zip(catalog.tasy['Descricao_Tasy'], catalog.truth):
+        expected = catalog.protheus['Descricao'][target] if target is not None else '-'
+        print(f'{description!r:70} -> {expected}')
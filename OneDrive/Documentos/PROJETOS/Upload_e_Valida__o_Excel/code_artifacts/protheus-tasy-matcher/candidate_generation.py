@@ -0,0 +1,132 @@
+"""
+Geração de candidatos (blocking) para o motor de comparação
+Seleciona os top-k destinos plausíveis de cada origem antes da pontuação completa
+"""
+
+from typing import List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from tfidf_index import TfidfCorpusIndex
+
+
+class CandidateGenerator:
+    """
+    Índice invertido sobre os destinos para recuperar candidatos por origem
+    
+    Métodos disponíveis:
+        - 'tfidf': vizinhos mais próximos pelo coseno TF-IDF de n-gramas (índice do corpus)
+        - 'token': índice invertido de palavras, ordenado por tokens compartilhados
+        - 'qgram': filtro por contagem de q-gramas de caracteres compartilhados
+    
+    Em todos os métodos, pares com menos de `min_shared_grams` n-gramas/tokens
+    em comum são descartados e apenas os `top_k` melhores destinos são mantidos.
+    """
+    
+    METHODS = ('tfidf', 'token', 'qgram')
+    
+    def __init__(self, method: str = 'tfidf', top_k: int = 10, min_shared_grams: int = 1,
+                 qgram_size: int = 3, tfidf_index: Optional[TfidfCorpusIndex] = None):
+        """
+        Inicializa o gerador
+        
+        Args:
+            method: 'tfidf', 'token' ou 'qgram'
+            top_k: Número máximo de candidatos por origem
+            min_shared_grams: Mínimo de n-gramas/tokens compartilhados para um par ser candidato
+            qgram_size: Tamanho dos q-gramas do método 'qgram'
+            tfidf_index: Índice TF-IDF ajustado (obrigatório no método 'tfidf')
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Método de geração de candidatos inválido: {method}")
+        if method == 'tfidf' and (tfidf_index is None or not tfidf_index.is_fitted):
+            raise ValueError("O método 'tfidf' requer um índice TF-IDF ajustado")
+        
+        self.method = method
+        self.top_k = max(1, int(top_k))
+        self.min_shared_grams = max(1, int(min_shared_grams))
+        self.qgram_size = max(1, int(qgram_size))
+        self.tfidf_index = tfidf_index
+        self.vectorizer: Optional[CountVectorizer] = None
+        self._target_matrix: Optional[sparse.csr_matrix] = None
+        self._target_presence: Optional[sparse.csr_matrix] = None
+        self.n_targets = 0
+    
+    def _build_vectorizer(self) -> CountVectorizer:
+        """Vetorizador binário de tokens ou q-gramas"""
+        if self.method == 'token':
+            return CountVectorizer(analyzer=str.split, binary=True, lowercase=False)
+        return CountVectorizer(analyzer='char_wb', ngram_range=(self.qgram_size, self.qgram_size),
+                               binary=True, lowercase=False)
+    
+    def _features(self, texts: List[str]) -> sparse.csr_matrix:
+        """Matriz esparsa de características (textos x vocabulário)"""
+        if self.method == 'tfidf':
+            return self.tfidf_index.vectors(texts)
+        return self.vectorizer.transform(texts).tocsr()
+    
+    @staticmethod
+    def _presence(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Versão binária (0/1) de uma matriz esparsa"""
+        presence = matrix.copy()
+        presence.data = np.ones_like(presence.data, dtype=np.float64)
+        return presence
+    
+    def fit(self, target_texts: List[str]) -> 'CandidateGenerator':
+        """
+        Indexa os destinos
+        
+        Args:
+            target_texts: Textos de destino normalizados
+        
+        Returns:
+            O próprio gerador
+        """
+        self.n_targets = len(target_texts)
+        if self.method != 'tfidf':
+            self.vectorizer = self._build_vectorizer()
+            self.vectorizer.fit([t for t in target_texts if t] or ['_'])
+        
+        self._target_matrix = self._features(list(target_texts))
+        self._target_presence = self._presence(self._target_matrix)
+        return self
+    
+    def query(self, source_texts: List[str]) -> List[np.ndarray]:
+        """
+        Retorna os candidatos de cada origem
+        
+        Args:
+            source_texts: Textos de origem normalizados
+        
+        Returns:
+            Lista (uma entrada por origem) de índices de destino em ordem crescente
+        """
+        if self._target_matrix is None:
+            raise ValueError("Gerador de candidatos não ajustado")
+        if not source_texts:
+            return []
+        
+        source_matrix = self._features(list(source_texts))
+        shared = (self._presence(source_matrix) @ self._target_presence.T).tocsr()
+        shared.sort_indices()
+        if self.method == 'tfidf':
+            # Mesmo padrão de esparsidade de `shared` (pesos TF-IDF são positivos)
+            ranking = (source_matrix @ self._target_matrix.T).tocsr()
+            ranking.sort_indices()
+        else:
+            ranking = shared
+        
+        candidates = []
+        for row in range(len(source_texts)):
+            start, end = shared.indptr[row], shared.indptr[row + 1]
+            mask = shared.data[start:end] >= self.min_shared_grams
+            keep = shared.indices[start:end][mask]
+            if keep.size > self.top_k:
+                scores = ranking.data[start:end][mask]
+                # Ordenação estável: em empate vence o destino de menor índice
+                keep = keep[np.argsort(-scores, kind='stable')[:self.top_k]]
+            candidates.append(np.sort(keep).astype(np.intp))
+        
+        return candidates
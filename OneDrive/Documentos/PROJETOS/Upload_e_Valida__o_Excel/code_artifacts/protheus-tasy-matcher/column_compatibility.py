@@ -0,0 +1,257 @@
+"""
+Compatibilidade entre duas colunas (antes de uma execução completa de correspondência)
+A sobreposição exata de valores é calculada por hash sobre as colunas inteiras; colunas de
+texto têm a similaridade das linhas sem correspondente exato estimada por uma amostra
+aleatória estratificada (um único cdist contra os valores distintos do destino), com
+intervalo de confiança; colunas numéricas e de datas comparam distribuições (quantis,
+distância de Kolmogorov-Smirnov e sobreposição das faixas)
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from text_normalization import ADVANCED_PROFILE, normalize_series
+
+# Linhas de origem (sem correspondente exato) amostradas para a similaridade textual
+TEXT_SAMPLE_SIZE = 400
+# Estratos da amostra: faixas de comprimento do texto normalizado (quantis)
+TEXT_STRATA = 4
+# Valores distintos do destino usados no cdist (acima disso, amostra aleatória)
+MAX_TARGET_VALUES = 20000
+# Quantis do resumo das distribuições numéricas
+QUANTILE_POINTS = 101
+# z do intervalo de confiança (95%)
+CONFIDENCE_Z = 1.96
+
+# Pesos do score numérico: valores em comum, forma da distribuição, faixa
+NUMERIC_WEIGHTS = (0.4, 0.4, 0.2)
+
+
+@dataclass
+class CompatibilityResult:
+    """Score (0-100), intervalo de confiança e medidas que o compõem"""
+    kind: str                                   # 'text', 'numeric', 'datetime' ou 'empty'
+    score: float
+    interval: Tuple[float, float]
+    source_dtype: str = ''
+    target_dtype: str = ''
+    source_distinct: int = 0
+    target_distinct: int = 0
+    overlap: Dict[str, float] = field(default_factory=dict)
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+def _texts(values: pd.Series) -> pd.Series:
+    """Valores como texto (floats inteiros sem '.0', para casar com colunas de inteiros)"""
+    if pd.api.types.is_float_dtype(values):
+        integers = (values % 1 == 0) & (values.abs() < 2 ** 53)
+        texts = values.astype(str)
+        texts[integers] = values[integers].astype(np.int64).astype(str)
+        return texts
+    return values.astype(str)
+
+
+def _overlap(source_hashes: np.ndarray, target_hashes: np.ndarray) -> Tuple[Dict[str, float], np.ndarray]:
+    """
+    Sobreposição exata entre os conjuntos de valores (por hash)
+    
+    Returns:
+        ({jaccard, containment, source_row_coverage}, máscara das linhas de origem cujo
+        valor existe no destino)
+    """
+    source_unique = np.unique(source_hashes)
+    target_unique = np.unique(target_hashes)
+    common = len(np.intersect1d(source_unique, target_unique, assume_unique=True))
+    union = len(source_unique) + len(target_unique) - common
+    matched = np.isin(source_hashes, target_unique)
+    return {
+        'jaccard': common / union if union else 0.0,
+        'containment': common / min(len(source_unique), len(target_unique)) if common else 0.0,
+        'source_row_coverage': float(matched.mean()) if len(matched) else 0.0
+    }, matched
+
+
+def _stratified_sample(lengths: np.ndarray, size: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Amostra aleatória estratificada por faixa de comprimento, com alocação proporcional
+    
+    Returns:
+        (posições amostradas, estrato de cada linha da população)
+    """
+    edges = np.unique(np.quantile(lengths, np.linspace(0, 1, TEXT_STRATA + 1)[1:-1]))
+    strata = np.searchsorted(edges, lengths, side='right')
+    positions = []
+    for stratum in np.unique(strata):
+        members = np.flatnonzero(strata == stratum)
+        # Ao menos 2 por estrato (variância estimável)
+        take = min(len(members), max(2, round(size * len(members) / len(lengths))))
+        positions.append(rng.choice(members, take, replace=False))
+    return np.concatenate(positions), strata
+
+
+def _stratified_mean(values: np.ndarray, labels: np.ndarray, population: np.ndarray) -> Tuple[float, float]:
+    """
+    Média estratificada e seu erro padrão (com correção de população finita)
+    
+    Args:
+        values: Medida de cada unidade amostrada
+        labels: Estrato de cada unidade amostrada
+        population: Estrato de cada unidade da população
+    """
+    total = len(population)
+    mean, variance = 0.0, 0.0
+    for stratum in np.unique(labels):
+        sample = values[labels == stratum]
+        size = int(np.count_nonzero(population == stratum))
+        weight = size / total
+        mean += weight * float(sample.mean())
+        if len(sample) > 1 and size > len(sample):
+            variance += weight ** 2 * sample.var(ddof=1) / len(sample) * (1 - len(sample) / size)
+    return mean, math.sqrt(variance)
+
+
+def _compare_text(source: pd.Series, target: pd.Series, rng: np.random.Generator) -> CompatibilityResult:
+    """Sobreposição exata nas colunas inteiras + similaridade estimada das demais linhas"""
+    source_texts = normalize_series(_texts(source), ADVANCED_PROFILE)
+    target_texts = normalize_series(_texts(target), ADVANCED_PROFILE)
+    source_texts = source_texts[source_texts != '']
+    target_texts = target_texts[target_texts != '']
+    if source_texts.empty or target_texts.empty:
+        return CompatibilityResult(kind='empty', score=0.0, interval=(0.0, 0.0))
+    
+    source_hashes = pd.util.hash_array(source_texts.to_numpy(dtype=object))
+    target_hashes = pd.util.hash_array(target_texts.to_numpy(dtype=object))
+    overlap, matched = _overlap(source_hashes, target_hashes)
+    
+    # Linhas com valor idêntico no destino valem 100; as demais entram na amostra
+    pending = source_texts.to_numpy(dtype=object)[~matched]
+    exact_share = float(matched.mean())
+    details: Dict[str, Any] = {'sampled_rows': 0, 'target_values_compared': 0, 'target_sampled': False}
+    if len(pending):
+        lengths = np.fromiter((len(text) for text in pending), dtype=np.int64, count=len(pending))
+        positions, strata = _stratified_sample(lengths, TEXT_SAMPLE_SIZE, rng)
+        pool = pd.unique(target_texts.to_numpy(dtype=object))
+        if len(pool) > MAX_TARGET_VALUES:
+            pool = rng.choice(pool, MAX_TARGET_VALUES, replace=False)
+            details['target_sampled'] = True
+        # Melhor similaridade de cada linha amostrada contra todo o destino, em um cdist
+        best = process.cdist(pending[positions].tolist(), list(pool), scorer=fuzz.ratio,
+                             dtype=np.float64, workers=-1).max(axis=1)
+        fuzzy_mean, fuzzy_error = _stratified_mean(best, strata[positions], strata)
+        details.update(sampled_rows=len(positions), target_values_compared=len(pool),
+                       fuzzy_mean=round(fuzzy_mean, 2))
+    else:
+        fuzzy_mean, fuzzy_error = 100.0, 0.0
+    
+    score = float(exact_share * 100 + (1 - exact_share) * fuzzy_mean)
+    margin = CONFIDENCE_Z * (1 - exact_share) * fuzzy_error
+    return CompatibilityResult(
+        kind='text',
+        score=score,
+        interval=(max(0.0, score - margin), min(100.0, score + margin)),
+        source_distinct=len(np.unique(source_hashes)),
+        target_distinct=len(np.unique(target_hashes)),
+        overlap=overlap,
+        details=details
+    )
+
+
+def _naive_datetimes(values: pd.Series) -> pd.Series:
+    """Datas com fuso horário convertidas para UTC, sem fuso"""
+    return values.dt.tz_convert(None) if values.dt.tz is not None else values
+
+
+def _compare_numeric(source: pd.Series, target: pd.Series, kind: str) -> CompatibilityResult:
+    """Valores em comum, distância KS e sobreposição das faixas sobre as colunas inteiras"""
+    if kind == 'datetime':
+        # Datas com fuso viram instantes UTC sem fuso (astype não converte colunas com fuso)
+        source, target = _naive_datetimes(source), _naive_datetimes(target)
+    else:
+        # inf/-inf não entram na distribuição (quantis e faixas viriam NaN)
+        source = source[np.isfinite(source.to_numpy(dtype=np.float64))]
+        target = target[np.isfinite(target.to_numpy(dtype=np.float64))]
+        if source.empty or target.empty:
+            return CompatibilityResult(kind='empty', score=0.0, interval=(0.0, 0.0))
+    ranges = {'source_range': (source.min(), source.max()), 'target_range': (target.min(), target.max())}
+    if kind == 'datetime':
+        source = source.astype('datetime64[ns]').astype(np.int64)
+        target = target.astype('datetime64[ns]').astype(np.int64)
+    a = np.sort(source.to_numpy(dtype=np.float64))
+    b = np.sort(target.to_numpy(dtype=np.float64))
+    
+    overlap, _ = _overlap(pd.util.hash_array(a), pd.util.hash_array(b))
+    
+    # Kolmogorov-Smirnov exato: maior diferença entre as distribuições acumuladas
+    points = np.concatenate([a, b])
+    ks = float(np.max(np.abs(np.searchsorted(a, points, side='right') / len(a)
+                             - np.searchsorted(b, points, side='right') / len(b))))
+    
+    low, high = max(a[0], b[0]), min(a[-1], b[-1])
+    span = max(a[-1], b[-1]) - min(a[0], b[0])
+    range_overlap = 1.0 if span == 0 else float(max(0.0, high - low) / span)
+    
+    value_weight, shape_weight, range_weight = NUMERIC_WEIGHTS
+    score = 100 * (value_weight * overlap['containment'] + shape_weight * (1 - ks) + range_weight * range_overlap)
+    score = float(score)
+    probabilities = np.linspace(0, 1, QUANTILE_POINTS)
+    return CompatibilityResult(
+        kind=kind,
+        # Colunas inteiras: medida exata, intervalo degenerado
+        score=score,
+        interval=(score, score),
+        source_distinct=len(np.unique(a)),
+        target_distinct=len(np.unique(b)),
+        overlap=overlap,
+        details={
+            'ks_distance': round(ks, 4),
+            'range_overlap': round(range_overlap, 4),
+            **ranges,
+            # Resumo das distribuições (datas em ns desde 1970)
+            'source_quantiles': np.quantile(a, probabilities),
+            'target_quantiles': np.quantile(b, probabilities)
+        }
+    )
+
+
+def _kind(values: pd.Series) -> str:
+    """Tipo de análise de uma coluna (booleanos entram como texto)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return 'numeric'
+    return 'text'
+
+
+def compare_columns(source: pd.Series, target: pd.Series, seed: Optional[int] = 0) -> CompatibilityResult:
+    """
+    Compatibilidade de uma coluna de origem com uma de destino
+    
+    Duas colunas numéricas (ou duas de datas) são comparadas pela distribuição; qualquer
+    outra combinação, como texto (valores numéricos viram texto, ex.: códigos).
+    
+    Args:
+        source: Coluna de origem
+        target: Coluna de destino
+        seed: Semente da amostragem (None = aleatória)
+    
+    Returns:
+        CompatibilityResult (score e intervalo em 0-100)
+    """
+    source = source.dropna()
+    target = target.dropna()
+    if source.empty or target.empty:
+        return CompatibilityResult(kind='empty', score=0.0, interval=(0.0, 0.0))
+    
+    source_kind, target_kind = _kind(source), _kind(target)
+    if source_kind == target_kind and source_kind != 'text':
+        result = _compare_numeric(source, target, source_kind)
+    else:
+        result = _compare_text(source, target, np.random.default_rng(seed))
+    result.source_dtype = str(source.dtype)
+    result.target_dtype = str(target.dtype)
+    return result
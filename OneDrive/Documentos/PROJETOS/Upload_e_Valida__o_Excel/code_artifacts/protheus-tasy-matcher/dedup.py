@@ -0,0 +1,99 @@
+"""
+Deduplicação para a busca de correspondências
+Origens e destinos são reduzidos aos valores distintos (com contagens e linhas de cada
+um); a busca roda só sobre os distintos e o resultado é replicado para as linhas
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class DistinctValues:
+    """Valores distintos de uma coleção, na ordem da primeira ocorrência"""
+    
+    def __init__(self, values: Sequence[Any], keys: Optional[Sequence[Any]] = None):
+        """
+        Agrupa os valores
+        
+        Args:
+            values: Valores por linha
+            keys: Chave de agrupamento por linha (padrão: o próprio valor em str, com
+                nulos separados de textos iguais a str(nulo), ex.: NaN x 'nan')
+        """
+        self.rows = list(values)
+        if keys is None:
+            array = np.empty(len(self.rows), dtype=object)
+            array[:] = self.rows
+            text_codes, _ = pd.factorize(pd.Series(array, dtype=object).astype(str).to_numpy(dtype=object))
+            codes, _ = pd.factorize(text_codes * 2 + pd.isna(array))
+        else:
+            codes, _ = pd.factorize(np.asarray(keys, dtype=object), use_na_sentinel=False)
+        
+        self.inverse: np.ndarray = codes.astype(np.intp)
+        self.counts: np.ndarray = np.bincount(self.inverse)
+        # factorize numera na ordem de aparição: a primeira linha de cada grupo é crescente
+        first = np.full(len(self.counts), len(self.rows), dtype=np.intp)
+        np.minimum.at(first, self.inverse, np.arange(len(self.rows), dtype=np.intp))
+        self.first_rows: np.ndarray = first
+        self._row_indices: Optional[List[np.ndarray]] = None
+    
+    @property
+    def n_rows(self) -> int:
+        return len(self.rows)
+    
+    @property
+    def n_distinct(self) -> int:
+        return len(self.counts)
+    
+    @property
+    def values(self) -> List[Any]:
+        """Representante de cada grupo (valor da primeira linha)"""
+        return [self.rows[i] for i in self.first_rows]
+    
+    @property
+    def row_indices(self) -> List[np.ndarray]:
+        """Linhas (em ordem crescente) de cada grupo"""
+        if self._row_indices is None:
+            order = np.argsort(self.inverse, kind='stable')
+            self._row_indices = np.split(order, np.cumsum(self.counts)[:-1]) if self.n_distinct else []
+        return self._row_indices
+    
+    def expand(self, per_distinct: Sequence[Any]) -> List[Any]:
+        """Replica um resultado por grupo para todas as linhas"""
+        return [per_distinct[code] for code in self.inverse]
+
+
+def dedup_savings(sources: DistinctValues, targets: DistinctValues) -> Dict[str, Any]:
+    """
+    Trabalho economizado pela deduplicação
+    
+    Args:
+        sources: Origens agrupadas
+        targets: Destinos agrupados
+    
+    Returns:
+        Linhas, distintos, pares com e sem deduplicação e fração economizada
+    """
+    pairs_total = sources.n_rows * targets.n_rows
+    pairs_distinct = sources.n_distinct * targets.n_distinct
+    return {
+        'source_rows': sources.n_rows,
+        'source_distinct': sources.n_distinct,
+        'target_rows': targets.n_rows,
+        'target_distinct': targets.n_distinct,
+        'pairs_total': pairs_total,
+        'pairs_distinct': pairs_distinct,
+        'pairs_saved': pairs_total - pairs_distinct,
+        'saving_rate': (pairs_total - pairs_distinct) / pairs_total if pairs_total else 0.0
+    }
+
+
+def merge_savings(total: Optional[Dict[str, Any]], savings: Dict[str, Any]) -> Dict[str, Any]:
+    """Acumula as economias de várias buscas"""
+    if not total:
+        return dict(savings)
+    merged = {key: total[key] + savings[key] for key in savings if key != 'saving_rate'}
+    merged['saving_rate'] = merged['pairs_saved'] / merged['pairs_total'] if merged['pairs_total'] else 0.0
+    return merged
@@ -0,0 +1,252 @@
+"""
+Cache persistente em disco para planilhas lidas, colunas normalizadas e índices
+Cada entrada é um arquivo (NPZ para arrays, pickle para DataFrames e objetos ajustados)
+cujo nome é um SHA-256 do conteúdo de entrada + versão da configuração; o diretório é
+limitado em bytes, com remoção das entradas usadas há mais tempo
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Versão do formato das entradas (mudanças incompatíveis invalidam o cache inteiro)
+CACHE_FORMAT_VERSION = 1
+
+# Diretório e limite padrão (o diretório pode ser trocado pela variável de ambiente)
+DEFAULT_CACHE_DIR = os.environ.get(
+    'PROTHEUS_TASY_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'protheus_tasy_matcher')
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_EXTENSIONS = ('.npz', '.pkl')
+
+
+def content_hash(*parts: Any) -> str:
+    """
+    SHA-256 hexadecimal de uma sequência de partes
+    
+    Bytes entram como estão; arrays NumPy entram pelo tipo, formato e bytes; demais
+    valores (textos, números, listas, tuplas, dicionários) entram serializados com pickle,
+    que é determinístico para esses tipos.
+    """
+    digest = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            data = bytes(part)
+        elif isinstance(part, np.ndarray) and part.dtype != object:
+            data = f'{part.dtype.str}{part.shape}'.encode() + np.ascontiguousarray(part).tobytes()
+        else:
+            data = pickle.dumps(part, protocol=4)
+        # Tamanho antes de cada parte: partes concatenadas não colidem entre si
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def pack_texts(texts: List[str]) -> Dict[str, np.ndarray]:
+    """Textos como bytes UTF-8 concatenados + deslocamentos (NPZ sem pickle, sem perdas)"""
+    encoded = [text.encode('utf-8', 'surrogatepass') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return {'data': np.frombuffer(b''.join(encoded), dtype=np.uint8), 'offsets': offsets}
+
+
+def unpack_texts(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Inverso de pack_texts"""
+    buffer = data.tobytes()
+    bounds = offsets.tolist()
+    return [buffer[start:end].decode('utf-8', 'surrogatepass') for start, end in zip(bounds, bounds[1:])]
+
+
+class DiskCache:
+    """
+    Diretório de entradas endereçadas por conteúdo, limitado em bytes
+    
+    Gravações são atômicas (arquivo temporário + rename), então processos e sessões do
+    Streamlit podem compartilhar o diretório. Uma entrada ilegível conta como ausente e é
+    removida.
+    """
+    
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: Diretório das entradas (padrão: DEFAULT_CACHE_DIR)
+            max_bytes: Tamanho máximo do diretório em bytes (None = sem limite)
+        """
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+    
+    def _path(self, namespace: str, key: str, extension: str) -> str:
+        """Arquivo de uma entrada"""
+        return os.path.join(self.directory, f'{namespace}-{key}{extension}')
+    
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(último uso, tamanho, caminho) de cada entrada do diretório"""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(_EXTENSIONS):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def _load(self, path: str, reader) -> Any:
+        """Lê uma entrada (None se ausente ou ilegível) e marca o uso para a remoção LRU"""
+        try:
+            value = reader(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Entrada de cache ilegível descartada ({os.path.basename(path)}): {e}")
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+    
+    def _store(self, path: str, writer):
+        """Grava uma entrada de forma atômica e aplica o limite de tamanho"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(handle, 'wb') as file:
+                    writer(file)
+                os.replace(temp_path, path)
+            except BaseException:
+                self._remove(temp_path)
+                raise
+        except Exception as e:
+            # Cache é opcional: falha de disco ou de serialização não interrompe o processamento
+            logger.warning(f"Não foi possível gravar no cache em disco: {e}")
+            return
+        with self._lock:
+            self.writes += 1
+        self.evict()
+    
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def get_arrays(self, namespace: str, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Arrays gravados com put_arrays (None se ausente)"""
+        def read(path):
+            with np.load(path, allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        return self._load(self._path(namespace, key, '.npz'), read)
+    
+    def put_arrays(self, namespace: str, key: str, arrays: Dict[str, np.ndarray]):
+        """Grava arrays numéricos/textuais (sem objetos Python) em NPZ"""
+        self._store(self._path(namespace, key, '.npz'), lambda file: np.savez(file, **arrays))
+    
+    def get_frame(self, namespace: str, key: str) -> Optional[pd.DataFrame]:
+        """DataFrame gravado com put_frame (None se ausente)"""
+        return self._load(self._path(namespace, key, '.pkl'), pd.read_pickle)
+    
+    def put_frame(self, namespace: str, key: str, frame: pd.DataFrame):
+        """
+        Grava um DataFrame preservando tipos exatamente
+        
+        Colunas lidas do Excel costumam misturar tipos (códigos numéricos e textuais na
+        mesma coluna), que formatos colunares converteriam; o pickle mantém os valores.
+        """
+        self._store(self._path(namespace, key, '.pkl'),
+                    lambda file: pickle.dump(frame, file, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    def get_object(self, namespace: str, key: str) -> Any:
+        """Objeto gravado com put_object (None se ausente)"""
+        def read(path):
+            with open(path, 'rb') as file:
+                return pickle.load(file)
+        return self._load(self._path(namespace, key, '.pkl'), read)
+    
+    def put_object(self, namespace: str, key: str, value: Any):
+        """Grava um objeto Python (ex.: vetorizador ajustado, índice esparso)"""
+        self._store(self._path(namespace, key, '.pkl'),
+                    lambda file: pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    def evict(self):
+        """Remove as entradas usadas há mais tempo até respeitar max_bytes"""
+        if self.max_bytes is None:
+            return
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+    
+    def clear(self):
+        """Remove todas as entradas"""
+        for _, _, path in self._entries():
+            self._remove(path)
+    
+    def size_bytes(self) -> int:
+        """Espaço ocupado pelas entradas"""
+        return sum(size for _, size, _ in self._entries())
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Acertos, falhas, gravações, remoções e ocupação do diretório"""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'directory': self.directory,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'writes': self.writes,
+            'evictions': self.evictions
+        }
+
+
+_default_cache: Optional[DiskCache] = None
+
+
+def default_cache() -> DiskCache:
+    """Cache em disco compartilhado pelos aplicativos (DEFAULT_CACHE_DIR / DEFAULT_MAX_BYTES)"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DiskCache()
+    return _default_cache
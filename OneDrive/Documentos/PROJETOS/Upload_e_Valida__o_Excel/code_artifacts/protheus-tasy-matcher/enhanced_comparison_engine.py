@@ -6,27 +6,76 @@ Desenvolvido para identificar com alta precisão células similares entre conjun
 import pandas as pd
 import numpy as np
 import re
-import unicodedata
-from typing import Dict, List, Tuple, Any, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple, Any, Optional
+from dataclasses import dataclass, replace
 from enum import Enum
 import pickle
 import json
-from datetime import datetime
+import time
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import multiprocessing as mp
+import threading
 
 # Importações para algoritmos de similaridade
-from rapidfuzz import fuzz, distance
-from sklearn.feature_extraction.text import TfidfVectorizer
+from rapidfuzz import fuzz, distance, process
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import jellyfish
+import sklearn
+
+from tfidf_index import TfidfCorpusIndex
+from candidate_generation import CandidateGenerator
+from parallel_matching import find_matches_in_processes
+from similarity_cache import LRUCache
+from keyword_matcher import DomainKeywordMatcher, load_keyword_dictionary
+from text_normalization import ENGINE_PROFILE, normalize_list, normalize_value
+from dedup import DistinctValues, dedup_savings, merge_savings
+from match_store import MatchStore
+from report_aggregator import ReportAggregator
+from rematch_cache import RematchCache
+from disk_cache import DEFAULT_MAX_BYTES, DiskCache, content_hash, pack_texts, unpack_texts
+from profiling import StageProfiler
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ordem dos scores armazenados no cache de pares
+SCORE_KEYS = ('levenshtein', 'jaro_winkler', 'jaccard', 'cosine', 'semantic', 'overall')
+
+# Palavras-chave de domínio usadas na análise semântica (padrão de 'domain_keywords')
+DOMAIN_KEYWORDS = {
+    'financeiro': ['valor', 'preco', 'custo', 'total', 'subtotal', 'desconto', 'taxa'],
+    'temporal': ['data', 'hora', 'periodo', 'mes', 'ano', 'dia', 'prazo'],
+    'identificacao': ['codigo', 'id', 'numero', 'seq', 'chave', 'ref'],
+    'quantidade': ['qtd', 'quantidade', 'volume', 'peso', 'medida'],
+    'pessoa': ['nome', 'cliente', 'fornecedor', 'usuario', 'responsavel'],
+    'produto': ['item', 'produto', 'material', 'mercadoria', 'sku'],
+    'localizacao': ['endereco', 'cidade', 'estado', 'pais', 'cep']
+}
+
+# Folga dos limites superiores (somas de floats em outra ordem e ruído do coseno)
+BOUND_EPSILON = 1e-9
+
+# Versão das entradas do motor no cache em disco (incrementar ao mudar a normalização,
+# as características semânticas ou o formato dos valores pré-processados)
+DISK_CACHE_VERSION = 1
+
+# Ordem dos bits de SemanticFeatures.flags (mesmos nomes dos padrões regex)
+SEMANTIC_FLAGS = ('numbers', 'dates', 'currency', 'percentage')
+
+# Contagem de bits por byte (fallback de np.bitwise_count para NumPy < 2.0)
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Número de bits ligados de cada elemento de um array de inteiros sem sinal"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    as_bytes = np.ascontiguousarray(values)[..., None].view(np.uint8)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.uint8)
+
 class MatchType(Enum):
     """Tipos de correspondência"""
     EXACT = "exact"
@@ -58,6 +107,14 @@ class MatchResult:
     recommendation: str
     metadata: Dict[str, Any]
 
+@dataclass(frozen=True)
+class SemanticFeatures:
+    """Características semânticas compactas de um valor (calculadas uma vez por valor distinto)"""
+    data_type: DataType
+    flags: int          # bits: números, datas, moeda, percentual
+    length: int         # comprimento do texto normalizado
+    keyword_mask: int   # um bit por palavra-chave de domínio encontrada
+
 @dataclass
 class ComparisonReport:
     """Relatório de comparação estruturado"""
@@ -69,7 +126,7 @@ class ComparisonReport:
     no_matches: int
     average_similarity: float
     processing_time: float
-    matches: List[MatchResult]
+    matches: MatchStore  # colunar; indexação e iteração devolvem MatchResult
     summary_stats: Dict[str, Any]
 
 class EnhancedComparisonEngine:
@@ -94,17 +151,61 @@ class EnhancedComparisonEngine:
             lowercase=True
         )
         
-        # Cache para otimização
-        self._similarity_cache = {}
-        self._normalization_cache = {}
+        # Índice TF-IDF ajustado uma vez sobre o corpus (origem + destino)
+        self.tfidf_index = TfidfCorpusIndex(analyzer='char_wb', ngram_range=(2, 4))
+        
+        # Cache para otimização (LRU limitado por entradas/bytes)
+        self._similarity_cache = LRUCache()
+        self._normalization_cache = LRUCache()
+        self._configure_caches()
+        # Desligado durante buscas todos-contra-todos, em que o reuso de pares é praticamente nulo
+        self._pair_cache_active = True
+        
+        # Características semânticas por valor distinto
+        self._feature_cache = LRUCache(self.config.get('normalization_cache_max_entries'))
+        self._build_keyword_matcher()
+        
+        # Protege caches e estatísticas no backend paralelo de threads
+        self._lock = threading.RLock()
         
         # Padrões pré-compilados para melhor performance
         self._compile_patterns()
         
+        # Agregados do relatório da última busca (atualizados durante a busca)
+        self.report_aggregator: Optional[ReportAggregator] = None
+        self._last_matches: Optional[List[MatchResult]] = None
+        self._source_weights: Optional[np.ndarray] = None
+        self._progress_callback: Optional[Callable[[ReportAggregator], None]] = None
+        
+        # Entrega em blocos (chunk_callback): correspondências do bloco atual (índice da
+        # origem, correspondência), valores distintos da busca e blocos já entregues
+        self._chunk_callback: Optional[Callable[[List[MatchResult]], None]] = None
+        self._chunk_buffer: List[Tuple[int, MatchResult]] = []
+        self._chunk_sources: Optional[Tuple[DistinctValues, str]] = None
+        self._chunks_delivered = 0
+        
+        # Scores por componente da última busca em lote (nova correspondência sem pontuar texto)
+        self.rematch_cache: Optional[RematchCache] = None
+        self._rematch_builder: Optional[RematchCache] = None
+        
+        # Cache em disco ('disk_cache_dir') e chave do corpus TF-IDF carregado dele
+        self._disk_cache_instance: Optional[DiskCache] = None
+        self._tfidf_key: Optional[str] = None
+        
+        # Tempo por etapa ('enable_profiling'), zerado no início de cada busca
+        self.profiler = StageProfiler(self.config.get('enable_profiling', False))
+        
         # Estatísticas de uso
         self.stats = {
             'total_comparisons': 0,
             'cache_hits': 0,
+            'candidate_pairs': 0,
+            'pruned_pairs': 0,
+            'bound_pruned_pairs': 0,
+            'early_stops': 0,
+            'rematched_sources': 0,
+            'dedup': None,
+            'dedup_last': None,
             'processing_times': []
         }
     
@@ -124,13 +225,72 @@ class EnhancedComparisonEngine:
                 'cosine': 0.15,
                 'semantic': 0.15
             },
+            'domain_keywords': None,
             'enable_cache': True,
+            'similarity_cache_max_entries': 500000,
+            'similarity_cache_max_bytes': 256 * 1024 * 1024,
+            'normalization_cache_max_entries': 200000,
+            'normalization_cache_max_bytes': None,
+            'skip_pair_cache_all_pairs': True,
             'enable_parallel': True,
             'max_workers': min(4, mp.cpu_count()),
+            'parallel_backend': 'process',
             'chunk_size': 1000,
+            'enable_batch_scoring': True,
+            'batch_chunk_size': 256,
+            'candidate_generation': None,
+            'candidate_top_k': 10,
+            'candidate_min_shared_grams': 1,
+            'candidate_qgram_size': 3,
+            'dedup_matching': 'raw',
+            'enable_bound_pruning': True,
+            'enable_rematch_cache': True,
+            'rematch_top_k': 15,
+            'disk_cache_dir': None,
+            'disk_cache_max_bytes': DEFAULT_MAX_BYTES,
+            'enable_profiling': False,
             'enable_learning': True
         }
     
+    def _configure_caches(self):
+        """Aplica aos caches os limites definidos na configuração"""
+        self._similarity_cache.resize(
+            self.config.get('similarity_cache_max_entries'),
+            self.config.get('similarity_cache_max_bytes')
+        )
+        self._normalization_cache.resize(
+            self.config.get('normalization_cache_max_entries'),
+            self.config.get('normalization_cache_max_bytes')
+        )
+    
+    def _build_keyword_matcher(self):
+        """Compila o extrator de palavras-chave ('domain_keywords': dicionário, arquivo JSON ou None)"""
+        self._keyword_dictionary = load_keyword_dictionary(self.config.get('domain_keywords'), DOMAIN_KEYWORDS)
+        self.keyword_matcher = DomainKeywordMatcher(self._keyword_dictionary)
+        self._keyword_labels = self.keyword_matcher.labels
+        # Máscaras em cache dependem da ordem dos rótulos
+        self._feature_cache.clear()
+    
+    def _disk_cache(self) -> Optional[DiskCache]:
+        """Cache em disco configurado em 'disk_cache_dir' (None = desativado)"""
+        directory = self.config.get('disk_cache_dir')
+        if not directory:
+            return None
+        if self._disk_cache_instance is None or self._disk_cache_instance.directory != directory:
+            self._disk_cache_instance = DiskCache(directory)
+        self._disk_cache_instance.max_bytes = self.config.get('disk_cache_max_bytes', DEFAULT_MAX_BYTES)
+        return self._disk_cache_instance
+    
+    def _disk_cache_key(self, kind: str, *parts: Any) -> str:
+        """
+        Chave de uma entrada do cache em disco
+        
+        Além do conteúdo (`parts`), entram a versão das entradas, o perfil de normalização,
+        o dicionário de palavras-chave e a versão do scikit-learn (objetos serializados).
+        """
+        return content_hash(kind, DISK_CACHE_VERSION, repr(ENGINE_PROFILE), self._keyword_dictionary,
+                            sklearn.__version__, *parts)
+    
     def _compile_patterns(self):
         """Compila padrões regex para melhor performance"""
         self.patterns = {
@@ -159,29 +319,34 @@ class EnhancedComparisonEngine:
         text_str = str(text)
         
         # Verifica cache
-        if self.config['enable_cache'] and text_str in self._normalization_cache:
-            return self._normalization_cache[text_str]
-        
-        # Normalização
-        normalized = text_str.lower().strip()
-        
-        # Remove acentos
-        normalized = unicodedata.normalize('NFKD', normalized)
-        normalized = ''.join(c for c in normalized if not unicodedata.combining(c))
-        
-        # Remove caracteres especiais
-        normalized = self.patterns['special_chars'].sub(' ', normalized)
+        if self.config['enable_cache']:
+            cache_key = LRUCache.make_key(text_str)
+            cached = self._normalization_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
-        # Normaliza espaços
-        normalized = self.patterns['multiple_spaces'].sub(' ', normalized)
-        normalized = normalized.strip()
+        # Normalização (minúsculas, sem acentos, sem caracteres especiais, espaços únicos)
+        normalized = normalize_value(text_str, ENGINE_PROFILE)
         
         # Armazena no cache
         if self.config['enable_cache']:
-            self._normalization_cache[text_str] = normalized
+            self._normalization_cache.put(cache_key, normalized)
         
         return normalized
     
+    def normalize_values(self, values: List[Any]) -> List[str]:
+        """
+        Normaliza uma coleção de valores de uma vez (uma vez por valor distinto)
+        
+        Args:
+            values: Valores a normalizar
+        
+        Returns:
+            Textos normalizados, na mesma ordem
+        """
+        with self.profiler.stage('normalization', len(values)):
+            return normalize_list(values, ENGINE_PROFILE)
+    
     def identify_data_type(self, text: str) -> DataType:
         """
         Identifica o tipo de dados do texto
@@ -251,6 +416,10 @@ class EnhancedComparisonEngine:
         if not text1 or not text2:
             return 0.0
         
+        # Com o índice do corpus ajustado, o coseno é um produto escalar esparso
+        if self.tfidf_index.is_fitted:
+            return self.tfidf_index.similarity(text1, text2)
+        
         try:
             tfidf_matrix = self.vectorizer.fit_transform([text1, text2])
             cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
@@ -258,6 +427,32 @@ class EnhancedComparisonEngine:
         except:
             return 0.0
     
+    def fit_corpus(self, values: List[Any]):
+        """
+        Ajusta o índice TF-IDF uma única vez sobre os valores normalizados
+        
+        Args:
+            values: Valores de origem e destino
+        """
+        texts = self.normalize_values(values)
+        cache = self._disk_cache()
+        self._tfidf_key = None
+        with self.profiler.stage('corpus_fit', len(texts)):
+            if cache is None:
+                self.tfidf_index.fit(texts)
+            else:
+                # Mesmo corpus de uma sessão anterior: vocabulário, idf e matriz vêm do disco
+                key = self._disk_cache_key('tfidf', repr(self.tfidf_index.vectorizer.get_params()), texts)
+                state = cache.get_object('tfidf', key)
+                if state is None:
+                    self.tfidf_index.fit(texts)
+                    cache.put_object('tfidf', key, self.tfidf_index.get_state())
+                else:
+                    self.tfidf_index.set_state(state)
+                self._tfidf_key = key
+        # Scores em cache dependem do idf do corpus anterior
+        self._similarity_cache.clear()
+    
     def calculate_semantic_similarity(self, text1: str, text2: str) -> float:
         """
         Calcula similaridade semântica baseada em características
@@ -268,28 +463,25 @@ class EnhancedComparisonEngine:
         Returns:
             Score de similaridade semântica
         """
-        features1 = self._extract_semantic_features(text1)
-        features2 = self._extract_semantic_features(text2)
+        features1 = self.get_semantic_features(text1)
+        features2 = self.get_semantic_features(text2)
         
         # Similaridade de tipo de dados
-        type_match = 1.0 if features1['data_type'] == features2['data_type'] else 0.0
+        type_match = 1.0 if features1.data_type == features2.data_type else 0.0
         
-        # Similaridade de características booleanas
-        bool_features = ['has_numbers', 'has_dates', 'has_currency', 'has_percentage']
-        bool_matches = sum(1 for feat in bool_features if features1[feat] == features2[feat])
-        bool_similarity = bool_matches / len(bool_features)
+        # Similaridade de características booleanas (bits iguais nos dois valores)
+        bool_matches = len(SEMANTIC_FLAGS) - (features1.flags ^ features2.flags).bit_count()
+        bool_similarity = bool_matches / len(SEMANTIC_FLAGS)
         
         # Similaridade de comprimento
-        len_diff = abs(features1['length'] - features2['length'])
-        max_len = max(features1['length'], features2['length'])
+        len_diff = abs(features1.length - features2.length)
+        max_len = max(features1.length, features2.length)
         length_similarity = 1 - (len_diff / max_len) if max_len > 0 else 1.0
         
-        # Similaridade de palavras-chave
-        keywords1 = set(features1['keywords'])
-        keywords2 = set(features2['keywords'])
-        
-        if keywords1 or keywords2:
-            keyword_similarity = len(keywords1.intersection(keywords2)) / len(keywords1.union(keywords2))
+        # Similaridade de palavras-chave (Jaccard sobre as máscaras de bits)
+        keyword_union = (features1.keyword_mask | features2.keyword_mask).bit_count()
+        if keyword_union:
+            keyword_similarity = (features1.keyword_mask & features2.keyword_mask).bit_count() / keyword_union
         else:
             keyword_similarity = 0.0
         
@@ -303,45 +495,38 @@ class EnhancedComparisonEngine:
         
         return semantic_score
     
-    def _extract_semantic_features(self, text: str) -> Dict[str, Any]:
-        """Extrai características semânticas do texto"""
-        normalized = self.normalize_text(text)
-        
-        features = {
-            'length': len(normalized),
-            'word_count': len(normalized.split()),
-            'has_numbers': bool(self.patterns['numbers'].search(text)),
-            'has_dates': bool(self.patterns['dates'].search(text)),
-            'has_currency': bool(self.patterns['currency'].search(text)),
-            'has_percentage': bool(self.patterns['percentage'].search(text)),
-            'data_type': self.identify_data_type(text),
-            'keywords': self._extract_domain_keywords(normalized)
-        }
+    def get_semantic_features(self, text: Any) -> SemanticFeatures:
+        """
+        Características semânticas compactas de um valor, com cache por valor distinto
         
+        Args:
+            text: Valor original
+        
+        Returns:
+            Registro com tipo de dados, flags, comprimento e máscara de palavras-chave
+        """
+        text_str = str(text)
+        cache_key = LRUCache.make_key(text_str)
+        features = self._feature_cache.get(cache_key)
+        if features is None:
+            normalized = self.normalize_text(text_str)
+            flags = 0
+            for bit, flag in enumerate(SEMANTIC_FLAGS):
+                if self.patterns[flag].search(text_str):
+                    flags |= 1 << bit
+            
+            features = SemanticFeatures(
+                data_type=self.identify_data_type(text_str),
+                flags=flags,
+                length=len(normalized),
+                keyword_mask=self.keyword_matcher.mask(normalized)
+            )
+            self._feature_cache.put(cache_key, features)
         return features
     
     def _extract_domain_keywords(self, text: str) -> List[str]:
         """Extrai palavras-chave específicas do domínio"""
-        domain_keywords = {
-            'financeiro': ['valor', 'preco', 'custo', 'total', 'subtotal', 'desconto', 'taxa'],
-            'temporal': ['data', 'hora', 'periodo', 'mes', 'ano', 'dia', 'prazo'],
-            'identificacao': ['codigo', 'id', 'numero', 'seq', 'chave', 'ref'],
-            'quantidade': ['qtd', 'quantidade', 'volume', 'peso', 'medida'],
-            'pessoa': ['nome', 'cliente', 'fornecedor', 'usuario', 'responsavel'],
-            'produto': ['item', 'produto', 'material', 'mercadoria', 'sku'],
-            'localizacao': ['endereco', 'cidade', 'estado', 'pais', 'cep']
-        }
-        
-        keywords = []
-        words = text.split()
-        
-        for category, category_words in domain_keywords.items():
-            for word in words:
-                for keyword in category_words:
-                    if keyword in word or word in keyword:
-                        keywords.append(f"{category}:{keyword}")
-        
-        return list(set(keywords))
+        return self.keyword_matcher.extract(text)
     
     def calculate_comprehensive_similarity(self, text1: str, text2: str) -> Dict[str, float]:
         """
@@ -353,38 +538,70 @@ class EnhancedComparisonEngine:
         Returns:
             Dicionário com scores de todos os algoritmos
         """
+        # Instrumentação por etapa: uma única verificação por par quando desativada
+        profiler = self.profiler if self.profiler.enabled else None
+        if profiler is not None:
+            start = time.perf_counter_ns()
+        
         # Normaliza textos
         norm1 = self.normalize_text(text1)
         norm2 = self.normalize_text(text2)
-        
-        # Verifica cache
-        cache_key = f"{norm1}||{norm2}"
-        if self.config['enable_cache'] and cache_key in self._similarity_cache:
-            self.stats['cache_hits'] += 1
-            return self._similarity_cache[cache_key]
+        if profiler is not None:
+            profiler.record('normalization', time.perf_counter_ns() - start, 2)
+        
+        # Verifica cache (chave pelos textos originais: a análise semântica depende deles)
+        use_cache = self.config['enable_cache'] and self._pair_cache_active
+        if use_cache:
+            cache_key = LRUCache.make_key(str(text1), str(text2))
+            cached = self._similarity_cache.get(cache_key)
+            if cached is not None:
+                with self._lock:
+                    self.stats['cache_hits'] += 1
+                return dict(zip(SCORE_KEYS, cached))
         
         # Calcula todas as métricas
-        scores = {
-            'levenshtein': self.calculate_levenshtein_similarity(norm1, norm2),
-            'jaro_winkler': self.calculate_jaro_winkler_similarity(norm1, norm2),
-            'jaccard': self.calculate_jaccard_similarity(norm1, norm2),
-            'cosine': self.calculate_cosine_similarity_score(norm1, norm2),
-            'semantic': self.calculate_semantic_similarity(text1, text2)
-        }
+        if profiler is None:
+            scores = {
+                'levenshtein': self.calculate_levenshtein_similarity(norm1, norm2),
+                'jaro_winkler': self.calculate_jaro_winkler_similarity(norm1, norm2),
+                'jaccard': self.calculate_jaccard_similarity(norm1, norm2),
+                'cosine': self.calculate_cosine_similarity_score(norm1, norm2),
+                'semantic': self.calculate_semantic_similarity(text1, text2)
+            }
+        else:
+            scores = self._profiled_similarity(profiler, text1, text2, norm1, norm2)
         
         # Calcula score geral
         weights = self.config['algorithm_weights']
         overall_score = sum(scores[alg] * weights[alg] for alg in scores.keys())
         scores['overall'] = overall_score
         
-        # Armazena no cache
-        if self.config['enable_cache']:
-            self._similarity_cache[cache_key] = scores
+        # Armazena no cache (tupla compacta em vez do dicionário)
+        if use_cache:
+            self._similarity_cache.put(cache_key, tuple(float(scores[key]) for key in SCORE_KEYS))
         
-        self.stats['total_comparisons'] += 1
+        with self._lock:
+            self.stats['total_comparisons'] += 1
         
         return scores
     
+    def _profiled_similarity(self, profiler: StageProfiler, text1: Any, text2: Any,
+                             norm1: str, norm2: str) -> Dict[str, float]:
+        """Scores de calculate_comprehensive_similarity com o tempo de cada algoritmo"""
+        algorithms = (
+            ('levenshtein', self.calculate_levenshtein_similarity, norm1, norm2),
+            ('jaro_winkler', self.calculate_jaro_winkler_similarity, norm1, norm2),
+            ('jaccard', self.calculate_jaccard_similarity, norm1, norm2),
+            ('cosine', self.calculate_cosine_similarity_score, norm1, norm2),
+            ('semantic', self.calculate_semantic_similarity, text1, text2)
+        )
+        scores = {}
+        for name, function, first, second in algorithms:
+            start = time.perf_counter_ns()
+            scores[name] = function(first, second)
+            profiler.record(name, time.perf_counter_ns() - start)
+        return scores
+    
     def classify_match(self, similarity_score: float) -> MatchType:
         """Classifica o tipo de correspondência baseado no score"""
         thresholds = self.config['similarity_thresholds']
@@ -449,16 +666,32 @@ class EnhancedComparisonEngine:
         Returns:
             Resultado detalhado da comparação
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         # Calcula similaridade
         scores = self.calculate_comprehensive_similarity(source_value, target_value)
         
+        return self._build_match_result(
+            source_value, target_value, scores,
+            time.perf_counter() - start_time
+        )
+    
+    def _build_match_result(self, source_value: Any, target_value: Any,
+                            scores: Dict[str, float], processing_time: float,
+                            confidence: Optional[float] = None) -> MatchResult:
+        """
+        Monta o MatchResult (classificação, confiança, recomendação) a partir dos scores
+        
+        `confidence` já calculada (ex.: em lote) evita o cálculo por par.
+        """
+        start = time.perf_counter_ns() if self.profiler.enabled else 0
+        
         # Classifica correspondência
         match_type = self.classify_match(scores['overall'])
         
         # Calcula confiança
-        confidence = self.calculate_confidence(scores)
+        if confidence is None:
+            confidence = self.calculate_confidence(scores)
         
         # Identifica tipo de dados
         data_type = self.identify_data_type(str(source_value))
@@ -474,7 +707,7 @@ class EnhancedComparisonEngine:
             data_type=data_type,
             recommendation="",
             metadata={
-                'processing_time': (datetime.now() - start_time).total_seconds(),
+                'processing_time': processing_time,
                 'normalized_source': self.normalize_text(source_value),
                 'normalized_target': self.normalize_text(target_value)
             }
@@ -483,10 +716,14 @@ class EnhancedComparisonEngine:
         # Gera recomendação
         result.recommendation = self.generate_recommendation(result)
         
+        if start:
+            self.profiler.record('classification', time.perf_counter_ns() - start)
         return result
     
     def find_best_matches(self, source_values: List[Any], target_values: List[Any], 
-                         threshold: float = 0.4) -> List[MatchResult]:
+                         threshold: float = 0.4,
+                         progress_callback: Optional[Callable[[ReportAggregator], None]] = None,
+                         chunk_callback: Optional[Callable[[List[MatchResult]], None]] = None) -> List[MatchResult]:
         """
         Encontra as melhores correspondências entre listas de valores
         
@@ -494,57 +731,445 @@ class EnhancedComparisonEngine:
             source_values: Lista de valores de origem
             target_values: Lista de valores de destino
             threshold: Limiar mínimo de similaridade
+            progress_callback: Chamado (na thread que fez a busca) a cada bloco de origens
+                concluído, com os agregados parciais do relatório
+            chunk_callback: Recebe as correspondências de cada bloco de origens concluído
+                (já replicadas para as linhas repetidas), antes do progress_callback; com
+                ele, as correspondências não são acumuladas e a lista devolvida fica vazia
             
         Returns:
-            Lista de melhores correspondências
+            Lista de melhores correspondências (vazia com chunk_callback)
         """
         matches = []
+        self.profiler.start_run(self.config.get('enable_profiling', False))
+        self.report_aggregator = ReportAggregator()
+        self._last_matches = None
+        self._source_weights = None
+        self._progress_callback = progress_callback
+        self._chunk_callback = chunk_callback
+        self._chunk_buffer = []
+        self._chunk_sources = None
+        self._chunks_delivered = 0
+        self.rematch_cache = None
+        sources = None
+        
+        # Índice TF-IDF ajustado uma única vez sobre origem + destino (com repetições: idf inalterado)
+        self.fit_corpus(list(source_values) + list(target_values))
+        
+        # Deduplicação: busca apenas sobre os valores distintos
+        dedup_mode = self.config.get('dedup_matching')
+        if dedup_mode:
+            sources = self._distinct_values(source_values, dedup_mode)
+            targets = self._distinct_values(target_values, dedup_mode)
+            savings = dedup_savings(sources, targets)
+            with self._lock:
+                self.stats['dedup'] = merge_savings(self.stats['dedup'], savings)
+                self.stats['dedup_last'] = savings
+            source_values, target_values = sources.values, targets.values
+            # Cada valor distinto conta por todas as linhas que representa
+            self._source_weights = sources.counts
+            self._chunk_sources = (sources, dedup_mode)
+        
+        keep_components = (self.config.get('enable_rematch_cache', True)
+                           and self.config.get('enable_batch_scoring', False))
+        if keep_components:
+            self._rematch_builder = RematchCache(len(source_values), self.config.get('rematch_top_k', 15))
+        try:
+            matches = self._dispatch_matching(source_values, target_values, threshold)
+        finally:
+            self._progress_callback = None
+            self._chunk_callback = None
+            self._chunk_buffer = []
+            self._chunk_sources = None
+            builder, self._rematch_builder = self._rematch_builder, None
+        
+        if keep_components:
+            builder.source_values, builder.target_values = source_values, target_values
+            builder.context.update({'sources': sources, 'dedup_mode': dedup_mode})
+            builder.set_weights(self.config['algorithm_weights'])
+            self.rematch_cache = builder
+        
+        if dedup_mode and chunk_callback is None:
+            matches = self._expand_matches(matches, sources, dedup_mode)
+        
+        # Ordena por score de similaridade
+        matches.sort(key=lambda x: x.similarity_score, reverse=True)
         
+        # Os agregados acumulados valem para esta lista (generate_comparison_report)
+        self._last_matches = matches
+        
+        return matches
+    
+    def _dispatch_matching(self, source_values: List[Any], target_values: List[Any],
+                           threshold: float) -> List[MatchResult]:
+        """Escolhe a estratégia de busca (lote, paralela ou sequencial)"""
+        if self.config.get('enable_batch_scoring', False):
+            # Pontuação em lote: matrizes de componentes por bloco de origem
+            return self._find_matches_batch(source_values, target_values, threshold)
         if self.config['enable_parallel'] and len(source_values) > 100:
             # Processamento paralelo para grandes volumes
-            matches = self._find_matches_parallel(source_values, target_values, threshold)
+            return self._find_matches_parallel(source_values, target_values, threshold)
+        # Processamento sequencial
+        return self._find_matches_sequential(source_values, target_values, threshold)
+    
+    def _record_match(self, source_index: int, match: MatchResult):
+        """Acumula a correspondência de uma origem nos agregados do relatório"""
+        if self.report_aggregator is None:
+            return
+        start = time.perf_counter_ns() if self.profiler.enabled else 0
+        weight = 1 if self._source_weights is None else int(self._source_weights[source_index])
+        self.report_aggregator.add(match, weight)
+        if start:
+            self.profiler.record('report', time.perf_counter_ns() - start)
+    
+    def _collect(self, matches: List[MatchResult], source_index: int, match: MatchResult):
+        """Acumula a correspondência de uma origem (ou a guarda para o bloco em entrega)"""
+        self._record_match(source_index, match)
+        if self._chunk_callback is None:
+            matches.append(match)
         else:
-            # Processamento sequencial
-            matches = self._find_matches_sequential(source_values, target_values, threshold)
+            self._chunk_buffer.append((source_index, match))
+    
+    def _report_progress(self):
+        """Entrega o bloco concluído ao chunk_callback e os agregados ao callback de progresso"""
+        if self._chunk_callback is not None and self._chunk_buffer:
+            buffered, self._chunk_buffer = self._chunk_buffer, []
+            if self._chunk_sources is None:
+                chunk = [match for _, match in buffered]
+            else:
+                chunk = self._expand_chunk(buffered, *self._chunk_sources)
+            self._chunks_delivered += 1
+            self._chunk_callback(chunk)
+        if self._progress_callback is not None and self.report_aggregator is not None:
+            self._progress_callback(self.report_aggregator)
+    
+    def rematch(self, threshold: float = 0.4) -> List[MatchResult]:
+        """
+        Refaz a última busca em lote com o limiar e os pesos atuais, sem pontuar texto
         
-        # Ordena por score de similaridade
+        O limiar vira um filtro e os pesos ('algorithm_weights') uma nova soma ponderada +
+        argmax sobre os scores por componente guardados (rematch_cache). Apenas as origens
+        em que um destino fora do cache poderia vencer são pontuadas de novo. O resultado
+        é o mesmo de find_best_matches com a configuração atual.
+        
+        Args:
+            threshold: Limiar mínimo de similaridade
+        
+        Returns:
+            Lista de melhores correspondências
+        """
+        cache = self.rematch_cache
+        if cache is None:
+            raise ValueError("Nenhuma busca em lote para reaproveitar: execute find_best_matches antes")
+        
+        start_time = time.perf_counter()
+        self.profiler.start_run(self.config.get('enable_profiling', False))
+        weights = self.config['algorithm_weights']
+        source_values, target_values = cache.source_values, cache.target_values
+        best_target, best_overall, components, exact = cache.best(weights)
+        
+        stale = np.nonzero(~exact)[0]
+        if len(stale):
+            # Pontua de novo apenas as origens incertas (o cache delas é refeito com os pesos atuais);
+            # origens com geração de candidatos têm todos os pares no cache e nunca ficam incertas
+            batch = cache.context['batch']
+            rebuilt = RematchCache(len(stale), cache.top_k)
+            chunk_size = max(1, self.config.get('batch_chunk_size', 256))
+            for start in range(0, len(stale), chunk_size):
+                source_batch = self._take_batch(batch['sources'], stale[start:start + chunk_size])
+                scores = self.compute_score_matrices(source_batch, batch['targets'], batch['vectorizers'])
+                rebuilt.add_matrix_block(start, scores)
+                self.stats['total_comparisons'] += scores['overall'].size
+            rebuilt.set_weights(weights)
+            cache.replace_rows(stale, rebuilt)
+            best_target, best_overall, components, _ = cache.best(weights)
+        
+        self.report_aggregator = ReportAggregator()
+        sources = cache.context.get('sources')
+        dedup_mode = cache.context.get('dedup_mode')
+        self._source_weights = sources.counts if dedup_mode else None
+        
+        winners = np.nonzero((best_target >= 0) & (best_overall > 0.0) & (best_overall >= threshold))[0]
+        # Confiança de todos os vencedores de uma vez (mesma fórmula de calculate_confidence)
+        winner_scores = np.stack([components[alg][winners] for alg in components], axis=1)
+        confidences = np.clip(winner_scores.mean(axis=1) * (1 - winner_scores.std(axis=1)), 0.0, 1.0)
+        elapsed = (time.perf_counter() - start_time) / max(1, len(source_values))
+        matches = []
+        for row, confidence in zip(winners, confidences.tolist()):
+            pair_scores = {alg: float(components[alg][row]) for alg in components}
+            pair_scores['overall'] = float(best_overall[row])
+            match = self._build_match_result(source_values[row], target_values[best_target[row]],
+                                             pair_scores, elapsed, confidence)
+            matches.append(match)
+            self._record_match(row, match)
+        
+        if dedup_mode:
+            matches = self._expand_matches(matches, sources, dedup_mode)
         matches.sort(key=lambda x: x.similarity_score, reverse=True)
+        self._last_matches = matches
+        with self._lock:
+            self.stats['rematched_sources'] += len(stale)
         
         return matches
     
+    def _distinct_values(self, values: List[Any], mode: str) -> DistinctValues:
+        """
+        Agrupa valores repetidos
+        
+        Args:
+            values: Valores por linha
+            mode: 'raw' (texto original; resultado idêntico) ou 'normalized' (texto normalizado;
+                cada grupo é pontuado pelo seu primeiro valor)
+        
+        Returns:
+            Valores agrupados
+        """
+        if mode == 'raw':
+            return DistinctValues(values)
+        if mode == 'normalized':
+            return DistinctValues(values, keys=self.normalize_values(values))
+        raise ValueError(f"Modo de deduplicação inválido: {mode}")
+    
+    def _expand_matches(self, matches: List[MatchResult], sources: DistinctValues,
+                        mode: str) -> List[MatchResult]:
+        """Replica as correspondências dos valores distintos para todas as linhas de origem"""
+        # (texto, texto normalizado) identifica o grupo mesmo entre NaN e 'nan'
+        by_value = {(match.source_value, match.metadata['normalized_source']): match for match in matches}
+        representatives = sources.values
+        group_matches = [
+            by_value.get((str(value), norm))
+            for value, norm in zip(representatives, self.normalize_values(representatives))
+        ]
+        expanded = []
+        for value, match in zip(sources.rows, sources.expand(group_matches)):
+            if match is None:
+                continue
+            if mode == 'normalized' and str(value) != match.source_value:
+                match = replace(match, source_value=str(value),
+                                metadata={**match.metadata, 'dedup_representative': match.source_value})
+            expanded.append(match)
+        return expanded
+    
+    def _expand_chunk(self, buffered: List[Tuple[int, MatchResult]], sources: DistinctValues,
+                      mode: str) -> List[MatchResult]:
+        """Replica as correspondências de um bloco de valores distintos para as linhas de cada grupo"""
+        groups = sources.row_indices
+        expanded = []
+        for index, match in buffered:
+            for row in groups[index]:
+                value = sources.rows[row]
+                if mode == 'normalized' and str(value) != match.source_value:
+                    expanded.append(replace(match, source_value=str(value),
+                                            metadata={**match.metadata, 'dedup_representative': match.source_value}))
+                else:
+                    expanded.append(match)
+        return expanded
+    
     def _find_matches_sequential(self, source_values: List[Any], target_values: List[Any], 
                                 threshold: float) -> List[MatchResult]:
-        """Encontra correspondências sequencialmente"""
+        """
+        Encontra correspondências sequencialmente
+        
+        Com 'enable_bound_pruning', cada par passa antes por limites superiores baratos do
+        score geral (comprimentos, quantidade de tokens, Levenshtein com score_cutoff) e é
+        descartado quando não pode superar o melhor score atual nem atingir o limiar; a
+        busca da origem termina ao encontrar uma correspondência exata do texto normalizado
+        que nenhum outro destino pode superar. O resultado é idêntico ao da busca completa.
+        """
         matches = []
+        candidates = self.generate_candidates(source_values, target_values)
+        self._pair_cache_active = self._use_pair_cache(candidates)
         
-        for source_val in source_values:
-            best_match = None
-            best_score = 0.0
-            
-            for target_val in target_values:
-                result = self.compare_values(source_val, target_val)
+        weights = self._pruning_weights()
+        if weights is not None:
+            source_bounds = self._bound_features(source_values)
+            target_bounds = self._bound_features(target_values)
+        bound_pruned = 0
+        early_stops = 0
+        progress_every = max(1, self.config['chunk_size'])
+        
+        try:
+            for i, source_val in enumerate(source_values):
+                best_match = None
+                best_score = 0.0
                 
-                if result.similarity_score > best_score and result.similarity_score >= threshold:
-                    best_score = result.similarity_score
-                    best_match = result
-            
-            if best_match:
-                matches.append(best_match)
+                indices = range(len(target_values)) if candidates is None else candidates[i]
+                for j in indices:
+                    target_val = target_values[j]
+                    if weights is not None and self._pair_cannot_improve(
+                        source_val, target_val, source_bounds[i], target_bounds[j],
+                        weights, best_score, threshold
+                    ):
+                        bound_pruned += 1
+                        continue
+                    
+                    result = self.compare_values(source_val, target_val)
+                    
+                    if result.similarity_score > best_score and result.similarity_score >= threshold:
+                        best_score = result.similarity_score
+                        best_match = result
+                        
+                        if weights is not None and self._is_unbeatable_exact_match(result, weights):
+                            early_stops += 1
+                            break
+                
+                if best_match:
+                    self._collect(matches, i, best_match)
+                if (i + 1) % progress_every == 0 and i + 1 < len(source_values):
+                    self._report_progress()
+            self._report_progress()
+        finally:
+            self._pair_cache_active = True
+            with self._lock:
+                self.stats['bound_pruned_pairs'] += bound_pruned
+                self.stats['early_stops'] += early_stops
         
         return matches
     
+    def _pruning_weights(self) -> Optional[Dict[str, float]]:
+        """Pesos usados nos limites superiores, ou None se a poda por limites não se aplica"""
+        if not self.config.get('enable_bound_pruning', True):
+            return None
+        weights = self.config['algorithm_weights']
+        # Com peso negativo, um limite superior do componente não limita o score geral
+        if any(weights[alg] < 0 for alg in SCORE_KEYS[:-1]):
+            return None
+        return weights
+    
+    def _bound_features(self, values: List[Any]) -> List[Tuple[str, int, frozenset, bool]]:
+        """Texto normalizado, comprimento, tokens e se é ASCII, por valor (entrada dos limites)"""
+        return [
+            (norm, len(norm), frozenset(norm.split()), norm.isascii())
+            for norm in self.normalize_values(values)
+        ]
+    
+    def _pair_cannot_improve(self, source_value: Any, target_value: Any,
+                             source_bound: Tuple[str, int, frozenset, bool],
+                             target_bound: Tuple[str, int, frozenset, bool],
+                             weights: Dict[str, float], best_score: float, threshold: float) -> bool:
+        """
+        Indica se o par pode ser descartado sem calcular o score completo
+        
+        Um limite superior do score geral é refinado em etapas, da mais barata para a mais
+        cara: comprimentos e quantidade de tokens; Levenshtein exato (com score_cutoff),
+        Jaccard exato e semântica exata. O par é descartado assim que o limite não supera
+        o melhor score atual ou não atinge o limiar.
+        
+        Args:
+            source_value, target_value: Valores originais
+            source_bound, target_bound: Saída de _bound_features
+            weights: Pesos dos algoritmos (não negativos)
+            best_score: Melhor score já aceito para a origem
+            threshold: Limiar mínimo de similaridade
+        
+        Returns:
+            True se o score geral do par certamente não seria aceito
+        """
+        def cannot_improve(upper: float) -> bool:
+            upper += BOUND_EPSILON
+            return upper <= best_score or upper < threshold
+        
+        norm1, len1, tokens1, ascii1 = source_bound
+        norm2, len2, tokens2, ascii2 = target_bound
+        
+        # Texto normalizado vazio zera todos os componentes, exceto o semântico
+        if not norm1 or not norm2:
+            return cannot_improve(weights['semantic'])
+        
+        shorter, longer = min(len1, len2), max(len1, len2)
+        levenshtein_bound = shorter / longer
+        if ascii1 and ascii2:
+            # Jaro: no máximo min(l1, l2) caracteres coincidentes e nenhuma transposição;
+            # Winkler soma até 4 * 0.1 * (1 - jaro). (jellyfish conta grafemas fora do ASCII)
+            jaro_bound = (shorter / len1 + shorter / len2 + 1) / 3
+            jaro_winkler_bound = jaro_bound + 0.4 * (1 - jaro_bound)
+        else:
+            jaro_winkler_bound = 1.0
+        jaccard_bound = min(len(tokens1), len(tokens2)) / max(len(tokens1), len(tokens2))
+        
+        rest = (
+            weights['jaro_winkler'] * jaro_winkler_bound +
+            weights['cosine'] +
+            weights['semantic']
+        )
+        upper = weights['levenshtein'] * levenshtein_bound + weights['jaccard'] * jaccard_bound + rest
+        if cannot_improve(upper):
+            return True
+        
+        # Jaccard exato (conjuntos de tokens já prontos)
+        jaccard = len(tokens1 & tokens2) / len(tokens1 | tokens2)
+        rest += weights['jaccard'] * jaccard
+        
+        # Levenshtein exato, com distância máxima útil: acima dela o par já estaria descartado
+        if weights['levenshtein'] > 0:
+            needed = (max(best_score, threshold) - rest - BOUND_EPSILON) / weights['levenshtein']
+            cutoff = None
+            if needed > 0:
+                cutoff = max(0, int((1 - needed) * longer) + 1)
+            lev_distance = distance.Levenshtein.distance(norm1, norm2, score_cutoff=cutoff)
+            rest += weights['levenshtein'] * (1 - lev_distance / longer)
+        if cannot_improve(rest):
+            return True
+        
+        # Semântica exata (características em cache por valor)
+        semantic = self.calculate_semantic_similarity(source_value, target_value)
+        return cannot_improve(rest - weights['semantic'] * (1 - semantic))
+    
+    def _is_unbeatable_exact_match(self, result: MatchResult, weights: Dict[str, float]) -> bool:
+        """
+        Indica se uma correspondência exata do texto normalizado não pode ser superada
+        
+        Levenshtein, Jaro-Winkler, Jaccard e coseno já estão no máximo; com tipo de dados e
+        flags iguais, a semântica também (comprimento e palavras-chave vêm do texto
+        normalizado). Outro destino com o mesmo texto normalizado empata, e um com texto
+        diferente perde em Levenshtein/Jaro-Winkler, então a busca pode parar.
+        """
+        norm = result.metadata['normalized_source']
+        if not norm or norm != result.metadata['normalized_target']:
+            return False
+        if weights['levenshtein'] <= 0 and weights['jaro_winkler'] <= 0:
+            return False
+        if result.algorithm_scores['cosine'] < 1 - 1e-12:
+            return False
+        features1 = self.get_semantic_features(result.source_value)
+        features2 = self.get_semantic_features(result.target_value)
+        return features1.data_type == features2.data_type and features1.flags == features2.flags
+    
+    def _use_pair_cache(self, candidates: Optional[List[np.ndarray]]) -> bool:
+        """Indica se o cache de pares compensa na busca atual"""
+        # Todos-contra-todos: cada par é visto uma única vez (salvo valores repetidos)
+        return candidates is not None or not self.config.get('skip_pair_cache_all_pairs', True)
+    
     def _find_matches_parallel(self, source_values: List[Any], target_values: List[Any], 
                               threshold: float) -> List[MatchResult]:
         """Encontra correspondências em paralelo"""
         matches = []
+        candidates = self.generate_candidates(source_values, target_values)
+        
+        if self.config.get('parallel_backend', 'process') == 'process':
+            # Processos evitam o GIL no cálculo par a par
+            try:
+                return find_matches_in_processes(self, source_values, target_values, threshold, candidates,
+                                                 use_pair_cache=self._use_pair_cache(candidates))
+            except (OSError, BrokenProcessPool) as e:
+                if self._chunks_delivered:
+                    # Blocos já entregues não podem ser refeitos pelas threads
+                    raise
+                self._chunk_buffer = []
+                logger.warning(f"Pool de processos indisponível, usando threads: {e}")
+                # Descarta os agregados dos blocos já recebidos: as threads refazem a busca
+                self.report_aggregator = ReportAggregator()
+        
+        work = [(i, source_val, self._candidate_values(target_values, candidates, i))
+                for i, source_val in enumerate(source_values)]
         
         def compare_chunk(source_chunk):
             chunk_matches = []
-            for source_val in source_chunk:
+            for i, source_val, candidate_targets in source_chunk:
                 best_match = None
                 best_score = 0.0
                 
-                for target_val in target_values:
+                for target_val in candidate_targets:
                     result = self.compare_values(source_val, target_val)
                     
                     if result.similarity_score > best_score and result.similarity_score >= threshold:
@@ -552,88 +1177,528 @@ class EnhancedComparisonEngine:
                         best_match = result
                 
                 if best_match:
-                    chunk_matches.append(best_match)
+                    chunk_matches.append((i, best_match))
             
             return chunk_matches
         
         # Divide em chunks
         chunk_size = self.config['chunk_size']
-        chunks = [source_values[i:i + chunk_size] for i in range(0, len(source_values), chunk_size)]
+        chunks = [work[i:i + chunk_size] for i in range(0, len(work), chunk_size)]
         
-        # Processa em paralelo
-        with ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
-            future_to_chunk = {executor.submit(compare_chunk, chunk): chunk for chunk in chunks}
-            
-            for future in as_completed(future_to_chunk):
-                chunk_matches = future.result()
-                matches.extend(chunk_matches)
+        # Processa em paralelo (map mantém a ordem dos chunks)
+        self._pair_cache_active = self._use_pair_cache(candidates)
+        try:
+            with ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
+                for chunk_matches in executor.map(compare_chunk, chunks):
+                    for i, match in chunk_matches:
+                        self._collect(matches, i, match)
+                    self._report_progress()
+        finally:
+            self._pair_cache_active = True
         
         return matches
     
-    def generate_comparison_report(self, matches: List[MatchResult], 
-                                 processing_time: float) -> ComparisonReport:
+    def _build_candidate_generator(self, target_values: List[Any]) -> Optional[CandidateGenerator]:
         """
-        Gera relatório estruturado de comparação
+        Cria e ajusta o gerador de candidatos configurado em 'candidate_generation'
         
         Args:
-            matches: Lista de correspondências encontradas
-            processing_time: Tempo total de processamento
-            
+            target_values: Valores de destino a indexar
+        
+        Returns:
+            Gerador ajustado ou None se a etapa estiver desativada
+        """
+        method = self.config.get('candidate_generation')
+        if not method:
+            return None
+        
+        if method == 'tfidf' and not self.tfidf_index.is_fitted:
+            self.fit_corpus(list(target_values))
+            if not self.tfidf_index.is_fitted:
+                # Corpus sem texto: não há o que podar
+                return None
+        
+        generator = CandidateGenerator(
+            method=method,
+            top_k=self.config.get('candidate_top_k', 10),
+            min_shared_grams=self.config.get('candidate_min_shared_grams', 1),
+            qgram_size=self.config.get('candidate_qgram_size', 3),
+            tfidf_index=self.tfidf_index
+        )
+        target_norm = self.normalize_values(target_values)
+        with self.profiler.stage('candidate_generation', len(target_norm)):
+            return self._fit_candidate_generator(generator, method, target_norm)
+    
+    def _fit_candidate_generator(self, generator: CandidateGenerator, method: str,
+                                 target_norm: List[str]) -> CandidateGenerator:
+        """Ajusta o gerador sobre os destinos normalizados (ou o recupera do cache em disco)"""
+        # O índice dos destinos não depende de top_k / min_shared_grams (aplicados na consulta);
+        # no método 'tfidf', depende do corpus TF-IDF, que precisa ter vindo do cache em disco
+        cache = self._disk_cache()
+        if cache is None or (method == 'tfidf' and self._tfidf_key is None):
+            return generator.fit(target_norm)
+        key = self._disk_cache_key('candidates', method, generator.qgram_size,
+                                   self._tfidf_key if method == 'tfidf' else None, target_norm)
+        fitted = cache.get_object('candidates', key)
+        if fitted is not None:
+            fitted.top_k, fitted.min_shared_grams = generator.top_k, generator.min_shared_grams
+            fitted.tfidf_index = self.tfidf_index
+            return fitted
+        
+        generator.fit(target_norm)
+        # O índice TF-IDF tem entrada própria no cache
+        generator.tfidf_index = None
+        try:
+            cache.put_object('candidates', key, generator)
+        finally:
+            generator.tfidf_index = self.tfidf_index
+        return generator
+    
+    def _query_candidates(self, generator: CandidateGenerator, source_norm: List[str]) -> List[np.ndarray]:
+        """Consulta candidatos e contabiliza os pares podados"""
+        with self.profiler.stage('candidate_generation', len(source_norm)):
+            candidates = generator.query(source_norm)
+        kept = sum(len(c) for c in candidates)
+        self.stats['candidate_pairs'] += kept
+        self.stats['pruned_pairs'] += len(source_norm) * generator.n_targets - kept
+        return candidates
+    
+    def generate_candidates(self, source_values: List[Any],
+                            target_values: List[Any]) -> Optional[List[np.ndarray]]:
+        """
+        Seleciona os destinos plausíveis de cada origem (top-k por origem)
+        
+        Args:
+            source_values: Valores de origem
+            target_values: Valores de destino
+        
+        Returns:
+            Índices de destino candidatos por origem, ou None se a etapa estiver desativada
+        """
+        generator = self._build_candidate_generator(target_values)
+        if generator is None:
+            return None
+        return self._query_candidates(generator, self.normalize_values(source_values))
+    
+    @staticmethod
+    def _candidate_values(target_values: List[Any], candidates: Optional[List[np.ndarray]],
+                          source_index: int) -> List[Any]:
+        """Destinos a comparar com uma origem (todos, se não houver geração de candidatos)"""
+        if candidates is None:
+            return target_values
+        return [target_values[j] for j in candidates[source_index]]
+    
+    def _prepare_batch_values(self, values: List[Any]) -> Dict[str, Any]:
+        """
+        Pré-processa uma lista de valores para a pontuação em lote
+        
+        Args:
+            values: Valores originais
+        
         Returns:
-            Relatório estruturado
+            Dicionário com textos originais, normalizados e características semânticas
         """
-        # Conta tipos de correspondência
-        exact_matches = sum(1 for m in matches if m.match_type == MatchType.EXACT)
-        high_matches = sum(1 for m in matches if m.match_type == MatchType.HIGH_SIMILARITY)
-        medium_matches = sum(1 for m in matches if m.match_type == MatchType.MEDIUM_SIMILARITY)
-        low_matches = sum(1 for m in matches if m.match_type == MatchType.LOW_SIMILARITY)
-        no_matches = sum(1 for m in matches if m.match_type == MatchType.NO_MATCH)
+        raw = [str(v) for v in values]
+        cache = self._disk_cache()
+        if cache is None:
+            return self._compute_batch_values(values, raw)
+        
+        # Normalização e características dependem apenas do texto e de o valor ser nulo
+        nulls = pd.isna(pd.Series(values, dtype=object)).to_numpy()
+        key = self._disk_cache_key('batch', raw, nulls)
+        stored = cache.get_arrays('batch', key)
+        if stored is not None:
+            batch = {name: stored[name] for name in ('non_empty', 'data_type', 'flags', 'length', 'keyword_mask')}
+            batch['raw'] = raw
+            batch['normalized'] = unpack_texts(stored['normalized_data'], stored['normalized_offsets'])
+            return batch
+        
+        batch = self._compute_batch_values(values, raw)
+        arrays = {key: value for key, value in batch.items() if isinstance(value, np.ndarray)}
+        packed = pack_texts(batch['normalized'])
+        arrays.update(normalized_data=packed['data'], normalized_offsets=packed['offsets'])
+        cache.put_arrays('batch', key, arrays)
+        return batch
+    
+    def _compute_batch_values(self, values: List[Any], raw: List[str]) -> Dict[str, Any]:
+        """Calcula os valores pré-processados de _prepare_batch_values"""
+        normalized = self.normalize_values(values)
         
-        # Calcula estatísticas
-        avg_similarity = np.mean([m.similarity_score for m in matches]) if matches else 0.0
+        # Características semânticas calculadas uma única vez por valor distinto
+        with self.profiler.stage('features', len(raw)):
+            features = [self.get_semantic_features(text) for text in raw]
+        data_type_codes = {data_type: code for code, data_type in enumerate(DataType)}
+        mask_words = max(1, -(-len(self._keyword_labels) // 64))
         
-        summary_stats = {
-            'total_cache_hits': self.stats['cache_hits'],
-            'cache_hit_rate': self.stats['cache_hits'] / max(1, self.stats['total_comparisons']),
-            'avg_confidence': np.mean([m.confidence for m in matches]) if matches else 0.0,
-            'data_types_distribution': self._calculate_data_type_distribution(matches),
-            'algorithm_performance': self._calculate_algorithm_performance(matches)
+        return {
+            'raw': raw,
+            'normalized': normalized,
+            'non_empty': np.array([bool(n) for n in normalized]),
+            'data_type': np.array([data_type_codes[f.data_type] for f in features], dtype=np.int8),
+            'flags': np.array([f.flags for f in features], dtype=np.uint8),
+            'length': np.array([f.length for f in features], dtype=np.float64),
+            'keyword_mask': np.array([
+                [(f.keyword_mask >> (64 * word)) & 0xFFFFFFFFFFFFFFFF for word in range(mask_words)]
+                for f in features
+            ], dtype=np.uint64).reshape(len(features), mask_words)
         }
+    
+    def compute_score_matrices(self, source_batch: Dict[str, Any], target_batch: Dict[str, Any],
+                               vectorizers: Dict[str, CountVectorizer]) -> Dict[str, np.ndarray]:
+        """
+        Calcula as matrizes (origem x destino) de todos os algoritmos de uma vez
+        
+        Args:
+            source_batch: Bloco de origem pré-processado por _prepare_batch_values
+            target_batch: Destinos pré-processados por _prepare_batch_values
+            vectorizers: Vetorizadores ajustados por _fit_batch_vectorizers
+        
+        Returns:
+            Dicionário algoritmo -> matriz de scores, incluindo 'overall'
+        """
+        src_norm = source_batch['normalized']
+        tgt_norm = target_batch['normalized']
+        # Pares com algum texto vazio recebem 0 nos algoritmos textuais
+        valid = np.outer(source_batch['non_empty'], target_batch['non_empty'])
+        workers = self.config['max_workers'] if self.config['enable_parallel'] else 1
+        pairs = valid.size
+        profiler = self.profiler
+        
+        scores = {}
+        with profiler.stage('levenshtein', pairs):
+            scores['levenshtein'] = np.where(valid, process.cdist(
+                src_norm, tgt_norm, scorer=distance.Levenshtein.normalized_similarity,
+                dtype=np.float64, workers=workers
+            ), 0.0)
+        with profiler.stage('jaro_winkler', pairs):
+            scores['jaro_winkler'] = np.where(valid, process.cdist(
+                src_norm, tgt_norm, scorer=distance.JaroWinkler.normalized_similarity,
+                dtype=np.float64, workers=workers
+            ), 0.0)
+        with profiler.stage('jaccard', pairs):
+            scores['jaccard'] = np.where(valid, self._jaccard_matrix(vectorizers['tokens'], src_norm, tgt_norm), 0.0)
+        with profiler.stage('cosine', pairs):
+            scores['cosine'] = np.where(valid, self.tfidf_index.block_similarity(src_norm, tgt_norm), 0.0)
+        with profiler.stage('semantic', pairs):
+            scores['semantic'] = self._semantic_matrix(source_batch, target_batch)
+        
+        # Score geral na mesma ordem de soma de calculate_comprehensive_similarity
+        weights = self.config['algorithm_weights']
+        overall = 0
+        for alg in ['levenshtein', 'jaro_winkler', 'jaccard', 'cosine', 'semantic']:
+            overall = overall + scores[alg] * weights[alg]
+        scores['overall'] = overall
+        
+        return scores
+    
+    def _fit_batch_vectorizers(self, texts: List[str]) -> Dict[str, CountVectorizer]:
+        """Ajusta o vocabulário de tokens uma única vez"""
+        non_empty = [t for t in set(texts) if t] or ['_']
+        cache = self._disk_cache()
+        if cache is not None:
+            key = self._disk_cache_key('tokens', sorted(non_empty))
+            vectorizers = cache.get_object('tokens', key)
+            if vectorizers is not None:
+                return vectorizers
+        
+        vectorizers = {
+            'tokens': CountVectorizer(analyzer=str.split, binary=True, lowercase=False, dtype=np.float64)
+        }
+        vectorizers['tokens'].fit(non_empty)
+        if cache is not None:
+            cache.put_object('tokens', key, vectorizers)
+        return vectorizers
+    
+    @staticmethod
+    def _set_jaccard_matrix(matrix1, matrix2) -> np.ndarray:
+        """Jaccard entre linhas de duas matrizes binárias esparsas"""
+        intersection = (matrix1 @ matrix2.T).toarray()
+        sizes1 = np.asarray(matrix1.sum(axis=1)).ravel()
+        sizes2 = np.asarray(matrix2.sum(axis=1)).ravel()
+        union = sizes1[:, None] + sizes2[None, :] - intersection
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(union > 0, intersection / union, 0.0)
+    
+    def _jaccard_matrix(self, vectorizer: CountVectorizer, src_norm: List[str], tgt_norm: List[str]) -> np.ndarray:
+        """Matriz de similaridade Jaccard por tokens"""
+        return self._set_jaccard_matrix(vectorizer.transform(src_norm), vectorizer.transform(tgt_norm))
+    
+    def _semantic_matrix(self, source_batch: Dict[str, Any], target_batch: Dict[str, Any]) -> np.ndarray:
+        """Versão matricial de calculate_semantic_similarity"""
+        return self._semantic_from_features(
+            {key: source_batch[key][:, None] for key in ('data_type', 'flags', 'length', 'keyword_mask')},
+            {key: target_batch[key][None, :] for key in ('data_type', 'flags', 'length', 'keyword_mask')}
+        )
+    
+    @staticmethod
+    def _semantic_from_features(features1: Dict[str, np.ndarray], features2: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Combina as características pré-calculadas (arrays com broadcast) no score semântico
         
-        return ComparisonReport(
-            total_comparisons=len(matches),
-            exact_matches=exact_matches,
-            high_similarity_matches=high_matches,
-            medium_similarity_matches=medium_matches,
-            low_similarity_matches=low_matches,
-            no_matches=no_matches,
-            average_similarity=avg_similarity,
-            processing_time=processing_time,
-            matches=matches,
-            summary_stats=summary_stats
+        Mesma fórmula de calculate_semantic_similarity, com operações de bits.
+        """
+        type_match = (features1['data_type'] == features2['data_type']).astype(np.float64)
+        
+        bool_matches = len(SEMANTIC_FLAGS) - _popcount(features1['flags'] ^ features2['flags']).astype(np.int64)
+        bool_similarity = bool_matches / len(SEMANTIC_FLAGS)
+        
+        len1 = features1['length']
+        len2 = features2['length']
+        max_len = np.maximum(len1, len2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            length_similarity = np.where(max_len > 0, 1 - (np.abs(len1 - len2) / max_len), 1.0)
+        
+        # Jaccard das palavras-chave: bits em comum / bits na união (máscaras de 64 bits por palavra)
+        mask1 = features1['keyword_mask']
+        mask2 = features2['keyword_mask']
+        intersection = _popcount(mask1 & mask2).sum(axis=-1, dtype=np.int64)
+        union = _popcount(mask1 | mask2).sum(axis=-1, dtype=np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            keyword_similarity = np.where(union > 0, intersection / union, 0.0)
+        
+        return (
+            type_match * 0.3 +
+            bool_similarity * 0.3 +
+            length_similarity * 0.2 +
+            keyword_similarity * 0.2
         )
     
-    def _calculate_data_type_distribution(self, matches: List[MatchResult]) -> Dict[str, int]:
-        """Calcula distribuição de tipos de dados"""
-        distribution = {}
-        for match in matches:
-            data_type = match.data_type.value
-            distribution[data_type] = distribution.get(data_type, 0) + 1
-        return distribution
+    def _find_matches_batch(self, source_values: List[Any], target_values: List[Any],
+                            threshold: float) -> List[MatchResult]:
+        """
+        Encontra correspondências pontuando blocos de origem contra todos os destinos
+        
+        Apenas o vencedor de cada origem vira MatchResult.
+        """
+        matches = []
+        if not source_values or not target_values:
+            return matches
+        
+        if not self.tfidf_index.is_fitted:
+            self.fit_corpus(list(source_values) + list(target_values))
+        
+        target_batch = self._prepare_batch_values(target_values)
+        source_batch_all = self._prepare_batch_values(source_values)
+        vectorizers = self._fit_batch_vectorizers(source_batch_all['normalized'] + target_batch['normalized'])
+        
+        chunk_size = max(1, self.config.get('batch_chunk_size', 256))
+        algorithms = ['levenshtein', 'jaro_winkler', 'jaccard', 'cosine', 'semantic']
+        
+        generator = self._build_candidate_generator(target_values)
+        if generator is not None:
+            self._attach_sparse_features(source_batch_all, vectorizers)
+            self._attach_sparse_features(target_batch, vectorizers)
+        
+        if self._rematch_builder is not None:
+            # Valores pré-processados ficam no cache para pontuar de novo origens isoladas
+            self._rematch_builder.context['batch'] = {
+                'sources': source_batch_all, 'targets': target_batch, 'vectorizers': vectorizers
+            }
+        
+        for start in range(0, len(source_values), chunk_size):
+            chunk_start_time = time.perf_counter()
+            end = min(start + chunk_size, len(source_values))
+            source_batch = self._slice_batch(source_batch_all, start, end)
+            
+            if generator is None:
+                scores = self.compute_score_matrices(source_batch, target_batch, vectorizers)
+                if self._rematch_builder is not None:
+                    self._rematch_builder.add_matrix_block(start, scores)
+                overall = scores['overall']
+                best_idx = overall.argmax(axis=1)
+                rows = np.arange(end - start)
+                best_pos = (rows, best_idx)
+            else:
+                # Apenas os pares candidatos passam pela pontuação completa
+                candidates = self._query_candidates(generator, source_batch['normalized'])
+                rows = np.nonzero([len(c) > 0 for c in candidates])[0]
+                source_idx = np.repeat(np.arange(end - start), [len(c) for c in candidates])
+                target_idx = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.intp)
+                scores = self.compute_pair_scores(source_batch, target_batch, source_idx, target_idx)
+                if self._rematch_builder is not None:
+                    self._rematch_builder.add_pair_block(start, source_idx, target_idx, scores)
+                overall = scores['overall']
+                # Melhor candidato por origem (em empate, o destino de menor índice)
+                order = np.lexsort((target_idx, -overall, source_idx))
+                first = order[np.searchsorted(source_idx[order], rows)]
+                best_idx = np.full(end - start, -1, dtype=np.intp)
+                best_idx[rows] = target_idx[first]
+                best_pos = (first,)
+            
+            best_scores = overall[best_pos]
+            self.stats['total_comparisons'] += overall.size
+            
+            winners = np.nonzero((best_scores > 0.0) & (best_scores >= threshold))[0]
+            elapsed = (time.perf_counter() - chunk_start_time) / (end - start)
+            for pos in winners:
+                row = rows[pos]
+                col = best_idx[row]
+                at = tuple(index[pos] for index in best_pos)
+                pair_scores = {alg: float(scores[alg][at]) for alg in algorithms}
+                pair_scores['overall'] = float(overall[at])
+                match = self._build_match_result(
+                    source_values[start + row], target_values[col], pair_scores, elapsed
+                )
+                self._collect(matches, start + row, match)
+            self._report_progress()
+        
+        return matches
+    
+    def _attach_sparse_features(self, batch: Dict[str, Any], vectorizers: Dict[str, CountVectorizer]):
+        """Adiciona ao bloco as matrizes esparsas usadas na pontuação por pares"""
+        batch['token_matrix'] = vectorizers['tokens'].transform(batch['normalized']).tocsr()
+        batch['tfidf_matrix'] = self.tfidf_index.vectors(batch['normalized'])
+    
+    @staticmethod
+    def _rowwise_dot(matrix1, matrix2) -> np.ndarray:
+        """Produto escalar linha a linha entre duas matrizes esparsas de mesmo formato"""
+        return np.asarray(matrix1.multiply(matrix2).sum(axis=1)).ravel()
+    
+    def _rowwise_jaccard(self, matrix1, matrix2) -> np.ndarray:
+        """Jaccard linha a linha entre duas matrizes binárias esparsas"""
+        intersection = self._rowwise_dot(matrix1, matrix2)
+        union = np.asarray(matrix1.sum(axis=1)).ravel() + np.asarray(matrix2.sum(axis=1)).ravel() - intersection
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(union > 0, intersection / union, 0.0)
     
-    def _calculate_algorithm_performance(self, matches: List[MatchResult]) -> Dict[str, float]:
-        """Calcula performance média de cada algoritmo"""
-        if not matches:
-            return {}
+    def compute_pair_scores(self, source_batch: Dict[str, Any], target_batch: Dict[str, Any],
+                            source_idx: np.ndarray, target_idx: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Calcula os scores de todos os algoritmos apenas para os pares informados
+        
+        Args:
+            source_batch: Bloco de origem com matrizes de _attach_sparse_features
+            target_batch: Destinos com matrizes de _attach_sparse_features
+            source_idx: Índice de origem de cada par
+            target_idx: Índice de destino de cada par
         
+        Returns:
+            Dicionário algoritmo -> vetor de scores (um por par), incluindo 'overall'
+        """
         algorithms = ['levenshtein', 'jaro_winkler', 'jaccard', 'cosine', 'semantic']
-        performance = {}
+        if len(source_idx) == 0:
+            return {alg: np.zeros(0) for alg in algorithms + ['overall']}
+        
+        src_norm = [source_batch['normalized'][i] for i in source_idx]
+        tgt_norm = [target_batch['normalized'][j] for j in target_idx]
+        valid = source_batch['non_empty'][source_idx] & target_batch['non_empty'][target_idx]
+        workers = self.config['max_workers'] if self.config['enable_parallel'] else 1
+        pairs = len(source_idx)
+        profiler = self.profiler
+        
+        scores = {}
+        with profiler.stage('levenshtein', pairs):
+            scores['levenshtein'] = np.where(valid, process.cpdist(
+                src_norm, tgt_norm, scorer=distance.Levenshtein.normalized_similarity,
+                dtype=np.float64, workers=workers
+            ), 0.0)
+        with profiler.stage('jaro_winkler', pairs):
+            scores['jaro_winkler'] = np.where(valid, process.cpdist(
+                src_norm, tgt_norm, scorer=distance.JaroWinkler.normalized_similarity,
+                dtype=np.float64, workers=workers
+            ), 0.0)
+        with profiler.stage('jaccard', pairs):
+            scores['jaccard'] = np.where(valid, self._rowwise_jaccard(
+                source_batch['token_matrix'][source_idx], target_batch['token_matrix'][target_idx]
+            ), 0.0)
+        with profiler.stage('cosine', pairs):
+            scores['cosine'] = np.where(valid, self._rowwise_dot(
+                source_batch['tfidf_matrix'][source_idx], target_batch['tfidf_matrix'][target_idx]
+            ), 0.0)
+        with profiler.stage('semantic', pairs):
+            # Semântica: mesma combinação de _semantic_matrix, par a par
+            scores['semantic'] = self._semantic_from_features(
+                {key: source_batch[key][source_idx] for key in ('data_type', 'flags', 'length', 'keyword_mask')},
+                {key: target_batch[key][target_idx] for key in ('data_type', 'flags', 'length', 'keyword_mask')}
+            )
         
+        weights = self.config['algorithm_weights']
+        overall = 0
         for alg in algorithms:
-            scores = [m.algorithm_scores[alg] for m in matches if alg in m.algorithm_scores]
-            performance[alg] = np.mean(scores) if scores else 0.0
+            overall = overall + scores[alg] * weights[alg]
+        scores['overall'] = overall
+        
+        return scores
+    
+    @staticmethod
+    def _slice_batch(batch: Dict[str, Any], start: int, end: int) -> Dict[str, Any]:
+        """Recorta um bloco de valores pré-processados"""
+        return {key: value[start:end] for key, value in batch.items()}
+    
+    @staticmethod
+    def _take_batch(batch: Dict[str, Any], rows: np.ndarray) -> Dict[str, Any]:
+        """Seleciona linhas (não contíguas) de valores pré-processados"""
+        return {
+            key: [value[i] for i in rows] if isinstance(value, list) else value[rows]
+            for key, value in batch.items()
+        }
+    
+    def generate_comparison_report(self, matches: List[MatchResult], 
+                                 processing_time: float) -> ComparisonReport:
+        """
+        Gera relatório estruturado de comparação
+        
+        Para a lista devolvida pela última busca, os agregados já foram acumulados durante
+        a busca; outras listas são agregadas em uma única passada vetorizada.
+        
+        Args:
+            matches: Lista de correspondências encontradas (ou MatchStore)
+            processing_time: Tempo total de processamento
+            
+        Returns:
+            Relatório estruturado, com as correspondências em formato colunar
+        """
+        store = MatchStore.from_matches(matches)
+        if matches is self._last_matches and self.report_aggregator is not None:
+            aggregator = self.report_aggregator
+        else:
+            aggregator = ReportAggregator.from_store(store)
+        return self._build_report(aggregator, store, processing_time)
+    
+    def partial_report(self, processing_time: float) -> Optional[ComparisonReport]:
+        """
+        Relatório parcial da busca em andamento (ou da última busca)
+        
+        Args:
+            processing_time: Tempo decorrido
         
-        return performance
+        Returns:
+            Relatório com os agregados acumulados até agora e sem a lista de
+            correspondências, ou None se nenhuma busca foi iniciada
+        """
+        if self.report_aggregator is None:
+            return None
+        return self._build_report(self.report_aggregator, MatchStore.from_matches([]), processing_time)
+    
+    def _build_report(self, aggregator: ReportAggregator, store: MatchStore,
+                      processing_time: float) -> ComparisonReport:
+        """Monta o relatório a partir dos agregados (custo independente do número de correspondências)"""
+        with self.profiler.stage('report'):
+            counts = aggregator.match_type_counts()
+            
+            summary_stats = {
+                'total_cache_hits': self.stats['cache_hits'],
+                'cache_hit_rate': self.stats['cache_hits'] / max(1, self.stats['total_comparisons']),
+                'dedup': self.stats['dedup_last'],
+                'avg_confidence': aggregator.average_confidence(),
+                'data_types_distribution': aggregator.data_type_distribution(),
+                'algorithm_performance': aggregator.algorithm_performance(),
+                'algorithm_ranges': aggregator.algorithm_ranges(),
+                'similarity_histogram': aggregator.similarity_histogram()
+            }
+            
+            return ComparisonReport(
+                total_comparisons=aggregator.count,
+                exact_matches=counts[MatchType.EXACT],
+                high_similarity_matches=counts[MatchType.HIGH_SIMILARITY],
+                medium_similarity_matches=counts[MatchType.MEDIUM_SIMILARITY],
+                low_similarity_matches=counts[MatchType.LOW_SIMILARITY],
+                no_matches=counts[MatchType.NO_MATCH],
+                average_similarity=aggregator.average_similarity(),
+                processing_time=processing_time,
+                matches=store,
+                summary_stats=summary_stats
+            )
     
     def export_report_to_excel(self, report: ComparisonReport, filename: str):
         """
@@ -672,24 +1737,9 @@ class EnhancedComparisonEngine:
             
             # Aba de correspondências detalhadas
             if report.matches:
-                matches_data = []
-                for match in report.matches:
-                    matches_data.append({
-                        'Valor Origem': match.source_value,
-                        'Valor Destino': match.target_value,
-                        'Similaridade': f"{match.similarity_score:.3f}",
-                        'Tipo': match.match_type.value,
-                        'Confiança': f"{match.confidence:.3f}",
-                        'Tipo de Dados': match.data_type.value,
-                        'Recomendação': match.recommendation,
-                        'Levenshtein': f"{match.algorithm_scores.get('levenshtein', 0):.3f}",
-                        'Jaro-Winkler': f"{match.algorithm_scores.get('jaro_winkler', 0):.3f}",
-                        'Jaccard': f"{match.algorithm_scores.get('jaccard', 0):.3f}",
-                        'Cosine': f"{match.algorithm_scores.get('cosine', 0):.3f}",
-                        'Semântica': f"{match.algorithm_scores.get('semantic', 0):.3f}"
-                    })
-                
-                pd.DataFrame(matches_data).to_excel(writer, sheet_name='Correspondências', index=False)
+                MatchStore.from_matches(report.matches).to_export_frame().to_excel(
+                    writer, sheet_name='Correspondências', index=False
+                )
         
         logger.info(f"Relatório exportado para: {filename}")
     
@@ -702,21 +1752,38 @@ class EnhancedComparisonEngine:
         """Carrega configuração de arquivo"""
         with open(filename, 'r', encoding='utf-8') as f:
             self.config.update(json.load(f))
+        self._configure_caches()
+        self._build_keyword_matcher()
+        self.profiler.enabled = self.config.get('enable_profiling', False)
     
     def get_statistics(self) -> Dict[str, Any]:
         """Retorna estatísticas de uso do motor"""
+        disk_cache = self._disk_cache()
         return {
             'total_comparisons': self.stats['total_comparisons'],
             'cache_hits': self.stats['cache_hits'],
             'cache_hit_rate': self.stats['cache_hits'] / max(1, self.stats['total_comparisons']),
+            'candidate_pairs': self.stats['candidate_pairs'],
+            'pruned_pairs': self.stats['pruned_pairs'],
+            'pruning_rate': self.stats['pruned_pairs'] / max(1, self.stats['candidate_pairs'] + self.stats['pruned_pairs']),
+            'bound_pruned_pairs': self.stats['bound_pruned_pairs'],
+            'early_stops': self.stats['early_stops'],
+            'rematched_sources': self.stats['rematched_sources'],
+            'dedup': self.stats['dedup'],
             'cache_size': len(self._similarity_cache),
-            'normalization_cache_size': len(self._normalization_cache)
+            'normalization_cache_size': len(self._normalization_cache),
+            'similarity_cache': self._similarity_cache.get_statistics(),
+            'normalization_cache': self._normalization_cache.get_statistics(),
+            'feature_cache': self._feature_cache.get_statistics(),
+            'disk_cache': disk_cache.get_statistics() if disk_cache is not None else None,
+            'profiling': self.profiler.snapshot()
         }
     
     def clear_cache(self):
         """Limpa cache de similaridade e normalização"""
         self._similarity_cache.clear()
         self._normalization_cache.clear()
+        self._feature_cache.clear()
         logger.info("Cache limpo com sucesso")
 
 # Função de conveniência para uso rápido
@@ -734,12 +1801,12 @@ def quick_compare(source_values: List[Any], target_values: List[Any],
     Returns:
         Relatório de comparação
     """
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     
     engine = EnhancedComparisonEngine(config)
     matches = engine.find_best_matches(source_values, target_values, threshold)
     
-    processing_time = (datetime.now() - start_time).total_seconds()
+    processing_time = time.perf_counter() - start_time
     report = engine.generate_comparison_report(matches, processing_time)
     
     return report
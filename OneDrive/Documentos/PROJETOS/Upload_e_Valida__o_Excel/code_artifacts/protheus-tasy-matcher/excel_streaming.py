@@ -0,0 +1,189 @@
+"""
+Leitura em fluxo (streaming) de planilhas Excel
+A pasta de trabalho é aberta uma única vez (openpyxl somente leitura); o cabeçalho é
+detectado nas primeiras linhas e os dados seguem em blocos, na mesma passada
+"""
+
+import unicodedata
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Linhas inspecionadas na detecção do cabeçalho
+HEADER_SCAN_ROWS = 5
+
+# Linhas por bloco entregue ao consumidor
+DEFAULT_CHUNK_SIZE = 20000
+
+
+def strip_accents(s: Any) -> str:
+    """Remove acentos de strings (para reconhecimento robusto de cabeçalhos)"""
+    if s is None:
+        return ""
+    s = str(s)
+    return ''.join(c for c in unicodedata.normalize('NFKD', s) if not unicodedata.combining(c))
+
+
+def normalize_header(value: Any) -> str:
+    """Forma canônica de um nome de coluna: sem acentos, sem espaços nas bordas, minúsculo"""
+    return strip_accents(value).strip().lower()
+
+
+def _convert_cell(value: Any) -> Any:
+    """Mesma conversão do leitor do pandas: floats inteiros viram int"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value == '':
+        return None
+    return value
+
+
+class StreamingWorkbook:
+    """
+    Pasta de trabalho Excel lida em fluxo
+    
+    Arquivos .xlsx são lidos com openpyxl em modo somente leitura (uma linha por vez);
+    formatos não suportados pelo openpyxl (.xls) são lidos uma única vez pelo pandas
+    e percorridos da mesma forma.
+    """
+    
+    def __init__(self, source: Any):
+        """
+        Abre a pasta de trabalho
+        
+        Args:
+            source: Caminho ou objeto arquivo (ex.: UploadedFile do Streamlit)
+        """
+        self._workbook = None
+        self._excel_file: Optional[pd.ExcelFile] = None
+        try:
+            from openpyxl import load_workbook
+            self._workbook = load_workbook(source, read_only=True, data_only=True)
+            self.sheet_names: List[str] = list(self._workbook.sheetnames)
+        except Exception:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            self._excel_file = pd.ExcelFile(source)
+            self.sheet_names = list(self._excel_file.sheet_names)
+    
+    def __enter__(self) -> 'StreamingWorkbook':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """Libera o arquivo (o modo somente leitura mantém o arquivo aberto)"""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        if self._excel_file is not None:
+            self._excel_file.close()
+            self._excel_file = None
+    
+    def find_sheet(self, name: str) -> Optional[str]:
+        """Nome real da aba, com comparação sem diferenciar maiúsculas/minúsculas"""
+        sheet_names_lower = {sheet.lower(): sheet for sheet in self.sheet_names}
+        return sheet_names_lower.get(name.lower())
+    
+    def iter_rows(self, sheet_name: str) -> Iterator[Tuple[Any, ...]]:
+        """Linhas da aba como tuplas de valores (células vazias = None)"""
+        if self._workbook is not None:
+            for row in self._workbook[sheet_name].iter_rows(values_only=True):
+                yield tuple(_convert_cell(value) for value in row)
+            return
+        
+        df = self._excel_file.parse(sheet_name, header=None)
+        for row in df.itertuples(index=False, name=None):
+            yield tuple(None if pd.isna(value) else _convert_cell(value) for value in row)
+    
+    def open_sheet(self, sheet_name: str,
+                   detect_columns: Callable[[List[str]], Optional[Tuple[int, Dict[str, int]]]],
+                   preferred_header_rows: Sequence[int] = (0,),
+                   scan_rows: int = HEADER_SCAN_ROWS) -> Optional['SheetStream']:
+        """
+        Detecta o cabeçalho nas primeiras linhas e prepara a leitura dos dados
+        
+        Args:
+            sheet_name: Nome da aba
+            detect_columns: Recebe os nomes normalizados de uma linha candidata e retorna
+                (qualidade, {nome_saida: índice_da_coluna}) ou None se a linha não serve
+            preferred_header_rows: Linhas testadas primeiro, em ordem de preferência;
+                as demais linhas inspecionadas vêm depois
+            scan_rows: Quantidade de linhas inspecionadas
+        
+        Returns:
+            SheetStream posicionado após o cabeçalho, ou None se nenhuma linha serve
+        """
+        rows = self.iter_rows(sheet_name)
+        head = list(islice(rows, scan_rows))
+        
+        order = [r for r in preferred_header_rows if r < len(head)]
+        order += [r for r in range(len(head)) if r not in order]
+        
+        best = None
+        for row_index in order:
+            detected = detect_columns([normalize_header(value) for value in head[row_index]])
+            # Em empate de qualidade vence a linha preferida
+            if detected is not None and (best is None or detected[0] > best[1]):
+                best = (row_index, detected[0], detected[1])
+        if best is None:
+            return None
+        
+        header_row, _, columns = best
+        header = head[header_row]
+        return SheetStream(
+            header_row=header_row,
+            columns=columns,
+            header_names={name: header[index] for name, index in columns.items()},
+            rows=chain(head[header_row + 1:], rows)
+        )
+
+
+class SheetStream:
+    """Dados de uma aba a partir da linha seguinte ao cabeçalho, projetados nas colunas detectadas"""
+    
+    def __init__(self, header_row: int, columns: Dict[str, int], header_names: Dict[str, Any],
+                 rows: Iterator[Tuple[Any, ...]]):
+        """
+        Args:
+            header_row: Índice (base 0) da linha de cabeçalho
+            columns: Nome de saída -> índice da coluna na planilha
+            header_names: Nome de saída -> texto original do cabeçalho
+            rows: Iterador das linhas de dados
+        """
+        self.header_row = header_row
+        self.columns = columns
+        self.header_names = header_names
+        self._rows = rows
+    
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        Percorre os dados em blocos de até `chunk_size` linhas
+        
+        Linhas vazias em todas as colunas projetadas são descartadas.
+        
+        Yields:
+            DataFrame com as colunas de saída
+        """
+        names = list(self.columns)
+        indices = [self.columns[name] for name in names]
+        chunk = []
+        for row in self._rows:
+            values = [row[i] if i < len(row) else None for i in indices]
+            if all(value is None for value in values):
+                continue
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=names)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=names)
+    
+    def read(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+        """Todos os blocos concatenados em um único DataFrame"""
+        chunks = list(self.iter_chunks(chunk_size))
+        if not chunks:
+            return pd.DataFrame(columns=list(self.columns))
+        return pd.concat(chunks, ignore_index=True)
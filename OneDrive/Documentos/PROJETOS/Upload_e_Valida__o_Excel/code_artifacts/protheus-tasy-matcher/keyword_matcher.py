@@ -0,0 +1,146 @@
+"""
+Extrator de palavras-chave de domínio com autômato Aho-Corasick
+Compilado uma única vez por dicionário; custo linear no tamanho do texto
+"""
+
+import json
+from collections import deque
+from typing import Dict, List, Union
+
+
+def load_keyword_dictionary(source: Union[str, Dict[str, List[str]], None],
+                            default: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    Resolve o dicionário de categorias a partir da configuração
+    
+    Args:
+        source: Dicionário categoria -> palavras-chave, caminho de um arquivo JSON ou None
+        default: Dicionário usado quando `source` é None
+    
+    Returns:
+        Dicionário categoria -> lista de palavras-chave
+    """
+    if source is None:
+        return default
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            source = json.load(f)
+    return {str(category): [str(k) for k in keywords] for category, keywords in source.items()}
+
+
+class DomainKeywordMatcher:
+    """
+    Encontra os rótulos "categoria:palavra" presentes em um texto
+    
+    Mesma semântica do laço original por palavra: uma palavra do texto casa com a
+    palavra-chave se `keyword in word` (busca Aho-Corasick dentro da palavra) ou
+    `word in keyword` (tabela com todas as substrings das palavras-chave).
+    """
+    
+    def __init__(self, categories: Dict[str, List[str]]):
+        """
+        Compila o dicionário
+        
+        Args:
+            categories: Dicionário categoria -> lista de palavras-chave
+        """
+        self.labels: List[str] = []
+        keyword_labels: Dict[str, List[int]] = {}
+        seen = set()
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                label = f"{category}:{keyword}"
+                if label in seen:
+                    continue
+                seen.add(label)
+                keyword_labels.setdefault(keyword, []).append(len(self.labels))
+                self.labels.append(label)
+        
+        # Palavra-chave vazia está contida em qualquer palavra
+        self._always = frozenset(keyword_labels.pop('', []))
+        
+        self._build_automaton(keyword_labels)
+        self._build_substring_table(keyword_labels)
+    
+    def _build_automaton(self, keyword_labels: Dict[str, List[int]]):
+        """Trie com links de falha; cada nó guarda os rótulos que terminam nele (inclusive via falha)"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        
+        for keyword, label_ids in keyword_labels.items():
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].extend(label_ids)
+        
+        # Filhos da raiz falham para a raiz; os demais, em largura, a partir da falha do pai
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0) if node else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+    
+    def _build_substring_table(self, keyword_labels: Dict[str, List[int]]):
+        """Substring -> rótulos das palavras-chave que a contêm (semântica `word in keyword`)"""
+        table: Dict[str, set] = {}
+        for keyword, label_ids in keyword_labels.items():
+            for start in range(len(keyword)):
+                for end in range(start + 1, len(keyword) + 1):
+                    table.setdefault(keyword[start:end], set()).update(label_ids)
+        self._substrings: Dict[str, frozenset] = {key: frozenset(value) for key, value in table.items()}
+    
+    def match_ids(self, text: str) -> set:
+        """
+        Índices (em `labels`) dos rótulos encontrados no texto
+        
+        Args:
+            text: Texto normalizado
+        
+        Returns:
+            Conjunto de índices de rótulos
+        """
+        found = set()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        words = text.split()
+        if words and self._always:
+            found.update(self._always)
+        for word in words:
+            # word in keyword
+            contained = self._substrings.get(word)
+            if contained:
+                found.update(contained)
+            # keyword in word
+            node = 0
+            for char in word:
+                while node and char not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(char, 0)
+                if output[node]:
+                    found.update(output[node])
+        return found
+    
+    def extract(self, text: str) -> List[str]:
+        """Rótulos "categoria:palavra" encontrados no texto (ordem do dicionário)"""
+        return [self.labels[i] for i in sorted(self.match_ids(text))]
+    
+    def mask(self, text: str) -> int:
+        """Máscara de bits dos rótulos encontrados (bit i = labels[i])"""
+        value = 0
+        for label_id in self.match_ids(text):
+            value |= 1 << label_id
+        return value
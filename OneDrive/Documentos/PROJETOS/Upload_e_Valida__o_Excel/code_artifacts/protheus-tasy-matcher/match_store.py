@@ -0,0 +1,321 @@
+"""
+Armazenamento colunar de correspondências
+Cada correspondência ocupa uma linha de arrays NumPy (scores float32, tipos uint8 e
+índices int32 para uma tabela de textos internados); objetos MatchResult são criados
+sob demanda apenas para as linhas exibidas
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Colunas da matriz de scores (mesma ordem dos algoritmos do motor)
+ALGORITHMS = ('levenshtein', 'jaro_winkler', 'jaccard', 'cosine', 'semantic')
+
+# Metadados com coluna própria; os demais ficam em um dicionário esparso por linha
+_INDEXED_METADATA = ('normalized_source', 'normalized_target', 'processing_time')
+
+# Colunas da aba "Correspondências" dos relatórios Excel
+EXPORT_SCORE_COLUMNS = {
+    'levenshtein': 'Levenshtein',
+    'jaro_winkler': 'Jaro-Winkler',
+    'jaccard': 'Jaccard',
+    'cosine': 'Cosine',
+    'semantic': 'Semântica'
+}
+
+
+def engine_types():
+    """MatchType, DataType e MatchResult (importação tardia: o motor importa este módulo)"""
+    from enhanced_comparison_engine import DataType, MatchResult, MatchType
+    return MatchType, DataType, MatchResult
+
+
+class _Interner:
+    """Tabela de textos distintos: texto -> índice"""
+    
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = list(values) if values else []
+        self._index = {value: i for i, value in enumerate(self.values)}
+    
+    def add(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+class MatchStore:
+    """
+    Correspondências em formato colunar
+    
+    Funciona como uma sequência somente leitura de MatchResult (len, índice, fatia,
+    iteração), mas guarda apenas arrays: textos de origem/destino e normalizados são
+    índices int32 em uma tabela compartilhada, scores são float32 e os tipos de
+    correspondência/dados são códigos uint8. Fatias e filtros compartilham a tabela.
+    """
+    
+    def __init__(self, strings: List[str], source: np.ndarray, target: np.ndarray,
+                 normalized_source: np.ndarray, normalized_target: np.ndarray,
+                 similarity: np.ndarray, scores: np.ndarray, confidence: np.ndarray,
+                 match_type: np.ndarray, data_type: np.ndarray, recommendation: np.ndarray,
+                 recommendations: List[str], processing_time: np.ndarray,
+                 extra_metadata: Optional[Dict[int, Dict[str, Any]]] = None):
+        """
+        Args:
+            strings: Tabela de textos internados
+            source, target: Índices (int32) dos valores originais em `strings`
+            normalized_source, normalized_target: Índices (int32) dos textos normalizados
+            similarity: Score geral (float32)
+            scores: Scores por algoritmo (float32, uma coluna por item de ALGORITHMS)
+            confidence: Confiança (float32)
+            match_type, data_type: Posição (uint8) em MatchType / DataType
+            recommendation: Índice (uint8; int32 acima de 256 recomendações) em `recommendations`
+            recommendations: Tabela de recomendações distintas
+            processing_time: Tempo de processamento por correspondência (float32)
+            extra_metadata: Demais metadados, por linha (apenas linhas que os têm)
+        """
+        self.strings = strings
+        self.source = source
+        self.target = target
+        self.normalized_source = normalized_source
+        self.normalized_target = normalized_target
+        self.similarity = similarity
+        self.scores = scores
+        self.confidence = confidence
+        self.match_type = match_type
+        self.data_type = data_type
+        self.recommendation = recommendation
+        self.recommendations = recommendations
+        self.processing_time = processing_time
+        self.extra_metadata = extra_metadata or {}
+    
+    @classmethod
+    def from_matches(cls, matches: Iterable[Any]) -> 'MatchStore':
+        """
+        Converte uma lista de MatchResult
+        
+        Args:
+            matches: Correspondências (MatchResult ou MatchStore)
+        
+        Returns:
+            Armazenamento colunar com as mesmas correspondências, na mesma ordem
+        """
+        if isinstance(matches, MatchStore):
+            return matches
+        MatchType, DataType, _ = engine_types()
+        match_codes = {member: code for code, member in enumerate(MatchType)}
+        data_codes = {member: code for code, member in enumerate(DataType)}
+        
+        strings = _Interner()
+        recommendations = _Interner()
+        columns = {name: [] for name in (
+            'source', 'target', 'normalized_source', 'normalized_target', 'similarity',
+            'confidence', 'match_type', 'data_type', 'recommendation', 'processing_time'
+        )}
+        scores = []
+        extra_metadata = {}
+        
+        for row, match in enumerate(matches):
+            metadata = match.metadata or {}
+            columns['source'].append(strings.add(match.source_value))
+            columns['target'].append(strings.add(match.target_value))
+            columns['normalized_source'].append(strings.add(metadata.get('normalized_source', '')))
+            columns['normalized_target'].append(strings.add(metadata.get('normalized_target', '')))
+            columns['similarity'].append(match.similarity_score)
+            columns['confidence'].append(match.confidence)
+            columns['match_type'].append(match_codes[match.match_type])
+            columns['data_type'].append(data_codes[match.data_type])
+            columns['recommendation'].append(recommendations.add(match.recommendation))
+            columns['processing_time'].append(metadata.get('processing_time', 0.0))
+            scores.append([match.algorithm_scores.get(alg, 0.0) for alg in ALGORITHMS])
+            
+            extra = {key: value for key, value in metadata.items() if key not in _INDEXED_METADATA}
+            if extra:
+                extra_metadata[row] = extra
+        
+        return cls(
+            strings=strings.values,
+            source=np.asarray(columns['source'], dtype=np.int32),
+            target=np.asarray(columns['target'], dtype=np.int32),
+            normalized_source=np.asarray(columns['normalized_source'], dtype=np.int32),
+            normalized_target=np.asarray(columns['normalized_target'], dtype=np.int32),
+            similarity=np.asarray(columns['similarity'], dtype=np.float32),
+            scores=np.asarray(scores, dtype=np.float32).reshape(-1, len(ALGORITHMS)),
+            confidence=np.asarray(columns['confidence'], dtype=np.float32),
+            match_type=np.asarray(columns['match_type'], dtype=np.uint8),
+            data_type=np.asarray(columns['data_type'], dtype=np.uint8),
+            recommendation=np.asarray(
+                columns['recommendation'], dtype=np.uint8 if len(recommendations.values) <= 256 else np.int32
+            ),
+            recommendations=recommendations.values,
+            processing_time=np.asarray(columns['processing_time'], dtype=np.float32),
+            extra_metadata=extra_metadata
+        )
+    
+    def __len__(self) -> int:
+        return len(self.similarity)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.take(np.arange(len(self))[key])
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("índice fora do intervalo")
+        return self._view(key)
+    
+    def __iter__(self) -> Iterator[Any]:
+        for row in range(len(self)):
+            yield self._view(row)
+    
+    def _view(self, row: int):
+        """MatchResult da linha (criado sob demanda)"""
+        MatchType, DataType, MatchResult = engine_types()
+        similarity = float(self.similarity[row])
+        algorithm_scores = {alg: float(score) for alg, score in zip(ALGORITHMS, self.scores[row])}
+        algorithm_scores['overall'] = similarity
+        metadata = {
+            'processing_time': float(self.processing_time[row]),
+            'normalized_source': self.strings[self.normalized_source[row]],
+            'normalized_target': self.strings[self.normalized_target[row]]
+        }
+        metadata.update(self.extra_metadata.get(row, {}))
+        return MatchResult(
+            source_value=self.strings[self.source[row]],
+            target_value=self.strings[self.target[row]],
+            similarity_score=similarity,
+            match_type=list(MatchType)[self.match_type[row]],
+            confidence=float(self.confidence[row]),
+            algorithm_scores=algorithm_scores,
+            data_type=list(DataType)[self.data_type[row]],
+            recommendation=self.recommendations[self.recommendation[row]],
+            metadata=metadata
+        )
+    
+    def take(self, rows: Sequence[int]) -> 'MatchStore':
+        """Subconjunto das linhas indicadas (a tabela de textos é compartilhada)"""
+        rows = np.asarray(rows, dtype=np.intp)
+        positions = {int(row): new for new, row in enumerate(rows)}
+        return MatchStore(
+            strings=self.strings,
+            source=self.source[rows],
+            target=self.target[rows],
+            normalized_source=self.normalized_source[rows],
+            normalized_target=self.normalized_target[rows],
+            similarity=self.similarity[rows],
+            scores=self.scores[rows],
+            confidence=self.confidence[rows],
+            match_type=self.match_type[rows],
+            data_type=self.data_type[rows],
+            recommendation=self.recommendation[rows],
+            recommendations=self.recommendations,
+            processing_time=self.processing_time[rows],
+            extra_metadata={
+                positions[row]: extra for row, extra in self.extra_metadata.items() if row in positions
+            }
+        )
+    
+    def filter(self, match_types: Optional[Iterable[Any]] = None, min_confidence: float = 0.0) -> 'MatchStore':
+        """
+        Correspondências dos tipos indicados e com confiança mínima
+        
+        Args:
+            match_types: MatchType ou seus valores ('exact', 'high', ...); None = todos
+            min_confidence: Confiança mínima
+        
+        Returns:
+            Subconjunto, na mesma ordem
+        """
+        mask = self.confidence >= min_confidence
+        if match_types is not None:
+            MatchType, _, _ = engine_types()
+            wanted = {MatchType(match_type) for match_type in match_types}
+            codes = [code for code, member in enumerate(MatchType) if member in wanted]
+            mask &= np.isin(self.match_type, codes)
+        return self.take(np.nonzero(mask)[0])
+    
+    def match_type_counts(self) -> Dict[Any, int]:
+        """Quantidade de correspondências por MatchType (todos os tipos, inclusive zerados)"""
+        MatchType, _, _ = engine_types()
+        members = list(MatchType)
+        counts = np.bincount(self.match_type, minlength=len(members))
+        return {member: int(count) for member, count in zip(members, counts)}
+    
+    def average_similarity(self) -> float:
+        """Score geral médio (0.0 sem correspondências)"""
+        return float(self.similarity.mean(dtype=np.float64)) if len(self) else 0.0
+    
+    def average_confidence(self) -> float:
+        """Confiança média (0.0 sem correspondências)"""
+        return float(self.confidence.mean(dtype=np.float64)) if len(self) else 0.0
+    
+    def data_type_distribution(self) -> Dict[str, int]:
+        """Quantidade por tipo de dados, na ordem da primeira ocorrência"""
+        _, DataType, _ = engine_types()
+        members = list(DataType)
+        codes, first, counts = np.unique(self.data_type, return_index=True, return_counts=True)
+        order = np.argsort(first)
+        return {members[codes[i]].value: int(counts[i]) for i in order}
+    
+    def algorithm_performance(self) -> Dict[str, float]:
+        """Score médio de cada algoritmo (vazio sem correspondências)"""
+        if not len(self):
+            return {}
+        means = self.scores.mean(axis=0, dtype=np.float64)
+        return {alg: float(mean) for alg, mean in zip(ALGORITHMS, means)}
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Todas as correspondências em um DataFrame, sem criar MatchResult
+        
+        Returns:
+            Colunas source_value, target_value, similarity_score, match_type, confidence,
+            data_type, recommendation e um score por algoritmo
+        """
+        MatchType, DataType, _ = engine_types()
+        strings = np.asarray(self.strings, dtype=object)
+        match_values = np.array([member.value for member in MatchType], dtype=object)
+        data_values = np.array([member.value for member in DataType], dtype=object)
+        frame = pd.DataFrame({
+            'source_value': strings[self.source],
+            'target_value': strings[self.target],
+            'similarity_score': self.similarity,
+            'match_type': match_values[self.match_type],
+            'confidence': self.confidence,
+            'data_type': data_values[self.data_type],
+            'recommendation': np.asarray(self.recommendations, dtype=object)[self.recommendation]
+        })
+        for column, alg in enumerate(ALGORITHMS):
+            frame[alg] = self.scores[:, column]
+        return frame
+    
+    def to_export_frame(self) -> pd.DataFrame:
+        """Aba "Correspondências" dos relatórios Excel (scores com 3 casas decimais)"""
+        frame = self.to_dataframe()
+        
+        def fmt(column: str) -> pd.Series:
+            return frame[column].map('{:.3f}'.format)
+        
+        export = pd.DataFrame({
+            'Valor Origem': frame['source_value'],
+            'Valor Destino': frame['target_value'],
+            'Similaridade': fmt('similarity_score'),
+            'Tipo': frame['match_type'],
+            'Confiança': fmt('confidence'),
+            'Tipo de Dados': frame['data_type'],
+            'Recomendação': frame['recommendation']
+        })
+        for alg, label in EXPORT_SCORE_COLUMNS.items():
+            export[label] = fmt(alg)
+        return export
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos arrays (sem a tabela de textos)"""
+        arrays = (self.source, self.target, self.normalized_source, self.normalized_target,
+                  self.similarity, self.scores, self.confidence, self.match_type,
+                  self.data_type, self.recommendation, self.processing_time)
+        return sum(array.nbytes for array in arrays)
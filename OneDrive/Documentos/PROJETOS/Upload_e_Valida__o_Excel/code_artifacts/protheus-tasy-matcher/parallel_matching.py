@@ -0,0 +1,218 @@
+"""
+Backend de processos para a busca de correspondências do motor de comparação
+Os destinos pré-processados e o índice TF-IDF ficam em memória compartilhada (somente leitura)
+"""
+
+import logging
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from similarity_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ['levenshtein', 'jaro_winkler', 'jaccard', 'cosine', 'semantic', 'overall']
+
+# Estado de cada processo de trabalho (preenchido por _init_worker)
+_worker_state: Dict[str, Any] = {}
+
+
+def _encode_strings(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Codifica textos como um único buffer UTF-8 mais offsets"""
+    encoded = [t.encode('utf-8') for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+    return blob, offsets
+
+
+def _decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Inverso de _encode_strings"""
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+
+def _pack_arrays(arrays: Dict[str, np.ndarray]) -> Tuple[shared_memory.SharedMemory, Dict[str, Tuple[str, Tuple[int, ...], int]]]:
+    """
+    Copia vários arrays para um único bloco de memória compartilhada
+    
+    Returns:
+        Bloco criado e manifesto nome -> (dtype, shape, offset)
+    """
+    manifest = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = math.ceil(offset / 8) * 8
+        manifest[name] = (array.dtype.str, array.shape, offset)
+        offset += array.nbytes
+    
+    shm = shared_memory.SharedMemory(create=True, size=max(1, offset))
+    for name, array in arrays.items():
+        dtype, shape, start = manifest[name]
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        view[...] = array
+    return shm, manifest
+
+
+def _attach_arrays(shm: shared_memory.SharedMemory,
+                   manifest: Dict[str, Tuple[str, Tuple[int, ...], int]]) -> Dict[str, np.ndarray]:
+    """Visões (sem cópia) dos arrays de um bloco compartilhado"""
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        for name, (dtype, shape, start) in manifest.items()
+    }
+
+
+def _init_worker(config: Dict, shm_name: str, manifest: Dict, tfidf_vectorizer: Any,
+                 tfidf_shape: Optional[Tuple[int, int]], use_pair_cache: bool):
+    """Inicializa o processo de trabalho: motor sequencial + destinos compartilhados"""
+    from enhanced_comparison_engine import EnhancedComparisonEngine
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = _attach_arrays(shm, manifest)
+    
+    engine = EnhancedComparisonEngine(config)
+    engine.tfidf_index.vectorizer = tfidf_vectorizer
+    if tfidf_shape is not None:
+        matrix = sparse.csr_matrix(
+            (arrays['tfidf_data'], arrays['tfidf_indices'], arrays['tfidf_indptr']), shape=tfidf_shape
+        )
+        engine.tfidf_index.load(_decode_strings(arrays['corpus_blob'], arrays['corpus_offsets']), matrix)
+    
+    raw = _decode_strings(arrays['raw_blob'], arrays['raw_offsets'])
+    normalized = _decode_strings(arrays['norm_blob'], arrays['norm_offsets'])
+    if engine.config['enable_cache']:
+        # Destinos já normalizados pelo processo principal
+        for text, norm in zip(raw, normalized):
+            engine._normalization_cache.put(LRUCache.make_key(text), norm)
+    engine._pair_cache_active = use_pair_cache
+    
+    _worker_state.update({'shm': shm, 'engine': engine, 'targets': raw})
+
+
+def _match_chunk(task: Tuple[int, List[Tuple[int, Any, Optional[np.ndarray]]], float]):
+    """
+    Processa um bloco de origens no processo de trabalho
+    
+    Returns:
+        (índice do bloco, [(origem, destino, scores, tempo)], estatísticas do bloco,
+        com os tempos por etapa em 'profile' se a instrumentação estiver ligada)
+    """
+    chunk_index, items, threshold = task
+    engine = _worker_state['engine']
+    targets = _worker_state['targets']
+    comparisons_before = engine.stats['total_comparisons']
+    hits_before = engine.stats['cache_hits']
+    
+    results = []
+    for source_index, source_value, candidate_idx in items:
+        start = time.perf_counter()
+        best_target = -1
+        best_scores = None
+        best_score = 0.0
+        indices = range(len(targets)) if candidate_idx is None else candidate_idx.tolist()
+        for target_index in indices:
+            scores = engine.calculate_comprehensive_similarity(source_value, targets[target_index])
+            if scores['overall'] > best_score and scores['overall'] >= threshold:
+                best_score = scores['overall']
+                best_target = target_index
+                best_scores = scores
+        if best_scores is not None:
+            results.append((
+                source_index, best_target,
+                tuple(float(best_scores[alg]) for alg in ALGORITHMS),
+                time.perf_counter() - start
+            ))
+    
+    stats = {
+        'total_comparisons': engine.stats['total_comparisons'] - comparisons_before,
+        'cache_hits': engine.stats['cache_hits'] - hits_before
+    }
+    if engine.profiler.enabled:
+        # Tempos por etapa do bloco (somados ao profiler do processo principal)
+        stats['profile'] = engine.profiler.export()
+        engine.profiler.start_run()
+    return chunk_index, results, stats
+
+
+def find_matches_in_processes(engine, source_values: List[Any], target_values: List[Any],
+                              threshold: float, candidates: Optional[List[np.ndarray]] = None,
+                              use_pair_cache: bool = True) -> List:
+    """
+    Executa a busca sequencial do motor em um pool de processos
+    
+    Args:
+        engine: EnhancedComparisonEngine do processo principal
+        source_values: Valores de origem
+        target_values: Valores de destino
+        threshold: Limiar mínimo de similaridade
+        candidates: Índices de destino candidatos por origem (None = todos)
+        use_pair_cache: Usa o cache de pares nos processos de trabalho
+    
+    Returns:
+        Lista de MatchResult, na ordem das origens
+    """
+    raw = [str(v) for v in target_values]
+    normalized = engine.normalize_values(target_values)
+    arrays = {}
+    arrays['raw_blob'], arrays['raw_offsets'] = _encode_strings(raw)
+    arrays['norm_blob'], arrays['norm_offsets'] = _encode_strings(normalized)
+    
+    index = engine.tfidf_index
+    tfidf_shape = None
+    if index.is_fitted:
+        tfidf_shape = index.matrix.shape
+        arrays['tfidf_data'] = index.matrix.data
+        arrays['tfidf_indices'] = index.matrix.indices
+        arrays['tfidf_indptr'] = index.matrix.indptr
+        arrays['corpus_blob'], arrays['corpus_offsets'] = _encode_strings(index.texts)
+    
+    worker_config = dict(engine.config)
+    worker_config.update({'enable_parallel': False, 'enable_batch_scoring': False, 'candidate_generation': None})
+    
+    # Blocos menores que 'chunk_size' quando necessário para ocupar todos os processos
+    max_workers = max(1, engine.config['max_workers'])
+    chunk_size = max(1, min(engine.config['chunk_size'], math.ceil(len(source_values) / (max_workers * 4))))
+    tasks = []
+    for chunk_index, start in enumerate(range(0, len(source_values), chunk_size)):
+        items = [
+            (i, source_values[i], None if candidates is None else candidates[i])
+            for i in range(start, min(start + chunk_size, len(source_values)))
+        ]
+        tasks.append((chunk_index, items, threshold))
+    
+    shm, manifest = _pack_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(worker_config, shm.name, manifest, index.vectorizer, tfidf_shape, use_pair_cache)
+        ) as executor:
+            # map preserva a ordem dos blocos: resultados e estatísticas são determinísticos
+            matches = []
+            for _, results, stats in executor.map(_match_chunk, tasks):
+                profile = stats.pop('profile', None)
+                if profile is not None:
+                    engine.profiler.merge(profile)
+                with engine._lock:
+                    for key, value in stats.items():
+                        engine.stats[key] += value
+                for source_index, target_index, values, elapsed in results:
+                    scores = dict(zip(ALGORITHMS, values))
+                    match = engine._build_match_result(
+                        source_values[source_index], target_values[target_index], scores, elapsed
+                    )
+                    engine._collect(matches, source_index, match)
+                engine._report_progress()
+    finally:
+        shm.close()
+        shm.unlink()
+    
+    return matches
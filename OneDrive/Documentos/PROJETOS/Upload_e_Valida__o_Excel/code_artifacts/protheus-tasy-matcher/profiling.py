@@ -0,0 +1,160 @@
+"""
+Instrumentação por etapa do motor de comparação
+Contadores monotônicos (perf_counter_ns) e histogramas log2 de duração por etapa, agregados
+por execução; desativada, cada ponto instrumentado custa apenas a verificação de `enabled`
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+# Etapas instrumentadas pelo motor (ordem de exibição; etapas não listadas vêm ao final)
+STAGES = (
+    'normalization', 'features', 'corpus_fit', 'candidate_generation',
+    'levenshtein', 'jaro_winkler', 'jaccard', 'cosine', 'semantic',
+    'classification', 'report'
+)
+
+# Faixa i do histograma: duração abaixo de 2**i µs (a última acumula o restante)
+HISTOGRAM_BUCKETS = 32
+
+# Posições do acumulador de cada etapa
+_CALLS, _ITEMS, _TOTAL, _MIN, _MAX, _HISTOGRAM = range(6)
+
+# Contexto devolvido por stage() com a instrumentação desativada
+_NULL_STAGE = nullcontext()
+
+
+def _bucket(elapsed_ns: int) -> int:
+    """Faixa do histograma de uma duração"""
+    return min((elapsed_ns // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)
+
+
+class _StageTimer:
+    """Mede um bloco `with` e registra a duração na etapa"""
+    
+    __slots__ = ('profiler', 'name', 'items', 'start')
+    
+    def __init__(self, profiler: 'StageProfiler', name: str, items: int):
+        self.profiler = profiler
+        self.name = name
+        self.items = items
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter_ns() - self.start, self.items)
+        return False
+
+
+class StageProfiler:
+    """
+    Tempo por etapa de uma execução (busca, nova correspondência, relatório)
+    
+    Cada etapa acumula chamadas, itens processados (pares, valores ou correspondências),
+    tempo total/mínimo/máximo e um histograma das durações por chamada. Etapas podem ser
+    aninhadas em pontos diferentes do código; o motor evita aninhar as etapas listadas em
+    STAGES, de modo que seus tempos não se sobrepõem.
+    
+    Uso nos pontos quentes (uma verificação de atributo quando desativado):
+        
+        start = time.perf_counter_ns() if profiler.enabled else 0
+        ...
+        if start:
+            profiler.record('etapa', time.perf_counter_ns() - start)
+    
+    e nos demais: `with profiler.stage('etapa', items=n): ...`
+    """
+    
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages: Dict[str, List[Any]] = {}
+        self._run_start = self._run_end = time.perf_counter_ns()
+    
+    def start_run(self, enabled: Optional[bool] = None):
+        """Zera os acumuladores para uma nova execução (e opcionalmente liga/desliga)"""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        with self._lock:
+            self._stages = {}
+            self._run_start = self._run_end = time.perf_counter_ns()
+    
+    def stage(self, name: str, items: int = 1):
+        """Contexto que mede o bloco como uma chamada da etapa `name`"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self, name, items)
+    
+    def record(self, name: str, elapsed_ns: int, items: int = 1):
+        """Registra uma chamada da etapa com a duração em nanossegundos"""
+        now = time.perf_counter_ns()
+        with self._lock:
+            self._run_end = max(self._run_end, now)
+            entry = self._stages.get(name)
+            if entry is None:
+                entry = self._stages[name] = [0, 0, 0, elapsed_ns, elapsed_ns, [0] * HISTOGRAM_BUCKETS]
+            entry[_CALLS] += 1
+            entry[_ITEMS] += items
+            entry[_TOTAL] += elapsed_ns
+            if elapsed_ns < entry[_MIN]:
+                entry[_MIN] = elapsed_ns
+            if elapsed_ns > entry[_MAX]:
+                entry[_MAX] = elapsed_ns
+            entry[_HISTOGRAM][_bucket(elapsed_ns)] += 1
+    
+    def export(self) -> Dict[str, List[Any]]:
+        """Acumuladores brutos (serializáveis) para juntar com merge em outro processo"""
+        with self._lock:
+            return {name: entry[:_HISTOGRAM] + [list(entry[_HISTOGRAM])] for name, entry in self._stages.items()}
+    
+    def merge(self, exported: Dict[str, List[Any]]):
+        """Soma acumuladores exportados por outro profiler (ex.: processo de trabalho)"""
+        with self._lock:
+            for name, other in exported.items():
+                entry = self._stages.get(name)
+                if entry is None:
+                    self._stages[name] = other[:_HISTOGRAM] + [list(other[_HISTOGRAM])]
+                    continue
+                entry[_CALLS] += other[_CALLS]
+                entry[_ITEMS] += other[_ITEMS]
+                entry[_TOTAL] += other[_TOTAL]
+                entry[_MIN] = min(entry[_MIN], other[_MIN])
+                entry[_MAX] = max(entry[_MAX], other[_MAX])
+                entry[_HISTOGRAM] = [a + b for a, b in zip(entry[_HISTOGRAM], other[_HISTOGRAM])]
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Resumo da execução atual
+        
+        Returns:
+            {'enabled', 'run_seconds' (do início da execução à última etapa medida),
+            'stages': {etapa: {calls, items, total_seconds, mean_seconds, min_seconds,
+            max_seconds, items_per_second, run_share, histogram: [{'upper_seconds', 'count'}]
+            (apenas faixas não vazias)}}}
+        """
+        exported = self.export()
+        run_seconds = (self._run_end - self._run_start) / 1e9
+        order = {name: i for i, name in enumerate(STAGES)}
+        stages = {}
+        for name in sorted(exported, key=lambda n: (order.get(n, len(STAGES)), n)):
+            calls, items, total, minimum, maximum, histogram = exported[name]
+            total_seconds = total / 1e9
+            stages[name] = {
+                'calls': calls,
+                'items': items,
+                'total_seconds': total_seconds,
+                'mean_seconds': total_seconds / calls if calls else 0.0,
+                'min_seconds': minimum / 1e9,
+                'max_seconds': maximum / 1e9,
+                'items_per_second': items / total_seconds if total_seconds > 0 else None,
+                'run_share': total_seconds / run_seconds if run_seconds > 0 else None,
+                'histogram': [
+                    {'upper_seconds': (2 ** i) / 1e6 if i < HISTOGRAM_BUCKETS - 1 else None, 'count': count}
+                    for i, count in enumerate(histogram) if count
+                ]
+            }
+        return {'enabled': self.enabled, 'run_seconds': run_seconds, 'stages': stages}
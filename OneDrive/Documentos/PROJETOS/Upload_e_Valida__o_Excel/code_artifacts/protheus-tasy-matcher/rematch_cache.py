@@ -0,0 +1,193 @@
+"""
+Cache de scores por componente para nova correspondência incremental
+Guarda, por origem, os destinos mais promissores com os scores de cada algoritmo e o
+maior score de cada algoritmo entre os destinos descartados; uma mudança de limiar vira
+um filtro e uma mudança de pesos vira uma nova soma ponderada + argmax sobre o cache
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from match_store import ALGORITHMS
+
+# Folga da comparação com o limite superior dos destinos descartados
+BOUND_EPSILON = 1e-9
+
+
+def weighted_overall(components: np.ndarray, weights: Dict[str, float]) -> np.ndarray:
+    """
+    Score geral a partir dos componentes (última dimensão na ordem de ALGORITHMS)
+    
+    A soma segue a mesma ordem de compute_score_matrices, então os valores são idênticos
+    aos de uma nova pontuação completa.
+    """
+    overall = 0
+    for k, alg in enumerate(ALGORITHMS):
+        overall = overall + components[..., k] * weights[alg]
+    return overall
+
+
+class RematchCache:
+    """
+    Destinos candidatos e scores por componente de cada origem da última busca em lote
+    
+    Para cada origem ficam os `top_k` melhores destinos de cada algoritmo e do score
+    geral (união, em ordem crescente de índice; o argmax do score geral sempre entra).
+    Com pesos não negativos, nenhum destino descartado supera a soma ponderada dos maiores
+    scores descartados; quando o melhor destino do cache não fica acima desse limite, a
+    origem precisa ser pontuada de novo.
+    """
+    
+    def __init__(self, n_sources: int, top_k: int = 15):
+        """
+        Args:
+            n_sources: Quantidade de origens
+            top_k: Destinos guardados por algoritmo (e pelo score geral)
+        """
+        self.n_sources = n_sources
+        self.top_k = max(1, top_k)
+        # Destinos por origem (-1 = posição vazia) e scores por componente de cada um;
+        # em cada linha, os destinos válidos estão em ordem crescente de índice
+        self.targets = np.full((n_sources, 1), -1, dtype=np.int32)
+        self.components = np.zeros((n_sources, 1, len(ALGORITHMS)))
+        self.excluded_max = np.full((n_sources, len(ALGORITHMS)), -np.inf)
+        # Pesos usados na pontuação de cada origem (o argmax com esses pesos está no cache)
+        self.weight_sets: List[Dict[str, float]] = []
+        self.row_weights = np.full(n_sources, -1, dtype=np.int32)
+        
+        # Contexto da busca que gerou o cache (preenchido pelo motor)
+        self.source_values: List[Any] = []
+        self.target_values: List[Any] = []
+        self.context: Dict[str, Any] = {}
+    
+    def _ensure_width(self, width: int):
+        """Alarga as linhas do cache para comportar `width` destinos"""
+        extra = width - self.targets.shape[1]
+        if extra > 0:
+            self.targets = np.pad(self.targets, ((0, 0), (0, extra)), constant_values=-1)
+            self.components = np.pad(self.components, ((0, 0), (0, extra), (0, 0)))
+    
+    def _store_rows(self, start: int, targets: np.ndarray, components: np.ndarray):
+        """Grava linhas consecutivas a partir de `start`"""
+        rows, width = targets.shape
+        self._ensure_width(width)
+        self.targets[start:start + rows] = -1
+        self.targets[start:start + rows, :width] = targets
+        self.components[start:start + rows] = 0.0
+        self.components[start:start + rows, :width] = components
+    
+    def add_matrix_block(self, start: int, scores: Dict[str, np.ndarray]):
+        """
+        Guarda um bloco de origens pontuado contra todos os destinos
+        
+        Args:
+            start: Índice da primeira origem do bloco
+            scores: Matrizes (origens do bloco x destinos) por algoritmo, incluindo 'overall'
+        """
+        overall = scores['overall']
+        rows, n_targets = overall.shape
+        if n_targets == 0:
+            return
+        k = min(self.top_k, n_targets)
+        row_index = np.arange(rows)[:, None]
+        # O vencedor exato (argmax: menor índice em empate) sempre entra no cache
+        picks = [overall.argmax(axis=1)[:, None]]
+        for matrix in [overall] + [scores[alg] for alg in ALGORITHMS]:
+            picks.append(np.argpartition(-matrix, k - 1, axis=1)[:, :k] if k < n_targets
+                         else np.broadcast_to(np.arange(n_targets), (rows, n_targets)))
+        chosen = np.sort(np.concatenate(picks, axis=1), axis=1)
+        
+        kept = np.zeros((rows, n_targets), dtype=bool)
+        kept[row_index, chosen] = True
+        if not kept.all():
+            for k_alg, alg in enumerate(ALGORITHMS):
+                self.excluded_max[start:start + rows, k_alg] = np.where(kept, -np.inf, scores[alg]).max(axis=1)
+        
+        components = np.stack([scores[alg][row_index, chosen] for alg in ALGORITHMS], axis=2)
+        # Repetições (destino escolhido por mais de um critério) viram posições vazias
+        repeated = np.zeros(chosen.shape, dtype=bool)
+        repeated[:, 1:] = chosen[:, 1:] == chosen[:, :-1]
+        self._store_rows(start, np.where(repeated, -1, chosen).astype(np.int32), components)
+    
+    def add_pair_block(self, start: int, source_idx: np.ndarray, target_idx: np.ndarray,
+                       scores: Dict[str, np.ndarray]):
+        """
+        Guarda um bloco pontuado apenas nos pares candidatos (todos os pares ficam no cache)
+        
+        Args:
+            start: Índice da primeira origem do bloco
+            source_idx: Origem (relativa ao bloco) de cada par
+            target_idx: Destino de cada par
+            scores: Vetores de scores por algoritmo, um valor por par
+        """
+        if len(source_idx) == 0:
+            return
+        order = np.lexsort((target_idx, source_idx))
+        source_idx, target_idx = source_idx[order], target_idx[order]
+        components = np.stack([scores[alg] for alg in ALGORITHMS], axis=1)[order]
+        rows = int(source_idx.max()) + 1
+        counts = np.bincount(source_idx, minlength=rows)
+        # Posição de cada par dentro da linha da sua origem
+        position = np.arange(len(source_idx)) - np.repeat(np.cumsum(counts) - counts, counts)
+        targets = np.full((rows, counts.max()), -1, dtype=np.int32)
+        block = np.zeros((rows, counts.max(), len(ALGORITHMS)))
+        targets[source_idx, position] = target_idx
+        block[source_idx, position] = components
+        self._store_rows(start, targets, block)
+    
+    def set_weights(self, weights: Dict[str, float]):
+        """Registra os pesos com que todas as origens foram pontuadas"""
+        self.weight_sets = [dict(weights)]
+        self.row_weights[:] = 0
+    
+    def replace_rows(self, rows: np.ndarray, other: 'RematchCache'):
+        """Substitui as origens `rows` pelas linhas (na mesma ordem) de outro cache"""
+        self._ensure_width(other.targets.shape[1])
+        width = other.targets.shape[1]
+        self.targets[rows] = -1
+        self.targets[rows, :width] = other.targets
+        self.components[rows] = 0.0
+        self.components[rows, :width] = other.components
+        self.excluded_max[rows] = other.excluded_max
+        if other.weight_sets:
+            self.weight_sets.append(other.weight_sets[0])
+            self.row_weights[rows] = len(self.weight_sets) - 1
+    
+    def best(self, weights: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray], np.ndarray]:
+        """
+        Melhor destino de cada origem com novos pesos, sem pontuar texto
+        
+        Args:
+            weights: Pesos dos algoritmos
+        
+        Returns:
+            (destino (-1 sem candidatos), score geral, componentes do vencedor por algoritmo,
+            máscara das origens cujo resultado é garantidamente o da pontuação completa)
+        """
+        targets, components = self.targets, self.components
+        overall = weighted_overall(components, weights)
+        overall = np.where(targets >= 0, overall, -np.inf)
+        position = overall.argmax(axis=1)
+        rows = np.arange(self.n_sources)
+        best_target = np.where(targets[rows, position] >= 0, targets[rows, position], -1)
+        best_overall = np.where(best_target >= 0, overall[rows, position], 0.0)
+        winner_components = {
+            alg: components[rows, position, k] for k, alg in enumerate(ALGORITHMS)
+        }
+        
+        # Sem destinos descartados (ex.: pares candidatos) o cache da origem é completo
+        complete = np.isneginf(self.excluded_max).all(axis=1)
+        if any(weights[alg] < 0 for alg in ALGORITHMS):
+            # Limite superior só vale para pesos não negativos
+            exact = complete.copy()
+        else:
+            with np.errstate(invalid='ignore'):
+                excluded_bound = weighted_overall(self.excluded_max, weights)
+            exact = complete | (best_overall > excluded_bound + BOUND_EPSILON)
+        
+        # Com os mesmos pesos da pontuação, o vencedor exato foi guardado explicitamente
+        for index, built in enumerate(self.weight_sets):
+            if all(built[alg] == weights[alg] for alg in ALGORITHMS):
+                exact |= self.row_weights == index
+        return best_target, best_overall, winner_components, exact
@@ -0,0 +1,167 @@
+"""
+Agregação incremental do relatório de comparação
+Contagens, médias, histograma de scores e estatísticas por algoritmo são atualizados à
+medida que as correspondências são produzidas; o relatório final (ou parcial, durante a
+busca) sai das somas acumuladas, sem percorrer as correspondências de novo
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from match_store import ALGORITHMS, MatchStore, engine_types
+
+# Faixas do histograma de scores gerais em [0, 1]
+DEFAULT_HISTOGRAM_BINS = 10
+
+
+class ReportAggregator:
+    """
+    Estatísticas do relatório acumuladas correspondência a correspondência
+    
+    Cada correspondência pode ter peso (ex.: quantidade de linhas de origem representadas
+    por um valor distinto na deduplicação). Seguro para uso por várias threads.
+    """
+    
+    def __init__(self, histogram_bins: int = DEFAULT_HISTOGRAM_BINS):
+        """
+        Args:
+            histogram_bins: Quantidade de faixas do histograma de scores gerais
+        """
+        MatchType, DataType, _ = engine_types()
+        self._match_types = list(MatchType)
+        self._data_types = list(DataType)
+        self._match_codes = {member: code for code, member in enumerate(self._match_types)}
+        self._data_codes = {member: code for code, member in enumerate(self._data_types)}
+        self._lock = threading.Lock()
+        
+        self.histogram_bins = histogram_bins
+        self.count = 0
+        self.similarity_sum = 0.0
+        self.confidence_sum = 0.0
+        # Listas simples: a atualização de uma única correspondência fica barata
+        self.match_type_totals = [0] * len(self._match_types)
+        self.data_type_totals = [0] * len(self._data_types)
+        # Ordem de primeira ocorrência dos tipos de dados (ordem da distribuição)
+        self._data_type_order: List[int] = []
+        self.histogram = [0] * histogram_bins
+        self.algorithm_sums = [0.0] * len(ALGORITHMS)
+        self.algorithm_min = [float('inf')] * len(ALGORITHMS)
+        self.algorithm_max = [float('-inf')] * len(ALGORITHMS)
+    
+    def _bin(self, similarity: float) -> int:
+        """Faixa do histograma de um score geral"""
+        return min(max(int(similarity * self.histogram_bins), 0), self.histogram_bins - 1)
+    
+    def add(self, match: Any, weight: int = 1):
+        """
+        Acumula uma correspondência
+        
+        Args:
+            match: MatchResult
+            weight: Quantidade de correspondências que ela representa
+        """
+        data_code = self._data_codes[match.data_type]
+        with self._lock:
+            self.count += weight
+            self.similarity_sum += match.similarity_score * weight
+            self.confidence_sum += match.confidence * weight
+            self.match_type_totals[self._match_codes[match.match_type]] += weight
+            self.data_type_totals[data_code] += weight
+            if data_code not in self._data_type_order:
+                self._data_type_order.append(data_code)
+            self.histogram[self._bin(match.similarity_score)] += weight
+            for k, alg in enumerate(ALGORITHMS):
+                score = match.algorithm_scores.get(alg, 0.0)
+                self.algorithm_sums[k] += score * weight
+                self.algorithm_min[k] = min(self.algorithm_min[k], score)
+                self.algorithm_max[k] = max(self.algorithm_max[k], score)
+    
+    def add_arrays(self, similarity: np.ndarray, confidence: np.ndarray, match_type: np.ndarray,
+                   data_type: np.ndarray, scores: np.ndarray, weights: Optional[np.ndarray] = None):
+        """
+        Acumula um bloco de correspondências em formato colunar
+        
+        Args:
+            similarity: Score geral por correspondência
+            confidence: Confiança por correspondência
+            match_type, data_type: Posição em MatchType / DataType
+            scores: Scores por algoritmo (uma coluna por item de ALGORITHMS)
+            weights: Peso de cada correspondência (padrão: 1)
+        """
+        if len(similarity) == 0:
+            return
+        similarity = np.asarray(similarity, dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        weights = np.ones(len(similarity), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+        bins = np.clip((similarity * self.histogram_bins).astype(np.int64), 0, self.histogram_bins - 1)
+        
+        def totals(codes: np.ndarray, size: int) -> List[int]:
+            return np.bincount(codes, weights, minlength=size).astype(np.int64).tolist()
+        
+        with self._lock:
+            self.count += int(weights.sum())
+            self.similarity_sum += float(similarity @ weights)
+            self.confidence_sum += float(np.asarray(confidence, dtype=np.float64) @ weights)
+            self.match_type_totals = [a + b for a, b in zip(
+                self.match_type_totals, totals(match_type, len(self._match_types)))]
+            self.data_type_totals = [a + b for a, b in zip(
+                self.data_type_totals, totals(data_type, len(self._data_types)))]
+            for code in dict.fromkeys(np.asarray(data_type).tolist()):
+                if code not in self._data_type_order:
+                    self._data_type_order.append(code)
+            self.histogram = [a + b for a, b in zip(self.histogram, totals(bins, self.histogram_bins))]
+            self.algorithm_sums = (np.asarray(self.algorithm_sums) + weights @ scores).tolist()
+            self.algorithm_min = np.minimum(self.algorithm_min, scores.min(axis=0)).tolist()
+            self.algorithm_max = np.maximum(self.algorithm_max, scores.max(axis=0)).tolist()
+    
+    def add_store(self, store: MatchStore, weights: Optional[np.ndarray] = None):
+        """Acumula todas as correspondências de um MatchStore"""
+        self.add_arrays(store.similarity, store.confidence, store.match_type, store.data_type,
+                        store.scores, weights)
+    
+    @classmethod
+    def from_store(cls, store: MatchStore) -> 'ReportAggregator':
+        """Agregador com as correspondências de um MatchStore (uma passada vetorizada)"""
+        aggregator = cls()
+        aggregator.add_store(store)
+        return aggregator
+    
+    def match_type_counts(self) -> Dict[Any, int]:
+        """Quantidade de correspondências por MatchType (todos os tipos, inclusive zerados)"""
+        return {member: int(total) for member, total in zip(self._match_types, self.match_type_totals)}
+    
+    def average_similarity(self) -> float:
+        """Score geral médio (0.0 sem correspondências)"""
+        return self.similarity_sum / self.count if self.count else 0.0
+    
+    def average_confidence(self) -> float:
+        """Confiança média (0.0 sem correspondências)"""
+        return self.confidence_sum / self.count if self.count else 0.0
+    
+    def data_type_distribution(self) -> Dict[str, int]:
+        """Quantidade por tipo de dados, na ordem da primeira ocorrência"""
+        return {self._data_types[code].value: int(self.data_type_totals[code]) for code in self._data_type_order}
+    
+    def algorithm_performance(self) -> Dict[str, float]:
+        """Score médio de cada algoritmo (vazio sem correspondências)"""
+        if not self.count:
+            return {}
+        return {alg: float(total / self.count) for alg, total in zip(ALGORITHMS, self.algorithm_sums)}
+    
+    def algorithm_ranges(self) -> Dict[str, Dict[str, float]]:
+        """Menor e maior score de cada algoritmo (vazio sem correspondências)"""
+        if not self.count:
+            return {}
+        return {
+            alg: {'min': float(low), 'max': float(high)}
+            for alg, low, high in zip(ALGORITHMS, self.algorithm_min, self.algorithm_max)
+        }
+    
+    def similarity_histogram(self) -> Dict[str, List]:
+        """Histograma dos scores gerais: limites das faixas e quantidades"""
+        return {
+            'edges': np.linspace(0.0, 1.0, self.histogram_bins + 1).tolist(),
+            'counts': list(self.histogram)
+        }
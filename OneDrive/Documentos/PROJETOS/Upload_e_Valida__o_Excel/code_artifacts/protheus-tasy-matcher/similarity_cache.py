@@ -0,0 +1,115 @@
+"""
+Cache LRU com limite de entradas e/ou de bytes para o motor de comparação
+As chaves são reduzidas a um hash inteiro de 64 bits para ocupar pouca memória
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Custo aproximado, em bytes, de um slot do OrderedDict (nó da lista + entrada da tabela)
+_ENTRY_OVERHEAD = 100
+
+
+class LRUCache:
+    """Cache LRU limitado por número de entradas e/ou bytes aproximados"""
+    
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Inicializa o cache
+        
+        Args:
+            max_entries: Número máximo de entradas (None = sem limite)
+            max_bytes: Tamanho máximo aproximado em bytes (None = sem limite)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: 'OrderedDict[int, Any]' = OrderedDict()
+        self._sizes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(*parts: Hashable) -> int:
+        """Chave compacta (hash de 64 bits) a partir das partes"""
+        return hash(parts)
+    
+    @staticmethod
+    def _sizeof(key: int, value: Any) -> int:
+        """Tamanho aproximado de uma entrada"""
+        size = sys.getsizeof(key) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+        if isinstance(value, tuple):
+            size += sum(sys.getsizeof(item) for item in value)
+        return size
+    
+    def get(self, key: int, default: Any = None) -> Any:
+        """Retorna o valor (marcando-o como usado recentemente) ou `default`"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: int, value: Any):
+        """Insere um valor e remove as entradas menos usadas se exceder os limites"""
+        size = self._sizeof(key, value)
+        with self._lock:
+            if key in self._data:
+                self.bytes -= self._sizes[key]
+                self._data.move_to_end(key)
+            self._data[key] = value
+            self._sizes[key] = size
+            self.bytes += size
+            self._evict_over_limits()
+    
+    def _evict_over_limits(self):
+        """Remove as entradas menos usadas até respeitar os limites (chamar com o lock)"""
+        while self._data and (
+            (self.max_entries is not None and len(self._data) > self.max_entries) or
+            (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            evicted, _ = self._data.popitem(last=False)
+            self.bytes -= self._sizes.pop(evicted)
+            self.evictions += 1
+    
+    def resize(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """Altera os limites (removendo entradas se necessário)"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self._evict_over_limits()
+    
+    def clear(self):
+        """Remove todas as entradas (os contadores são preservados)"""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: int) -> bool:
+        return key in self._data
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
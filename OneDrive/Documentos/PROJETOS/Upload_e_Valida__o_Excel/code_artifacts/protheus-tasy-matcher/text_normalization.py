@@ -0,0 +1,169 @@
+"""
+Normalização de texto compartilhada entre os aplicativos
+Cada valor distinto é normalizado uma única vez e o resultado é replicado; acentos são
+removidos por uma tabela de tradução por caractere (preenchida sob demanda)
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+RE_SPACES = re.compile(r'\s+')
+
+
+class _AccentTable(dict):
+    """
+    Tabela para str.translate: caractere -> caractere(s) sem acento
+    
+    Equivale a decompor o texto inteiro (NFD/NFKD) e descartar as marcas, exceto quando
+    sobra um caractere de classe combinante não nula (reordenação canônica entre
+    caracteres); esses caracteres ficam em `unsafe` e o texto usa o caminho completo.
+    """
+    
+    def __init__(self, form: str, keep_mark):
+        super().__init__()
+        self.form = form
+        self.keep_mark = keep_mark
+        self.unsafe = set()
+    
+    def fold(self, text: str) -> str:
+        """Decomposição + remoção das marcas sobre o texto inteiro (caminho de referência)"""
+        return ''.join(c for c in unicodedata.normalize(self.form, text) if self.keep_mark(c))
+    
+    def __missing__(self, codepoint: int) -> str:
+        folded = self.fold(chr(codepoint))
+        if any(unicodedata.combining(c) for c in folded):
+            self.unsafe.add(chr(codepoint))
+        self[codepoint] = folded
+        return folded
+
+
+@dataclass(frozen=True)
+class NormalizationProfile:
+    """
+    Regras de normalização de um aplicativo
+    
+    Ordem: str -> minúsculas -> strip inicial -> remoção de acentos -> caracteres
+    especiais -> espaços múltiplos -> strip final.
+    
+    Attributes:
+        accents: None (mantém acentos), 'NFD' (remove categoria Mn) ou 'NFKD' (remove combinantes)
+        special_chars: Regex dos caracteres especiais
+        special_replacement: Substituto dos caracteres especiais (' ' ou '')
+        strip_before: Remove espaços das bordas antes da remoção de acentos
+        strip_after: Remove espaços das bordas no final
+    """
+    accents: Optional[str]
+    special_chars: str
+    special_replacement: str = ' '
+    strip_before: bool = False
+    strip_after: bool = True
+
+
+# app.normalize_text: sem remoção de acentos; '_' vira espaço
+APP_PROFILE = NormalizationProfile(accents=None, special_chars=r'[^a-z0-9\s]')
+
+# app_advanced.normalizar_texto
+ADVANCED_PROFILE = NormalizationProfile(accents='NFD', special_chars=r'[^a-z0-9\s]')
+
+# EnhancedComparisonEngine.normalize_text e AdvancedAIComparator.normalize_text: mantém '_'
+ENGINE_PROFILE = NormalizationProfile(accents='NFKD', special_chars=r'[^\w\s]', strip_before=True)
+AI_PROFILE = ENGINE_PROFILE
+
+# CellComparator.normalize_text: especiais removidos sem espaço e sem strip final
+MAPPING_PROFILE = NormalizationProfile(
+    accents='NFD', special_chars=r'[^\w\s]', special_replacement='', strip_before=True, strip_after=False
+)
+
+_ACCENT_TABLES = {
+    'NFD': _AccentTable('NFD', lambda c: unicodedata.category(c) != 'Mn'),
+    'NFKD': _AccentTable('NFKD', lambda c: not unicodedata.combining(c))
+}
+
+_SPECIAL_PATTERNS = {}
+
+
+def _special_pattern(profile: NormalizationProfile) -> 're.Pattern':
+    """Regex compilada (uma vez por padrão) dos caracteres especiais"""
+    pattern = _SPECIAL_PATTERNS.get(profile.special_chars)
+    if pattern is None:
+        pattern = _SPECIAL_PATTERNS[profile.special_chars] = re.compile(profile.special_chars)
+    return pattern
+
+
+def _normalize_str(text: str, profile: NormalizationProfile, special: 're.Pattern') -> str:
+    """Normaliza um texto já convertido para str"""
+    text = text.lower()
+    if profile.strip_before:
+        text = text.strip()
+    if profile.accents is not None and not text.isascii():
+        table = _ACCENT_TABLES[profile.accents]
+        folded = text.translate(table)
+        if table.unsafe and not table.unsafe.isdisjoint(text):
+            folded = table.fold(text)
+        text = folded
+    text = special.sub(profile.special_replacement, text)
+    text = RE_SPACES.sub(' ', text)
+    if profile.strip_after:
+        text = text.strip()
+    return text
+
+
+def normalize_value(value: Any, profile: NormalizationProfile) -> str:
+    """
+    Normaliza um único valor
+    
+    Args:
+        value: Valor qualquer (nulos viram "")
+        profile: Perfil de normalização
+    
+    Returns:
+        Texto normalizado
+    """
+    if pd.isna(value):
+        return ""
+    return _normalize_str(str(value), profile, _special_pattern(profile))
+
+
+def normalize_series(values: Any, profile: NormalizationProfile) -> Any:
+    """
+    Normaliza uma coleção inteira, uma vez por valor distinto
+    
+    Os valores são agrupados pela representação em str (a mesma usada na
+    normalização), então 1 e 1.0 continuam distintos.
+    
+    Args:
+        values: Series, array ou lista
+        profile: Perfil de normalização
+    
+    Returns:
+        Series com o mesmo índice (se `values` for Series) ou array de objetos
+    """
+    array = values.to_numpy(dtype=object) if isinstance(values, pd.Series) else np.asarray(values, dtype=object)
+    array = array.reshape(-1)
+    if array.size:
+        missing = pd.isna(array)
+        keys = pd.Series(array, dtype=object).astype(str).to_numpy(dtype=object)
+        keys[missing] = ''
+        codes, uniques = pd.factorize(keys)
+        special = _special_pattern(profile)
+        normalized = np.array([_normalize_str(text, profile, special) for text in uniques] + [''], dtype=object)
+        codes[missing] = -1
+        result = normalized[codes]
+    else:
+        result = np.empty(0, dtype=object)
+    
+    if isinstance(values, pd.Series):
+        return pd.Series(result, index=values.index, name=values.name)
+    return result
+
+
+def normalize_list(values: Any, profile: NormalizationProfile) -> List[str]:
+    """Atalho para normalize_series retornando uma lista de str"""
+    if not isinstance(values, (pd.Series, np.ndarray, list)):
+        values = list(values)
+    return normalize_series(values, profile).tolist()
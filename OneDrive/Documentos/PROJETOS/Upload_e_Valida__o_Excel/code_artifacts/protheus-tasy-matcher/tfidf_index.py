@@ -0,0 +1,170 @@
+"""
+Índice TF-IDF de n-gramas de caracteres para similaridade coseno
+Ajustado uma única vez sobre o corpus (origem + destino) e reutilizado em todos os pares
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+class TfidfCorpusIndex:
+    """Índice TF-IDF com linhas normalizadas (L2) para coseno por produto escalar esparso"""
+    
+    def __init__(self, analyzer: str = 'char_wb', ngram_range: Tuple[int, int] = (2, 4),
+                 max_features: Optional[int] = None, lowercase: bool = True):
+        """
+        Inicializa o índice
+        
+        Args:
+            analyzer: Analisador do TfidfVectorizer ('char_wb' ou 'char')
+            ngram_range: Faixa de tamanhos dos n-gramas
+            max_features: Limite opcional de vocabulário
+            lowercase: Converte para minúsculas antes de extrair n-gramas
+        """
+        self.vectorizer = TfidfVectorizer(
+            analyzer=analyzer,
+            ngram_range=ngram_range,
+            max_features=max_features,
+            lowercase=lowercase,
+            norm='l2'
+        )
+        self.matrix: Optional[sparse.csr_matrix] = None
+        self.texts: List[str] = []
+        self._row_by_text: Dict[str, int] = {}
+        self._row_cache: Dict[str, Dict[int, float]] = {}
+    
+    @property
+    def is_fitted(self) -> bool:
+        """Indica se o índice já foi ajustado"""
+        return self.matrix is not None
+    
+    def fit(self, texts: Iterable[str]) -> 'TfidfCorpusIndex':
+        """
+        Ajusta vocabulário e idf sobre os textos distintos do corpus
+        
+        Args:
+            texts: Textos (já normalizados) de origem e destino
+        
+        Returns:
+            O próprio índice
+        """
+        distinct = list(dict.fromkeys(t for t in texts if t))
+        if not distinct:
+            return self.load([], None)
+        
+        matrix = self.vectorizer.fit_transform(distinct).tocsr()
+        matrix.sort_indices()
+        return self.load(distinct, matrix)
+    
+    def load(self, texts: List[str], matrix: Optional[sparse.csr_matrix]) -> 'TfidfCorpusIndex':
+        """
+        Carrega linhas já calculadas (ex.: compartilhadas com processos de trabalho)
+        
+        Args:
+            texts: Textos distintos do corpus, na ordem das linhas
+            matrix: Matriz TF-IDF correspondente (ou None para índice vazio)
+        
+        Returns:
+            O próprio índice
+        """
+        self.texts = list(texts)
+        self.matrix = matrix if self.texts else None
+        self._row_by_text = {text: i for i, text in enumerate(self.texts)}
+        self._row_cache = {}
+        return self
+    
+    def get_state(self) -> Dict[str, Any]:
+        """Estado ajustado (vetorizador, textos e matriz), para persistência"""
+        return {'vectorizer': self.vectorizer, 'texts': self.texts, 'matrix': self.matrix}
+    
+    def set_state(self, state: Dict[str, Any]) -> 'TfidfCorpusIndex':
+        """Restaura um estado de get_state"""
+        self.vectorizer = state['vectorizer']
+        return self.load(state['texts'], state['matrix'])
+    
+    def __contains__(self, text: str) -> bool:
+        return text in self._row_by_text
+    
+    def __len__(self) -> int:
+        return len(self._row_by_text)
+    
+    def vectors(self, texts: List[str]) -> sparse.csr_matrix:
+        """
+        Retorna as linhas TF-IDF dos textos (textos fora do corpus são transformados)
+        
+        Args:
+            texts: Textos normalizados
+        
+        Returns:
+            Matriz esparsa len(texts) x vocabulário
+        """
+        if not self.is_fitted:
+            raise ValueError("Índice TF-IDF não ajustado")
+        
+        rows = [self._row_by_text.get(t, -1) for t in texts]
+        if all(r >= 0 for r in rows):
+            return self.matrix[rows]
+        
+        unknown = [t for t, r in zip(texts, rows) if r < 0]
+        extra = self.vectorizer.transform(unknown).tocsr()
+        combined = sparse.vstack([self.matrix, extra]).tocsr()
+        next_row = self.matrix.shape[0]
+        positions = []
+        for r in rows:
+            if r >= 0:
+                positions.append(r)
+            else:
+                positions.append(next_row)
+                next_row += 1
+        result = combined[positions]
+        result.sort_indices()
+        return result
+    
+    def _row(self, text: str) -> Dict[int, float]:
+        """Linha TF-IDF esparsa de um texto como dicionário coluna -> peso"""
+        cached = self._row_cache.get(text)
+        if cached is None:
+            vector = self.vectors([text])
+            cached = dict(zip(vector.indices.tolist(), vector.data.tolist()))
+            self._row_cache[text] = cached
+        return cached
+    
+    def similarity(self, text1: str, text2: str) -> float:
+        """
+        Coseno entre dois textos
+        
+        Args:
+            text1, text2: Textos normalizados
+        
+        Returns:
+            Similaridade coseno (0-1)
+        """
+        if not text1 or not text2:
+            return 0.0
+        
+        row1 = self._row(text1)
+        row2 = self._row(text2)
+        if len(row2) < len(row1):
+            row1, row2 = row2, row1
+        # Soma em ordem crescente de coluna, como no produto esparso de block_similarity
+        return sum(weight * row2[col] for col, weight in sorted(row1.items()) if col in row2)
+    
+    def block_similarity(self, texts1: List[str], texts2: List[str]) -> np.ndarray:
+        """
+        Matriz de coseno entre dois blocos de textos
+        
+        Args:
+            texts1: Textos normalizados (linhas)
+            texts2: Textos normalizados (colunas)
+        
+        Returns:
+            Matriz densa len(texts1) x len(texts2)
+        """
+        if not texts1 or not texts2:
+            return np.zeros((len(texts1), len(texts2)))
+        if not self.is_fitted:
+            raise ValueError("Índice TF-IDF não ajustado")
+        return (self.vectors(texts1) @ self.vectors(texts2).T).toarray()
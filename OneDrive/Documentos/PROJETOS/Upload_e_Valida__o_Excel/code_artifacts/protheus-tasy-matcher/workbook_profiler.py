@@ -0,0 +1,280 @@
+"""
+Perfil de pastas de trabalho Excel em uma única leitura
+Cada aba é lida uma vez como linhas brutas (as mesmas que o pandas recebe do leitor);
+as variantes de cabeçalho são montadas a partir desse buffer com o mesmo TextParser do
+read_excel, e o preenchimento, o tipo e a contagem aproximada de distintos (HyperLogLog)
+de cada coluna saem de operações vetorizadas sobre o DataFrame; cada coluna ganha ainda
+uma assinatura MinHash dos valores distintos normalizados, comparável entre abas por LSH
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from text_normalization import ADVANCED_PROFILE, normalize_list
+from workbook_session import WorkbookSession, parse_rows
+
+# Versão do perfil (entra na chave do cache; mudar ao alterar o conteúdo dos perfis)
+PROFILE_VERSION = 2
+
+# Linhas lidas para a amostra de dados exibida (mesmo nrows da leitura anterior)
+PREVIEW_ROWS = 10
+
+# Registradores do HyperLogLog: 2**14 (erro padrão ~0,8%; contagens pequenas ficam exatas
+# na prática pela correção de contagem linear)
+HLL_PRECISION = 14
+
+# MinHash: funções de hash por assinatura e faixas do LSH (MINHASH_PERMUTATIONS / LSH_BANDS
+# linhas por faixa; com 32 faixas de 4, pares com Jaccard ~0,42 colidem em metade das vezes)
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+# Perfil de normalização dos valores nas assinaturas (o mesmo do aplicativo avançado)
+SIGNATURE_PROFILE = ADVANCED_PROFILE
+# Valores por bloco no cálculo da assinatura (bloco x MINHASH_PERMUTATIONS hashes)
+_MINHASH_CHUNK = 4096
+
+# Coeficientes fixos (hash multiplicativo a*x + b em 64 bits, a ímpar): assinaturas de
+# execuções e arquivos diferentes são comparáveis
+_minhash_rng = np.random.default_rng(0x5EED)
+_MINHASH_A = _minhash_rng.integers(0, 2 ** 63, MINHASH_PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_MINHASH_B = _minhash_rng.integers(0, 2 ** 63, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+@dataclass
+class ColumnProfile:
+    """Perfil de uma coluna (sobre as linhas analisadas)"""
+    name: Any
+    dtype: str
+    non_null: int
+    null: int
+    distinct: int                 # aproximado (HyperLogLog)
+    sample_values: List[Any]      # primeiros valores não nulos
+    signature: Optional[np.ndarray] = None   # MinHash dos valores distintos normalizados
+    signature_size: int = 0                  # quantidade desses valores
+
+
+@dataclass
+class SheetProfile:
+    """Perfil de uma aba"""
+    name: str
+    columns_header_0: List[Any] = field(default_factory=list)
+    columns_header_1: List[Any] = field(default_factory=list)
+    total_rows: int = 0           # linhas de dados com cabeçalho na linha 0
+    profiled_rows: int = 0        # linhas usadas nas estatísticas (menor se amostrado)
+    preview: List[Dict[Any, Any]] = field(default_factory=list)
+    dtypes: Dict[str, str] = field(default_factory=dict)
+    columns: Dict[Any, ColumnProfile] = field(default_factory=dict)
+    error: Optional[str] = None
+    
+    @property
+    def sampled(self) -> bool:
+        return self.profiled_rows < self.total_rows
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """bit_length de cada uint64 (frexp exato em cada metade de 32 bits)"""
+    _, high = np.frexp((values >> np.uint64(32)).astype(np.float64))
+    _, low = np.frexp((values & np.uint64(0xFFFFFFFF)).astype(np.float64))
+    return np.where(high > 0, high + 32, low)
+
+
+def approximate_distinct(values: pd.Series, precision: int = HLL_PRECISION) -> int:
+    """
+    Quantidade aproximada de valores distintos (HyperLogLog sobre hash_pandas_object)
+    
+    Args:
+        values: Valores não nulos
+        precision: Bits de índice do registrador (2**precision registradores)
+    
+    Returns:
+        Estimativa arredondada, limitada à quantidade de valores
+    """
+    if values.empty:
+        return 0
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+    m = 1 << precision
+    suffix_bits = 64 - precision
+    indices = (hashes >> np.uint64(suffix_bits)).astype(np.intp)
+    suffixes = hashes & np.uint64((1 << suffix_bits) - 1)
+    ranks = suffix_bits - _bit_length(suffixes) + 1
+    
+    registers = np.zeros(m, dtype=np.int64)
+    np.maximum.at(registers, indices, ranks)
+    
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # Faixa pequena: contagem linear
+        estimate = m * math.log(m / zeros)
+    return int(min(round(estimate), len(values)))
+
+
+def signature_texts(values: pd.Series) -> Set[str]:
+    """
+    Valores distintos normalizados (SIGNATURE_PROFILE) de uma coluna, sem vazios
+    
+    Floats inteiros entram sem '.0', para casar com colunas de inteiros.
+    """
+    distinct = pd.Series(pd.unique(values), dtype=values.dtype)
+    if pd.api.types.is_float_dtype(distinct):
+        integers = (distinct % 1 == 0) & (distinct.abs() < 2 ** 53)
+        texts = distinct.astype(str)
+        texts[integers] = distinct[integers].astype(np.int64).astype(str)
+    else:
+        texts = distinct.astype(str)
+    return {text for text in normalize_list(texts.tolist(), SIGNATURE_PROFILE) if text}
+
+
+def minhash_signature(texts: Set[str]) -> Optional[np.ndarray]:
+    """
+    Assinatura MinHash de um conjunto de textos
+    
+    Returns:
+        Array uint64 de MINHASH_PERMUTATIONS mínimos, ou None para o conjunto vazio
+    """
+    if not texts:
+        return None
+    hashes = pd.util.hash_array(np.array(sorted(texts), dtype=object))
+    signature = np.full(MINHASH_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), _MINHASH_CHUNK):
+        chunk = hashes[start:start + _MINHASH_CHUNK, None]
+        # Estouro em uint64 = aritmética módulo 2**64
+        np.minimum(signature, (chunk * _MINHASH_A + _MINHASH_B).min(axis=0), out=signature)
+    return signature
+
+
+def estimate_jaccard(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """Jaccard estimado entre os conjuntos de duas assinaturas MinHash"""
+    return float(np.count_nonzero(signature_a == signature_b)) / len(signature_a)
+
+
+def estimate_containment(signature_a: np.ndarray, size_a: int, signature_b: np.ndarray, size_b: int) -> float:
+    """
+    Fração estimada do menor conjunto contida no maior
+    
+    |A ∩ B| = J / (1 + J) * (|A| + |B|), com J estimado pelas assinaturas; mais útil que
+    o Jaccard para tabelas de consulta (um conjunto quase todo dentro de um maior).
+    """
+    if not size_a or not size_b:
+        return 0.0
+    jaccard = estimate_jaccard(signature_a, signature_b)
+    return min(1.0, jaccard / (1 + jaccard) * (size_a + size_b) / min(size_a, size_b))
+
+
+def lsh_candidate_pairs(signatures: Sequence[Optional[np.ndarray]], bands: int = LSH_BANDS) -> Set[Tuple[int, int]]:
+    """
+    Pares (i, j), i < j, cujas assinaturas coincidem em ao menos uma faixa do LSH
+    
+    Cada faixa agrupa as assinaturas em buckets pelo trecho correspondente; só pares no
+    mesmo bucket são candidatos, sem comparar todas as assinaturas entre si.
+    
+    Args:
+        signatures: Assinaturas de minhash_signature (None = fora da busca)
+        bands: Quantidade de faixas (divide MINHASH_PERMUTATIONS)
+    
+    Returns:
+        Conjunto de pares de posições em `signatures`
+    """
+    rows = MINHASH_PERMUTATIONS // bands
+    pairs: Set[Tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        for position, signature in enumerate(signatures):
+            if signature is not None:
+                buckets[signature[band * rows:(band + 1) * rows].tobytes()].append(position)
+        for members in buckets.values():
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    pairs.add((first, second))
+    return pairs
+
+
+def _sample_positions(total: int, size: int) -> np.ndarray:
+    """`size` posições igualmente espaçadas em [0, total), sempre incluindo a primeira"""
+    return np.unique(np.linspace(0, total - 1, size).astype(np.intp))
+
+
+def profile_sheet(name: str, rows: List[List[Any]], max_rows: Optional[int] = None) -> SheetProfile:
+    """
+    Perfil de uma aba a partir das linhas brutas
+    
+    Args:
+        name: Nome da aba
+        rows: Linhas como o leitor do pandas as entrega ao TextParser (as mesmas de
+            read_excel com header=None, dtype=object e na_filter=False)
+        max_rows: Acima desta quantidade de linhas de dados, as estatísticas das colunas
+            usam uma amostra igualmente espaçada de `max_rows` linhas (None = todas)
+    
+    Returns:
+        SheetProfile
+    """
+    profile = SheetProfile(name=name)
+    total = max(len(rows) - 1, 0)
+    
+    if max_rows is not None and total > max_rows:
+        positions = _sample_positions(total, max_rows) + 1
+        frame = parse_rows([rows[0]] + [rows[i] for i in positions], header=0)
+    else:
+        frame = parse_rows(rows, header=0)
+    
+    profile.columns_header_0 = list(frame.columns)
+    try:
+        profile.columns_header_1 = list(parse_rows(rows[:2 + PREVIEW_ROWS], header=1, nrows=PREVIEW_ROWS).columns)
+    except Exception:
+        profile.columns_header_1 = []
+    profile.total_rows = total
+    profile.profiled_rows = len(frame)
+    profile.preview = parse_rows(rows[:1 + PREVIEW_ROWS], header=0, nrows=PREVIEW_ROWS).head(3).to_dict('records')
+    profile.dtypes = {str(column): str(dtype) for column, dtype in frame.dtypes.items()}
+    
+    # Preenchimento de todas as colunas em uma operação
+    non_null = frame.notna().sum().to_numpy()
+    for position, column in enumerate(frame.columns):
+        if not non_null[position]:
+            continue
+        values = frame.iloc[:, position]
+        values = values[values.notna()]
+        texts = signature_texts(values)
+        profile.columns[column] = ColumnProfile(
+            name=column,
+            dtype=str(values.dtype),
+            non_null=int(non_null[position]),
+            null=int(len(frame) - non_null[position]),
+            distinct=approximate_distinct(values),
+            sample_values=values.head(5).tolist(),
+            signature=minhash_signature(texts),
+            signature_size=len(texts)
+        )
+    return profile
+
+
+def profile_workbook(source: Any, max_rows: Optional[int] = None,
+                     sheet_names: Optional[Sequence[str]] = None) -> Dict[str, SheetProfile]:
+    """
+    Perfil de todas as abas (ou das informadas) com uma leitura de cada aba
+    
+    As linhas brutas vêm de uma WorkbookSession (openpyxl somente leitura, só valores,
+    pasta aberta uma vez; .xls pelo leitor do pandas); passar a sessão compartilhada do
+    arquivo deixa as linhas lidas disponíveis para as demais páginas.
+    
+    Args:
+        source: WorkbookSession, caminho, bytes ou objeto arquivo (ex.: UploadedFile)
+        max_rows: Ver profile_sheet
+        sheet_names: Abas a analisar (padrão: todas, na ordem da pasta de trabalho)
+    
+    Returns:
+        {nome_da_aba: SheetProfile}; abas que falham trazem apenas `error`
+    """
+    session = source if isinstance(source, WorkbookSession) else WorkbookSession.from_source(source)
+    profiles: Dict[str, SheetProfile] = {}
+    for name in (sheet_names if sheet_names is not None else session.sheet_names):
+        try:
+            profiles[name] = profile_sheet(name, session.rows(name), max_rows=max_rows)
+        except Exception as e:
+            profiles[name] = SheetProfile(name=name, error=str(e))
+    return profiles
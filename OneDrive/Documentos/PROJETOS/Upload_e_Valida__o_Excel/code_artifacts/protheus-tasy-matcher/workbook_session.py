@@ -0,0 +1,267 @@
+"""
+Sessão de leitura de uma pasta de trabalho Excel compartilhada pelas páginas
+Cada aba é lida no máximo uma vez como linhas brutas (as mesmas que o pandas recebe do
+leitor), sob demanda; cada combinação (aba, linha de cabeçalho) vira um DataFrame no
+máximo uma vez, com o mesmo TextParser do read_excel, e é entregue às páginas como
+visão rasa (sem cópia dos dados). A sessão de um arquivo enviado fica no cache de
+recursos do Streamlit, endereçada pelo SHA-256 do conteúdo
+"""
+
+import io
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+from disk_cache import DiskCache, content_hash
+
+logger = logging.getLogger(__name__)
+
+# Versão do conteúdo das sessões (entra na chave; mudar ao alterar a leitura)
+SESSION_VERSION = 1
+
+# Sessões mantidas em memória (arquivos distintos enviados recentemente)
+MAX_SESSIONS = 8
+
+
+def _convert_cell(value: Any) -> Any:
+    """
+    Mesma conversão do leitor openpyxl do pandas (vazia = '', erro = NaN, inteiros exatos)
+    
+    Sem o tipo da célula (values_only), textos iguais a um código de erro do Excel também
+    viram NaN; o TextParser já trata '#N/A' como nulo nas linhas de dados.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return np.nan if value in ERROR_CODES else value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        integer = int(value)
+        return integer if integer == value else float(value)
+    return value
+
+
+def read_sheet_rows(worksheet) -> List[List[Any]]:
+    """Linhas da aba (openpyxl) exatamente como o leitor do pandas as entrega ao TextParser"""
+    worksheet.reset_dimensions()
+    rows: List[List[Any]] = []
+    last_row_with_data = -1
+    for row_number, values in enumerate(worksheet.iter_rows(values_only=True)):
+        row = [_convert_cell(value) for value in values]
+        while row and row[-1] == '':
+            row.pop()
+        if row:
+            last_row_with_data = row_number
+        rows.append(row)
+    rows = rows[:last_row_with_data + 1]
+    if rows:
+        width = max(len(row) for row in rows)
+        rows = [row + [''] * (width - len(row)) for row in rows]
+    return rows
+
+
+def parse_rows(rows: List[List[Any]], header: Optional[int] = 0, nrows: Optional[int] = None) -> pd.DataFrame:
+    """Mesma conversão de read_excel(header=header, nrows=nrows) sobre linhas brutas"""
+    if not rows:
+        return pd.DataFrame()
+    try:
+        # TextParser pode alterar as linhas recebidas
+        return TextParser([list(row) for row in rows], header=header, nrows=nrows,
+                          skip_blank_lines=False).read(nrows=nrows)
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def session_key(data: bytes) -> str:
+    """Chave de uma sessão: SHA-256 do conteúdo do arquivo + versão"""
+    return content_hash('workbook_session', SESSION_VERSION, data)
+
+
+def _read_bytes(source: Any) -> bytes:
+    """Conteúdo de bytes, objeto arquivo (ex.: UploadedFile do Streamlit) ou caminho"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    if hasattr(source, 'read'):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return source.read()
+    with open(source, 'rb') as file:
+        return file.read()
+
+
+class WorkbookSession:
+    """
+    Pasta de trabalho lida sob demanda, uma vez por aba e por linha de cabeçalho
+    
+    Os DataFrames entregues por frame() e frames() são visões rasas do DataFrame guardado
+    na sessão: compartilham os dados, então acrescentar, remover ou trocar colunas é
+    seguro, mas alterar valores no lugar (ex.: df.loc[...] = x) exige uma cópia antes.
+    A sessão pode ser usada por várias sessões do Streamlit ao mesmo tempo.
+    """
+    
+    def __init__(self, data: bytes, cache: Optional[DiskCache] = None, key: Optional[str] = None):
+        """
+        Args:
+            data: Conteúdo do arquivo (.xlsx ou .xls)
+            cache: Cache em disco dos DataFrames montados (opcional)
+            key: session_key(data), se já calculada
+        """
+        self.key = key or session_key(data)
+        self._data = data
+        self._cache = cache
+        self._lock = threading.RLock()
+        self._workbook = None
+        self._excel_file: Optional[pd.ExcelFile] = None
+        self._sheet_names: Optional[List[str]] = None
+        self._rows: Dict[str, List[List[Any]]] = {}
+        self._frames: Dict[Tuple[str, Optional[int]], pd.DataFrame] = {}
+        # Leituras de abas e montagens de DataFrames feitas pela sessão
+        self.stats = {'sheet_reads': 0, 'frame_builds': 0, 'frame_cache_hits': 0}
+    
+    @classmethod
+    def from_source(cls, source: Any, cache: Optional[DiskCache] = None) -> 'WorkbookSession':
+        """Sessão de um caminho, bytes ou objeto arquivo (ex.: UploadedFile do Streamlit)"""
+        return cls(_read_bytes(source), cache)
+    
+    def _open(self):
+        """Abre a pasta (openpyxl somente leitura; .xls pelo leitor do pandas)"""
+        if self._sheet_names is not None:
+            return
+        try:
+            self._workbook = load_workbook(io.BytesIO(self._data), read_only=True, data_only=True)
+            self._sheet_names = list(self._workbook.sheetnames)
+        except Exception:
+            self._excel_file = pd.ExcelFile(io.BytesIO(self._data))
+            self._sheet_names = list(self._excel_file.sheet_names)
+    
+    @property
+    def sheet_names(self) -> List[str]:
+        """Nomes das abas, na ordem da pasta de trabalho"""
+        with self._lock:
+            self._open()
+            return list(self._sheet_names)
+    
+    def rows(self, sheet_name: str) -> List[List[Any]]:
+        """
+        Linhas brutas da aba (lidas na primeira chamada)
+        
+        A lista é a guardada na sessão: não deve ser alterada.
+        
+        Raises:
+            KeyError: Aba inexistente
+        """
+        with self._lock:
+            rows = self._rows.get(sheet_name)
+            if rows is not None:
+                return rows
+            self._open()
+            if sheet_name not in self._sheet_names:
+                raise KeyError(f"Aba '{sheet_name}' não encontrada")
+            if self._workbook is not None:
+                rows = read_sheet_rows(self._workbook[sheet_name])
+            else:
+                raw = self._excel_file.parse(sheet_name, header=None, dtype=object, na_filter=False)
+                rows = raw.values.tolist()
+            self.stats['sheet_reads'] += 1
+            logger.debug("Aba '%s' lida: %d linhas", sheet_name, len(rows))
+            self._rows[sheet_name] = rows
+            return rows
+    
+    def frame(self, sheet_name: str, header: Optional[int] = 0) -> pd.DataFrame:
+        """
+        Aba como DataFrame, equivalente a read_excel(sheet_name=..., header=header)
+        
+        Args:
+            sheet_name: Nome da aba
+            header: Linha do cabeçalho (base 0) ou None para colunas numeradas
+        
+        Returns:
+            Visão rasa do DataFrame guardado na sessão (sem cópia dos dados)
+        """
+        with self._lock:
+            df = self._frames.get((sheet_name, header))
+            if df is None:
+                df = self._build_frame(sheet_name, header)
+                self._frames[(sheet_name, header)] = df
+            return df.copy(deep=False)
+    
+    def _build_frame(self, sheet_name: str, header: Optional[int]) -> pd.DataFrame:
+        """Monta o DataFrame a partir das linhas brutas (ou do cache em disco)"""
+        cache_key = content_hash(self.key, sheet_name, header) if self._cache is not None else None
+        if cache_key is not None:
+            df = self._cache.get_object('workbook_frame', cache_key)
+            if df is not None:
+                self.stats['frame_cache_hits'] += 1
+                return df
+        rows = self.rows(sheet_name)
+        try:
+            df = parse_rows(rows, header=header)
+        except Exception as err:
+            # Mesma mensagem do read_excel (nome da aba ao final)
+            if err.args and isinstance(err.args[0], str):
+                err.args = (f"{err.args[0]} (sheet: {sheet_name})", *err.args[1:])
+            raise
+        self.stats['frame_builds'] += 1
+        if cache_key is not None:
+            self._cache.put_object('workbook_frame', cache_key, df)
+        return df
+    
+    def frames(self, header: Optional[int] = 0, skip_empty: bool = False) -> Dict[str, pd.DataFrame]:
+        """
+        Todas as abas, equivalente a read_excel(sheet_name=None, header=header)
+        
+        Args:
+            header: Linha do cabeçalho de todas as abas
+            skip_empty: Omite abas sem linhas de dados
+        
+        Returns:
+            {nome_da_aba: visão rasa do DataFrame}
+        """
+        frames = {name: self.frame(name, header) for name in self.sheet_names}
+        if skip_empty:
+            frames = {name: df for name, df in frames.items() if not df.empty}
+        return frames
+
+
+try:
+    import streamlit as st
+    
+    @st.cache_resource(max_entries=MAX_SESSIONS, show_spinner=False)
+    def _cached_session(key: str, _data: bytes, _cache: Optional[DiskCache]) -> WorkbookSession:
+        """Sessão compartilhada por todas as páginas e usuários (chave = SHA-256 do arquivo)"""
+        return WorkbookSession(_data, _cache, key)
+except ImportError:
+    _sessions: Dict[str, WorkbookSession] = {}
+    _sessions_lock = threading.Lock()
+    
+    def _cached_session(key: str, _data: bytes, _cache: Optional[DiskCache]) -> WorkbookSession:
+        """Sem Streamlit: sessões mais recentes em um dicionário do processo"""
+        with _sessions_lock:
+            session = _sessions.pop(key, None) or WorkbookSession(_data, _cache, key)
+            _sessions[key] = session
+            while len(_sessions) > MAX_SESSIONS:
+                _sessions.pop(next(iter(_sessions)))
+            return session
+
+
+def open_session(source: Any, cache: Optional[DiskCache] = None) -> WorkbookSession:
+    """
+    Sessão compartilhada do arquivo (a mesma para o mesmo conteúdo, em qualquer página)
+    
+    Args:
+        source: Bytes, objeto arquivo (ex.: UploadedFile do Streamlit) ou caminho
+        cache: Cache em disco dos DataFrames montados (usado na criação da sessão)
+    
+    Returns:
+        WorkbookSession
+    """
+    data = _read_bytes(source)
+    return _cached_session(session_key(data), data, cache)